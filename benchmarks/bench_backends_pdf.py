@@ -0,0 +1,106 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark dos Backends de PDF
+Arquivo: benchmarks/bench_backends_pdf.py
+
+Mede, para cada backend instalado (pdfplumber, pdftotext, pdfium), a vazão
+em páginas/segundo e a concordância dos volumes extraídos com o pdfplumber,
+que é a referência atual. Um backend só deve ser adotado como padrão se
+extrair exatamente os mesmos volumes.
+
+Uso:
+    python -m benchmarks.bench_backends_pdf                     # manifesto sintético
+    python -m benchmarks.bench_backends_pdf --paginas 100
+    python -m benchmarks.bench_backends_pdf arquivo1.pdf arquivo2.pdf
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.manifesto_sintetico import gerar_manifesto_sintetico
+from src.pdf_extractor import (ManifestoExtractor, BACKENDS_PDF, BackendPdfplumber,
+                               backends_disponiveis, obter_backend)
+
+
+def _chave(volume):
+    return (volume['numero_volume'], volume['remetente'], volume['destinatario'],
+            volume['quantidade_expedida'], volume['prioridade'])
+
+
+def _extrair(pdf_path, backend):
+    """Extrai com o motor de texto e o backend informado. Retorna (segundos, cabeçalho, volumes)"""
+    extractor = ManifestoExtractor(pdf_path, backend=backend)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cabecalho, volumes = extractor.extrair()
+    return time.perf_counter() - inicio, cabecalho, volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdfs', nargs='*', help="PDFs de manifesto (padrão: sintético)")
+    parser.add_argument('--paginas', type=int, default=20, help="Páginas do manifesto sintético")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    disponiveis = backends_disponiveis()
+    ausentes = [nome for nome in BACKENDS_PDF if nome not in disponiveis]
+    print(f"Backends disponíveis: {', '.join(disponiveis) or 'nenhum'}")
+    if ausentes:
+        print(f"Não instalados: {', '.join(ausentes)}")
+    if BackendPdfplumber.nome not in disponiveis:
+        print("pdfplumber é necessário como referência de concordância.")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = args.pdfs
+        if not pdfs:
+            caminho = str(Path(tmp) / "manifesto_sintetico.pdf")
+            gerar_manifesto_sintetico(caminho, paginas=args.paginas)
+            pdfs = [caminho]
+
+        paginas = sum(obter_backend(BackendPdfplumber.nome).contar_paginas(pdf) for pdf in pdfs)
+
+        referencia = {}
+        for pdf in pdfs:
+            _, cabecalho, volumes = _extrair(pdf, BackendPdfplumber.nome)
+            referencia[pdf] = (cabecalho, {_chave(v) for v in volumes})
+
+        print(f"\n{paginas} página(s) em {len(pdfs)} arquivo(s)\n")
+        print(f"{'Backend':<12}{'Tempo (s)':>12}{'Páginas/s':>12}{'Volumes':>10}"
+              f"{'Concordância':>15}{'Cabeçalho':>12}")
+        print("-" * 73)
+
+        for backend in disponiveis:
+            melhor = None
+            resultados = {}
+            for _ in range(args.repeticoes):
+                tempo = 0.0
+                for pdf in pdfs:
+                    segundos, cabecalho, volumes = _extrair(pdf, backend)
+                    tempo += segundos
+                    resultados[pdf] = (cabecalho, {_chave(v) for v in volumes})
+                melhor = tempo if melhor is None else min(melhor, tempo)
+
+            iguais, total, n_volumes, cabecalhos_ok = 0, 0, 0, 0
+            for pdf in pdfs:
+                cab_ref, vol_ref = referencia[pdf]
+                cab, vol = resultados[pdf]
+                iguais += len(vol & vol_ref)
+                total += len(vol | vol_ref)
+                n_volumes += len(vol)
+                cabecalhos_ok += cab.get('numero_manifesto') == cab_ref.get('numero_manifesto')
+
+            concordancia = iguais / total * 100 if total else 100.0
+            print(f"{backend:<12}{melhor:>12.3f}{paginas / melhor:>12.1f}{n_volumes:>10}"
+                  f"{concordancia:>14.1f}%{cabecalhos_ok:>8}/{len(pdfs)}")
+
+
+if __name__ == "__main__":
+    main()
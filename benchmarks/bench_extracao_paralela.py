@@ -0,0 +1,84 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark da Extração Paralela
+Arquivo: benchmarks/bench_extracao_paralela.py
+
+Gera um manifesto sintético grande (200 páginas por padrão) e mede o tempo
+de extração com 1, 2, 4... processos até o número de núcleos da máquina,
+conferindo que os volumes são idênticos aos da extração sequencial.
+
+Uso:
+    python -m benchmarks.bench_extracao_paralela
+    python -m benchmarks.bench_extracao_paralela --paginas 400 --motor coordenadas
+    python -m benchmarks.bench_extracao_paralela --backend pdfium
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.manifesto_sintetico import gerar_manifesto_sintetico
+from src.pdf_extractor import (ManifestoExtractor, MOTORES_EXTRACAO, MOTOR_PADRAO,
+                               BACKEND_PADRAO, limpar_cache_templates)
+
+
+def _extrair(pdf_path, motor, backend, processos):
+    limpar_cache_templates()
+    extractor = ManifestoExtractor(pdf_path, motor=motor, backend=backend, processos=processos)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cabecalho, volumes = extractor.extrair()
+    return time.perf_counter() - inicio, cabecalho, volumes
+
+
+def _contagens_processos(nucleos):
+    contagens = []
+    n = 1
+    while n < nucleos:
+        contagens.append(n)
+        n *= 2
+    contagens.append(nucleos)
+    return contagens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--paginas', type=int, default=200)
+    parser.add_argument('--motor', choices=MOTORES_EXTRACAO, default=MOTOR_PADRAO)
+    parser.add_argument('--backend', default=BACKEND_PADRAO)
+    parser.add_argument('--max-processos', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho = str(Path(tmp) / "manifesto_grande.pdf")
+        esperados = gerar_manifesto_sintetico(caminho, paginas=args.paginas)
+
+        print(f"Manifesto sintético: {args.paginas} páginas, {len(esperados)} volumes PAMALS")
+        print(f"Motor: {args.motor} | Backend: {args.backend} | Núcleos: {os.cpu_count()}\n")
+        print(f"{'Processos':>10}{'Tempo (s)':>12}{'Páginas/s':>12}{'Speedup':>10}"
+              f"{'Eficiência':>12}{'Volumes iguais':>17}")
+        print("-" * 73)
+
+        base = None
+        referencia = None
+        for processos in _contagens_processos(args.max_processos):
+            tempo, cabecalho, volumes = _extrair(caminho, args.motor, args.backend, processos)
+            if base is None:
+                base, referencia = tempo, volumes
+            speedup = base / tempo
+            iguais = "sim" if volumes == referencia else "NÃO"
+            print(f"{processos:>10}{tempo:>12.2f}{args.paginas / tempo:>12.1f}{speedup:>9.2f}x"
+                  f"{speedup / processos * 100:>11.0f}%{iguais:>17}")
+
+        if cabecalho.get('numero_manifesto') is None:
+            print("\nAVISO: cabeçalho não encontrado na primeira página")
+
+
+if __name__ == "__main__":
+    main()
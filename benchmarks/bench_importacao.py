@@ -0,0 +1,88 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark do Tempo de Importação
+Arquivo: benchmarks/bench_importacao.py
+
+Mede, com python -X importtime, quanto custa importar main.py (o que roda
+antes da janela aparecer) e quanto disso vem da integração com o Google
+Sheets. O cenário "com Sheets" importa também sheets_sync na partida, como
+acontecia antes do carregamento sob demanda.
+
+Cada cenário roda em um processo novo, várias vezes; vale o menor tempo.
+
+Uso:
+    python -m benchmarks.bench_importacao
+    python -m benchmarks.bench_importacao --repeticoes 10 --top 15
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+CENARIOS = [
+    ('main.py (sob demanda)', "import main"),
+    ('main.py + sheets_sync', "import main; from src import sheets_sync"),
+]
+
+def medir(codigo: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Roda o código em um processo novo com -X importtime.
+    Retorna (total em µs, tempo próprio somado por pacote de nível superior).
+    """
+    ambiente = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    resultado = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo], cwd=RAIZ,
+                               env=ambiente, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(resultado.stderr.strip().splitlines()[-1])
+
+    total = 0
+    pacotes: Dict[str, int] = {}
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, _, nome = linha[len('import time:'):].split('|')
+        pacote = nome.strip().split('.')[0]
+        total += int(proprio)
+        pacotes[pacote] = pacotes.get(pacote, 0) + int(proprio)
+    return total, pacotes
+
+
+def melhor_de(codigo: str, repeticoes: int) -> Tuple[int, Dict[str, int]]:
+    medicoes = [medir(codigo) for _ in range(repeticoes)]
+    return min(medicoes, key=lambda m: m[0])
+
+
+def _ms(microssegundos: int) -> str:
+    return f"{microssegundos / 1000:8.1f} ms"
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por cenário (vale a menor)')
+    parser.add_argument('--top', type=int, default=10, help='Pacotes mais caros a listar')
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for nome, codigo in CENARIOS:
+        total, pacotes = melhor_de(codigo, args.repeticoes)
+        resultados.append((nome, total, pacotes))
+
+    for nome, total, pacotes in resultados:
+        print(f"\n{nome}: {_ms(total)}")
+        for pacote, tempo in sorted(pacotes.items(), key=lambda p: -p[1])[:args.top]:
+            print(f"  {pacote:<28}{_ms(tempo)}")
+
+    (_, base, pacotes_base), (_, com_sheets, pacotes_sheets) = resultados
+    so_sheets = {p: t for p, t in pacotes_sheets.items() if p not in pacotes_base}
+    print(f"\nPacotes importados só pela integração ({len(so_sheets)}): "
+          + ", ".join(sorted(so_sheets, key=lambda p: -so_sheets[p])[:args.top]) + ", ...")
+    print(f"Economia na partida: {_ms(com_sheets - base).strip()} "
+          f"({(com_sheets - base) / com_sheets:.0%} do tempo de importação)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark dos Motores de Extração
+Arquivo: benchmarks/bench_motores_extracao.py
+
+Compara os motores 'texto' e 'coordenadas' em acurácia e vazão.
+
+Uso:
+    python -m benchmarks.bench_motores_extracao                 # manifesto sintético
+    python -m benchmarks.bench_motores_extracao --paginas 50
+    python -m benchmarks.bench_motores_extracao arquivo1.pdf arquivo2.pdf
+
+Com o manifesto sintético a acurácia é medida contra os volumes esperados.
+Com PDFs reais, o motor 'texto' é usado como referência de concordância.
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.manifesto_sintetico import gerar_manifesto_sintetico
+from src.pdf_extractor import (ManifestoExtractor, MOTORES_EXTRACAO, MOTOR_TEXTO,
+                               limpar_cache_templates)
+
+import pdfplumber
+
+
+def _chave(volume):
+    return (volume['numero_volume'], volume['remetente'], volume['quantidade_expedida'])
+
+
+def _medir(pdf_path, motor):
+    """Extrai o PDF com o motor informado. Retorna (segundos, volumes)"""
+    extractor = ManifestoExtractor(pdf_path, motor=motor)
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, volumes = extractor.extrair()
+    return time.perf_counter() - inicio, volumes
+
+
+def _concordancia(obtidos, referencia):
+    """Fração dos volumes de referência encontrados, e extras indevidos"""
+    ref = {_chave(v) for v in referencia}
+    got = {_chave(v) for v in obtidos}
+    if not ref:
+        return 1.0 if not got else 0.0, len(got)
+    return len(ref & got) / len(ref), len(got - ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pdfs', nargs='*', help="PDFs de manifesto (padrão: sintético)")
+    parser.add_argument('--paginas', type=int, default=20, help="Páginas do manifesto sintético")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    esperados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = args.pdfs
+        if not pdfs:
+            caminho = str(Path(tmp) / "manifesto_sintetico.pdf")
+            esperados[caminho] = gerar_manifesto_sintetico(caminho, paginas=args.paginas)
+            pdfs = [caminho]
+
+        total_paginas = 0
+        for pdf in pdfs:
+            with pdfplumber.open(pdf) as documento:
+                total_paginas += len(documento.pages)
+
+        print(f"{'Motor':<14}{'Tempo (s)':>12}{'Páginas/s':>12}{'Volumes':>10}{'Acurácia':>11}{'Extras':>9}")
+        print("-" * 68)
+
+        for motor in MOTORES_EXTRACAO:
+            melhor = None
+            volumes_motor = {}
+            for _ in range(args.repeticoes):
+                limpar_cache_templates()  # inclui o custo de aprender o layout
+                tempo = 0.0
+                for pdf in pdfs:
+                    segundos, volumes = _medir(pdf, motor)
+                    tempo += segundos
+                    volumes_motor[pdf] = volumes
+                melhor = tempo if melhor is None else min(melhor, tempo)
+
+            acertos, extras, total = 0.0, 0, 0
+            for pdf in pdfs:
+                referencia = esperados.get(pdf)
+                if referencia is None:
+                    _, referencia = _medir(pdf, MOTOR_TEXTO)
+                fracao, extra = _concordancia(volumes_motor[pdf], referencia)
+                acertos += fracao * len(referencia)
+                total += len(referencia)
+                extras += extra
+
+            n_volumes = sum(len(v) for v in volumes_motor.values())
+            acuracia = acertos / total * 100 if total else 100.0
+            print(f"{motor:<14}{melhor:>12.3f}{total_paginas / melhor:>12.1f}"
+                  f"{n_volumes:>10}{acuracia:>10.1f}%{extras:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark dos Registros do Banco
+Arquivo: benchmarks/bench_registros.py
+
+Compara, em um manifesto sintético com 100 mil volumes, a listagem de
+volumes como era (dict(sqlite3.Row) para cada linha) com a atual
+(registros com __slots__ montados direto da tupla, src/registros.py):
+tempo da listagem (menor de várias execuções) e memória ocupada pela lista
+resultante (tracemalloc).
+
+Também mede a leitura típica da interface, que percorre a lista lendo
+algumas colunas por chave.
+
+Uso:
+    python -m benchmarks.bench_registros
+    python -m benchmarks.bench_registros --volumes 200000 --repeticoes 7
+"""
+
+import argparse
+import gc
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+CONSULTA = """
+    SELECT * FROM volumes
+    WHERE manifesto_id = ?
+    ORDER BY remetente, numero_volume
+"""
+
+
+def _configurar_banco(tmp: str, volumes: int) -> int:
+    """Banco novo com um manifesto de `volumes` volumes; retorna o id do manifesto"""
+    from src import database
+    database.DB_PATH = Path(tmp) / "database.db"
+    database.SHEETS_ENABLED = False
+    database.init_database()
+
+    manifesto_id = database.criar_manifesto("BENCH-REGISTROS", "05/03/2025", "SBGL", "SBBE")
+    conn = database.get_connection()
+    try:
+        conn.execute("BEGIN")
+        conn.executemany("""
+            INSERT INTO volumes (manifesto_id, remetente, destinatario, numero_volume,
+                                 quantidade_expedida, quantidade_recebida, peso_total, cubagem,
+                                 prioridade, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, ((manifesto_id, f"REMETENTE {i % 40}", f"DESTINATARIO {i % 25}", f"{i:08d}/2025",
+               3, i % 4, 12.5 + i % 7, 0.25, 'NORMAL', 'NÃO RECEBIDO') for i in range(volumes)))
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return manifesto_id
+
+
+def listar_como_dict(manifesto_id: int) -> List[dict]:
+    """Como listar_volumes fazia antes dos registros"""
+    from src import database
+    conn = database.get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(CONSULTA, (manifesto_id,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def listar_como_registro(manifesto_id: int) -> list:
+    from src import database
+    return database.listar_volumes(manifesto_id)
+
+
+def ler_como_interface(volumes: list) -> int:
+    """Leitura típica da tabela de volumes: algumas colunas por chave"""
+    total = 0
+    for volume in volumes:
+        if volume['status'] != 'COMPLETO':
+            total += volume['quantidade_expedida'] - (volume['quantidade_recebida'] or 0)
+        volume.get('peso_total')
+        volume['numero_volume']
+    return total
+
+
+def medir_tempo(funcao: Callable, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def medir_memoria(listar: Callable[[], list]) -> Tuple[int, int]:
+    """(bytes retidos pela lista, pico durante a listagem)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        lista = listar()
+        retido, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del lista
+    return retido, pico
+
+
+def _mb(tamanho: int) -> str:
+    return f"{tamanho / 1024 / 1024:8.1f} MB"
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--volumes', type=int, default=100000, help='Volumes do manifesto sintético')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Execuções por medida de tempo (vale a menor)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifesto_id = _configurar_banco(tmp, args.volumes)
+        cenarios = [
+            ('dict(sqlite3.Row)', lambda: listar_como_dict(manifesto_id)),
+            ('registros (__slots__)', lambda: listar_como_registro(manifesto_id)),
+        ]
+
+        resultados = []
+        for nome, listar in cenarios:
+            lista = listar()
+            assert len(lista) == args.volumes
+            tempo = medir_tempo(listar, args.repeticoes)
+            leitura = medir_tempo(lambda: ler_como_interface(lista), args.repeticoes)
+            del lista
+            retido, pico = medir_memoria(listar)
+            resultados.append((nome, tempo, leitura, retido, pico))
+
+    print(f"\nListagem de {args.volumes} volumes (menor de {args.repeticoes}):\n")
+    print(f"  {'':<24}{'listar':>10}{'ler':>10}{'memória':>12}{'pico':>12}")
+    for nome, tempo, leitura, retido, pico in resultados:
+        print(f"  {nome:<24}{tempo * 1000:7.0f} ms{leitura * 1000:7.0f} ms{_mb(retido):>12}{_mb(pico):>12}")
+
+    (_, tempo_dict, _, retido_dict, _), (_, tempo_reg, _, retido_reg, _) = resultados
+    print(f"\nListagem {tempo_dict / tempo_reg:.1f}x mais rápida, "
+          f"{1 - retido_reg / retido_dict:.0%} menos memória por lista")
+
+
+if __name__ == '__main__':
+    main()
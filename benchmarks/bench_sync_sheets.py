@@ -0,0 +1,288 @@
+"""
+Sistema de Conferência de Manifestos - Benchmark da Sincronização com o Sheets
+Arquivo: benchmarks/bench_sync_sheets.py
+
+Reproduz uma conferência gravada (criação do manifesto, volumes e leitura
+caixa a caixa) contra o Google Sheets simulado (benchmarks/sheets_fake.py),
+passando pelas funções reais do banco e pelo sheets_sync. Reporta chamadas
+de API por leitura de caixa e o atraso entre a leitura e a linha aparecer
+atualizada na planilha.
+
+A gravação pode ser sintética, vir de um arquivo JSONL ou ser montada a
+partir de um banco real (horários de recepção das caixas). Com --acelerar,
+o tempo da reprodução, a janela de cota e as esperas do sheets_sync são
+comprimidos; os tempos reportados são sempre em segundos simulados.
+
+Uso:
+    python -m benchmarks.bench_sync_sheets
+    python -m benchmarks.bench_sync_sheets --acelerar 20 --latencia 0.2 --prob-429 0.02
+    python -m benchmarks.bench_sync_sheets --banco data/database.db --manifesto 202531000635
+    python -m benchmarks.bench_sync_sheets --gravar conferencia.jsonl
+    python -m benchmarks.bench_sync_sheets --gravacao conferencia.jsonl
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.sheets_fake import ClienteSheetsFake
+
+
+# ================= GRAVAÇÕES =================
+# Cada evento: {"t": segundos desde o início, "acao": ..., demais campos}
+#   criar_manifesto   numero
+#   adicionar_volume  numero, numero_volume, remetente, destinatario, quantidade
+#   marcar_caixa      numero, numero_volume, caixa, usuario
+#   finalizar         numero
+
+def gerar_conferencia_sintetica(manifestos: int = 2, volumes: int = 60, caixas_max: int = 4,
+                                intervalo_leitura: float = 2.0, semente: int = 42) -> List[Dict]:
+    """Manifestos importados de uma vez e conferidos em paralelo por operadores diferentes"""
+    aleatorio = random.Random(semente)
+    eventos = []
+    leituras = []
+    for m in range(manifestos):
+        numero = f"20253100{m + 1:04d}"
+        eventos.append({'t': 0.0, 'acao': 'criar_manifesto', 'numero': numero})
+        for v in range(volumes):
+            numero_volume = f"{aleatorio.randint(10**8, 10**9 - 1)}"
+            quantidade = aleatorio.randint(1, caixas_max)
+            eventos.append({'t': 0.0, 'acao': 'adicionar_volume', 'numero': numero,
+                            'numero_volume': numero_volume, 'remetente': 'BACO',
+                            'destinatario': 'PAMALS', 'quantidade': quantidade})
+            # Alguns volumes não chegam
+            if aleatorio.random() < 0.9:
+                leituras.extend((numero, numero_volume, caixa) for caixa in range(1, quantidade + 1))
+
+    aleatorio.shuffle(leituras)
+    instante = 5.0
+    for numero, numero_volume, caixa in leituras:
+        instante += aleatorio.expovariate(1 / intervalo_leitura)
+        eventos.append({'t': round(instante, 3), 'acao': 'marcar_caixa', 'numero': numero,
+                        'numero_volume': numero_volume, 'caixa': caixa, 'usuario': 'Conferente'})
+
+    for m in range(manifestos):
+        eventos.append({'t': round(instante + 1, 3), 'acao': 'finalizar', 'numero': f"20253100{m + 1:04d}"})
+    return eventos
+
+
+def gravacao_do_banco(db_path: str, numero_manifesto: str) -> List[Dict]:
+    """Reconstrói a conferência de um manifesto a partir dos horários de recepção das caixas"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        man = conn.execute("SELECT * FROM manifestos WHERE numero_manifesto = ?", (numero_manifesto,)).fetchone()
+        if man is None:
+            raise ValueError(f"Manifesto {numero_manifesto} não encontrado em {db_path}")
+
+        eventos = [{'t': 0.0, 'acao': 'criar_manifesto', 'numero': numero_manifesto}]
+        for vol in conn.execute("SELECT * FROM volumes WHERE manifesto_id = ? ORDER BY id", (man['id'],)):
+            eventos.append({'t': 0.0, 'acao': 'adicionar_volume', 'numero': numero_manifesto,
+                            'numero_volume': vol['numero_volume'], 'remetente': vol['remetente'],
+                            'destinatario': vol['destinatario'], 'quantidade': vol['quantidade_expedida']})
+
+        caixas = conn.execute("""
+            SELECT v.numero_volume, c.numero_caixa, c.data_hora_recepcao, c.usuario_conferente
+            FROM caixas_individuais c JOIN volumes v ON c.volume_id = v.id
+            WHERE v.manifesto_id = ? AND c.status = 'RECEBIDA' AND c.data_hora_recepcao IS NOT NULL
+            ORDER BY c.data_hora_recepcao
+        """, (man['id'],)).fetchall()
+    finally:
+        conn.close()
+
+    if caixas:
+        inicio = datetime.fromisoformat(caixas[0]['data_hora_recepcao'])
+        for caixa in caixas:
+            t = (datetime.fromisoformat(caixa['data_hora_recepcao']) - inicio).total_seconds()
+            eventos.append({'t': 5.0 + t, 'acao': 'marcar_caixa', 'numero': numero_manifesto,
+                            'numero_volume': caixa['numero_volume'], 'caixa': caixa['numero_caixa'],
+                            'usuario': caixa['usuario_conferente'] or 'Sistema'})
+    eventos.append({'t': eventos[-1]['t'] + 1, 'acao': 'finalizar', 'numero': numero_manifesto})
+    return eventos
+
+
+def salvar_gravacao(eventos: List[Dict], caminho: str):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        for evento in eventos:
+            f.write(json.dumps(evento, ensure_ascii=False) + '\n')
+
+
+def carregar_gravacao(caminho: str) -> List[Dict]:
+    with open(caminho, encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+
+# ================= REPRODUÇÃO =================
+
+class _MedidorAtraso:
+    """Casa cada leitura de caixa com a primeira escrita na planilha que já a reflete"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pendentes: Dict[tuple, List[tuple]] = {}  # (aba, volume) -> [(recebidas, instante)]
+        self.atrasos: List[float] = []
+
+    def leitura(self, numero: str, numero_volume: str, recebidas: int):
+        with self._lock:
+            self._pendentes.setdefault((numero, numero_volume), []).append((recebidas, time.monotonic()))
+
+    def escrita(self, ws, linha, valores, instante):
+        for valores_linha in valores:
+            if len(valores_linha) < 5 or not isinstance(valores_linha[4], str) or ' / ' not in valores_linha[4]:
+                continue
+            recebidas = int(valores_linha[4].split(' / ')[0])
+            with self._lock:
+                pendentes = self._pendentes.get((ws.title, valores_linha[3]))
+                if not pendentes:
+                    continue
+                atendidas = [p for p in pendentes if p[0] <= recebidas]
+                self._pendentes[(ws.title, valores_linha[3])] = [p for p in pendentes if p[0] > recebidas]
+                self.atrasos.extend(instante - p[1] for p in atendidas)
+
+    @property
+    def sem_resposta(self) -> int:
+        with self._lock:
+            return sum(len(p) for p in self._pendentes.values())
+
+
+def _configurar_banco(tmp: str):
+    from src import database
+    database.DB_PATH = Path(tmp) / "database.db"
+    database.init_database()
+    database.SHEETS_ENABLED = True  # O cliente simulado dispensa o credentials.json
+    return database
+
+
+def reproduzir(eventos: List[Dict], cliente: ClienteSheetsFake, acelerar: float) -> Dict:
+    from src import sheets_sync
+    from src import database
+
+    medidor = _MedidorAtraso()
+    cliente.observar_escritas(medidor.escrita)
+
+    ids_manifesto: Dict[str, int] = {}
+    ids_volume: Dict[tuple, int] = {}
+    recebidas: Dict[tuple, int] = {}
+    leituras = 0
+
+    inicio = time.monotonic()
+    for evento in sorted(eventos, key=lambda e: e['t']):
+        atraso = inicio + evento['t'] / acelerar - time.monotonic()
+        if atraso > 0:
+            time.sleep(atraso)
+
+        numero = evento['numero']
+        if evento['acao'] == 'criar_manifesto':
+            ids_manifesto[numero] = database.criar_manifesto(numero, datetime.now().strftime("%d/%m/%Y"),
+                                                             '', 'PCAN-LS')
+        elif evento['acao'] == 'adicionar_volume':
+            chave = (numero, evento['numero_volume'])
+            ids_volume[chave] = database.adicionar_volume(ids_manifesto[numero], evento['remetente'],
+                                                          evento['destinatario'], evento['numero_volume'],
+                                                          evento['quantidade'])
+        elif evento['acao'] == 'marcar_caixa':
+            chave = (numero, evento['numero_volume'])
+            database.marcar_caixa_recebida(ids_volume[chave], evento['caixa'], evento['usuario'])
+            recebidas[chave] = recebidas.get(chave, 0) + 1
+            medidor.leitura(numero, evento['numero_volume'], recebidas[chave])
+            leituras += 1
+        elif evento['acao'] == 'finalizar':
+            database.finalizar_conferencia(ids_manifesto[numero])
+    fim_eventos = time.monotonic()
+
+    # Espera o outbox esvaziar
+    while True:
+        contagem = database.contar_outbox()
+        if contagem['PENDENTE'] == 0 and sheets_sync.tamanho_fila() == 0 and not sheets_sync._em_andamento:
+            break
+        time.sleep(0.05)
+    fim = time.monotonic()
+
+    return {
+        'leituras': leituras,
+        'duracao': (fim_eventos - inicio) * acelerar,
+        'escoamento': (fim - fim_eventos) * acelerar,
+        'atrasos': [a * acelerar for a in medidor.atrasos],
+        'sem_resposta': medidor.sem_resposta,
+        'outbox': database.contar_outbox(),
+    }
+
+
+def _percentil(valores: List[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gravacao', help="Arquivo JSONL com a conferência a reproduzir")
+    parser.add_argument('--gravar', help="Salva a gravação usada neste arquivo JSONL")
+    parser.add_argument('--banco', help="Monta a gravação a partir deste banco (requer --manifesto)")
+    parser.add_argument('--manifesto', help="Número do manifesto no banco")
+    parser.add_argument('--manifestos', type=int, default=2, help="Manifestos da gravação sintética")
+    parser.add_argument('--volumes', type=int, default=60, help="Volumes por manifesto (sintética)")
+    parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos médios entre leituras (sintética)")
+    parser.add_argument('--latencia', type=float, default=0.15, help="Latência por chamada de API (s)")
+    parser.add_argument('--cota', type=int, default=60, help="Cota por minuto (leitura e escrita)")
+    parser.add_argument('--prob-429', type=float, default=0.0, help="Probabilidade de 429 aleatório")
+    parser.add_argument('--acelerar', type=float, default=10.0, help="Fator de compressão do tempo")
+    args = parser.parse_args()
+
+    if args.banco:
+        if not args.manifesto:
+            parser.error("--banco requer --manifesto")
+        eventos = gravacao_do_banco(args.banco, args.manifesto)
+    elif args.gravacao:
+        eventos = carregar_gravacao(args.gravacao)
+    else:
+        eventos = gerar_conferencia_sintetica(args.manifestos, args.volumes, intervalo_leitura=args.intervalo)
+    if args.gravar:
+        salvar_gravacao(eventos, args.gravar)
+
+    from src import sheets_sync
+    acel = args.acelerar
+    sheets_sync.JANELA_FLUSH /= acel
+    sheets_sync.INTERVALO_OUTBOX /= acel
+    sheets_sync.configurar_cotas(args.cota, args.cota, janela=60.0 / acel)
+    cliente = ClienteSheetsFake(latencia=args.latencia / acel, cota_leitura=args.cota,
+                                cota_escrita=args.cota, janela_cota=60.0 / acel, prob_429=args.prob_429)
+    sheets_sync.usar_cliente(cliente)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configurar_banco(tmp)
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            resultado = reproduzir(eventos, cliente, acel)
+
+    http = cliente.http_client
+    leituras = resultado['leituras'] or 1
+    atrasos = resultado['atrasos']
+    print(f"Eventos: {len(eventos)} | Leituras de caixa: {resultado['leituras']} | "
+          f"Duração simulada: {resultado['duracao']:.0f}s")
+    print(f"Latência da API: {args.latencia:.2f}s | Cota: {args.cota}/min | 429 aleatório: {args.prob_429:.0%}\n")
+    print(f"Chamadas de API:       {http.total} ({http.chamadas['GET']} leituras, {http.chamadas['POST']} escritas)")
+    print(f"Chamadas por leitura:  {http.total / leituras:.2f}")
+    print(f"Respostas 429:         {http.respostas_429}")
+    print(f"Atraso leitura→planilha (s): p50 {_percentil(atrasos, 50):.1f} | p95 {_percentil(atrasos, 95):.1f} | "
+          f"máx {max(atrasos, default=0):.1f} | média {statistics.fmean(atrasos) if atrasos else 0:.1f}")
+    print(f"Escoamento após o último evento: {resultado['escoamento']:.1f}s")
+    print(f"Outbox: {resultado['outbox']} | Leituras sem escrita correspondente: {resultado['sem_resposta']}")
+
+
+if __name__ == "__main__":
+    main()
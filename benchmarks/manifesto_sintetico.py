@@ -0,0 +1,182 @@
+"""
+Sistema de Conferência de Manifestos - Gerador de Manifesto Sintético
+Arquivo: benchmarks/manifesto_sintetico.py
+
+Gera um PDF de manifesto com o mesmo layout de tabela dos manifestos reais
+(sem depender de bibliotecas externas) e devolve os volumes esperados,
+permitindo medir desempenho e acurácia dos extratores.
+"""
+
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+LARGURA_PAGINA = 842
+ALTURA_PAGINA = 595
+TAMANHO_FONTE = 7
+LINHAS_POR_PAGINA = 40
+
+# (nome, x, alinhamento) - numéricos são alinhados à direita
+COLUNAS = [
+    ('remetente', 20, 'E'),
+    ('destinatario', 130, 'E'),
+    ('numero_volume', 200, 'E'),
+    ('peso_total', 335, 'D'),
+    ('cubagem', 375, 'D'),
+    ('tipo_material', 395, 'E'),
+    ('quantidade_expedida', 495, 'D'),
+    ('quantidade_recebida', 520, 'D'),
+    ('prioridade', 545, 'D'),
+]
+
+REMETENTES = [
+    ('PAMASP', 'PAMASP'),
+    ('CABW', 'CABW'),
+    ('BACO / BACO', 'BACO'),
+    ('GACPAC', 'GAC-PAC'),
+    ('AFA', 'AFA'),
+    ('SUP BACO', 'BACO'),
+    ('CLTA', 'CTLA'),
+]
+
+# (texto impresso, aceito como PAMALS)
+DESTINATARIOS = [
+    ('PAMALS', True),
+    ('PAMA-LS', True),
+    ('PAMA LS', True),
+    ('BAGL', False),
+]
+
+TIPOS_MATERIAL = ['Sem Restrições', 'Aeronáutico', 'Gás Comprimido']
+
+
+def _escapar(texto: str) -> str:
+    return texto.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _largura_texto(texto: str) -> float:
+    # Aproximação da largura Helvetica (0,5 em por caractere)
+    return len(texto) * TAMANHO_FONTE * 0.5
+
+
+def _gerar_linhas(numero_pagina: int, rng: random.Random) -> Tuple[List[Dict], List[Dict]]:
+    """Gera as células de uma página e os volumes PAMALS esperados"""
+    linhas = []
+    esperados = []
+
+    for i in range(LINHAS_POR_PAGINA):
+        rem_impresso, rem_padrao = rng.choice(REMETENTES)
+        dest_impresso, aceito = rng.choice(DESTINATARIOS)
+        numero = f"2513{numero_pagina:04d}{i:04d}/0001"
+        quantidade = rng.choice([1, 1, 1, 2, 4, 12])
+        if quantidade > 1:
+            volume = f"{numero} -{quantidade:04d}"
+        else:
+            volume = numero
+        peso = rng.uniform(1, 300)
+        cubagem = rng.uniform(0.01, 2)
+        tipo = rng.choice(TIPOS_MATERIAL)
+        prioridade = rng.choice(['02', '04', '06'])
+
+        linhas.append({
+            'remetente': rem_impresso,
+            'destinatario': dest_impresso,
+            'numero_volume': volume,
+            'peso_total': f"{peso:.3f}".replace('.', ','),
+            'cubagem': f"{cubagem:.3f}".replace('.', ','),
+            'tipo_material': tipo,
+            'quantidade_expedida': str(quantidade),
+            'quantidade_recebida': '0',
+            'prioridade': prioridade,
+        })
+
+        if aceito:
+            esperados.append({
+                'remetente': rem_padrao,
+                'destinatario': 'PAMALS',
+                'numero_volume': volume.replace(' ', ''),
+                'quantidade_expedida': quantidade,
+                'prioridade': prioridade,
+                'tipo_material': tipo,
+            })
+
+    return linhas, esperados
+
+
+def _conteudo_pagina(numero_pagina: int, total_paginas: int, linhas: List[Dict]) -> bytes:
+    comandos = [f"BT /F1 {TAMANHO_FONTE} Tf"]
+
+    def texto(x: float, y: float, valor: str):
+        comandos.append(f"1 0 0 1 {x:.2f} {y:.2f} Tm ({_escapar(valor)}) Tj")
+
+    y = ALTURA_PAGINA - 30
+    texto(20, y, "Manifesto: 202531000635")
+    texto(700, y, f"Página {numero_pagina} de {total_paginas}")
+    y -= 12
+    texto(20, y, "TERMINAL DE ORIGEM: PCAN-GR")
+    texto(300, y, "TERMINAL DE DESTINO: PCAN-LS")
+    y -= 12
+    texto(20, y, "MISSÃO: FAB 2309")
+    texto(300, y, "AERONAVE: C-95")
+    y -= 20
+
+    for linha in linhas:
+        for nome, x, alinhamento in COLUNAS:
+            valor = linha[nome]
+            if alinhamento == 'D':
+                x = x - _largura_texto(valor)
+            texto(x, y, valor)
+        y -= 12
+
+    comandos.append("ET")
+    return "\n".join(comandos).encode('latin-1')
+
+
+def gerar_manifesto_sintetico(destino: str, paginas: int = 10, semente: int = 42) -> List[Dict]:
+    """
+    Grava um manifesto sintético em PDF com o número de páginas pedido.
+    Retorna a lista de volumes PAMALS que um extrator correto deve encontrar.
+    """
+    rng = random.Random(semente)
+    objetos: List[bytes] = []
+    esperados: List[Dict] = []
+
+    # 1: catálogo, 2: árvore de páginas, 3: fonte
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objetos.append(b"")  # preenchido após criar as páginas
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                   b"/Encoding /WinAnsiEncoding >>")
+
+    ids_paginas = []
+    for numero in range(1, paginas + 1):
+        linhas, esperados_pagina = _gerar_linhas(numero, rng)
+        esperados.extend(esperados_pagina)
+
+        conteudo = _conteudo_pagina(numero, paginas, linhas)
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(conteudo) + conteudo + b"\nendstream")
+        id_conteudo = len(objetos)
+
+        objetos.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {LARGURA_PAGINA} {ALTURA_PAGINA}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {id_conteudo} 0 R >>"
+        ).encode('latin-1'))
+        ids_paginas.append(len(objetos))
+
+    kids = " ".join(f"{i} 0 R" for i in ids_paginas)
+    objetos[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(ids_paginas)} >>".encode('latin-1')
+
+    saida = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, obj in enumerate(objetos, 1):
+        offsets.append(len(saida))
+        saida += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for offset in offsets:
+        saida += b"%010d 00000 n \n" % offset
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objetos) + 1, inicio_xref)
+
+    Path(destino).write_bytes(bytes(saida))
+    return esperados
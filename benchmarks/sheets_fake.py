@@ -0,0 +1,423 @@
+"""
+Sistema de Conferência de Manifestos - Google Sheets Simulado
+Arquivo: benchmarks/sheets_fake.py
+
+Implementação local do subconjunto da API do gspread usado por sheets_sync
+(open_by_key, worksheet, add_worksheet, duplicate_sheet, update, append_row,
+col_values, get_values, format, batch_update, values_batch_update,
+merge_cells, freeze, clear). Permite testar e medir a sincronização sem
+credentials.json e sem rede.
+
+Cada operação passa por http_client.request(), como no gspread real, onde
+são aplicadas a latência configurada, a cota por minuto (leitura e escrita)
+e a injeção de respostas 429.
+
+Uso:
+    from benchmarks.sheets_fake import ClienteSheetsFake
+    cliente = ClienteSheetsFake(latencia=0.05, cota_leitura=60, cota_escrita=60)
+    sheets_sync.usar_cliente(cliente)
+"""
+
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_to_rowcol, a1_range_to_grid_range
+
+LEITURA = 'GET'
+ESCRITA = 'POST'
+
+
+class _RespostaFake:
+    """O suficiente de requests.Response para construir um gspread APIError"""
+
+    def __init__(self, codigo: int, mensagem: str):
+        self.status_code = codigo
+        self.text = mensagem
+        self.ok = False
+        self._erro = {'code': codigo, 'message': mensagem,
+                      'status': 'RESOURCE_EXHAUSTED' if codigo == 429 else 'INVALID_ARGUMENT'}
+
+    def json(self):
+        return {'error': self._erro}
+
+
+def _erro_api(codigo: int, mensagem: str) -> APIError:
+    return APIError(_RespostaFake(codigo, mensagem))
+
+
+class HttpClientFake:
+    """
+    Ponto único por onde passam todas as chamadas do cliente simulado.
+    Conta as chamadas e aplica latência, cota e falhas injetadas.
+    """
+
+    def __init__(self, latencia: float = 0.0, variacao_latencia: float = 0.0,
+                 cota_leitura: Optional[int] = None, cota_escrita: Optional[int] = None,
+                 janela_cota: float = 60.0, prob_429: float = 0.0, semente: int = 42):
+        self.latencia = latencia
+        self.variacao_latencia = variacao_latencia
+        self.cota = {LEITURA: cota_leitura, ESCRITA: cota_escrita}
+        self.janela_cota = janela_cota
+        self.prob_429 = prob_429
+        self._aleatorio = random.Random(semente)
+        self._lock = threading.Lock()
+        self._recentes = {LEITURA: deque(), ESCRITA: deque()}
+
+        self.chamadas = Counter()        # por tipo (GET/POST) e por operação
+        self.respostas_429 = 0
+        self.historico: List[Tuple[float, str, str]] = []
+
+    def request(self, method: str, endpoint: str, **kwargs):
+        tipo = LEITURA if method.upper() == 'GET' else ESCRITA
+        if self.latencia or self.variacao_latencia:
+            time.sleep(self.latencia + self._aleatorio.uniform(0, self.variacao_latencia))
+
+        with self._lock:
+            agora = time.monotonic()
+            self.chamadas[tipo] += 1
+            self.chamadas[endpoint] += 1
+            self.historico.append((agora, tipo, endpoint))
+
+            recentes = self._recentes[tipo]
+            while recentes and agora - recentes[0] >= self.janela_cota:
+                recentes.popleft()
+
+            limite = self.cota[tipo]
+            if (limite is not None and len(recentes) >= limite) or self._aleatorio.random() < self.prob_429:
+                self.respostas_429 += 1
+                raise _erro_api(429, f"Quota exceeded for {tipo} requests ({endpoint})")
+            recentes.append(agora)
+
+    @property
+    def total(self) -> int:
+        return self.chamadas[LEITURA] + self.chamadas[ESCRITA]
+
+
+class WorksheetFake:
+    def __init__(self, planilha: 'SpreadsheetFake', sheet_id: int, titulo: str, linhas: int, colunas: int):
+        self.spreadsheet = planilha
+        self.id = sheet_id
+        self.title = titulo
+        self.row_count = linhas
+        self.col_count = colunas
+        self.celulas: Dict[Tuple[int, int], object] = {}
+        self.formatos: Dict[Tuple[int, int], dict] = {}
+        self.regras_condicionais: List[dict] = []
+        self.mescladas: List[dict] = []
+        self.linhas_congeladas = 0
+
+    # --- Acesso interno (sem contar chamadas) ---
+
+    def _validar(self, linha: int, coluna: int):
+        if linha > self.row_count or coluna > self.col_count:
+            raise _erro_api(400, f"Range ('{self.title}'!R{linha}C{coluna}) exceeds grid limits. "
+                                 f"Max rows: {self.row_count}, max columns: {self.col_count}")
+
+    def _escrever(self, linha: int, coluna: int, valores: List[list]):
+        for i, valores_linha in enumerate(valores):
+            for j, valor in enumerate(valores_linha):
+                self._validar(linha + i, coluna + j)
+        for i, valores_linha in enumerate(valores):
+            for j, valor in enumerate(valores_linha):
+                if valor in ('', None):
+                    self.celulas.pop((linha + i, coluna + j), None)
+                else:
+                    self.celulas[(linha + i, coluna + j)] = valor
+        self.spreadsheet.cliente._notificar(self, linha, valores)
+
+    def _ultima_linha(self) -> int:
+        return max((l for l, _ in self.celulas), default=0)
+
+    def _valores(self, linha_ini: int, linha_fim: int, col_ini: int, col_fim: int) -> List[list]:
+        resultado = []
+        for linha in range(linha_ini, min(linha_fim, self._ultima_linha()) + 1):
+            valores = [self.celulas.get((linha, c), '') for c in range(col_ini, col_fim + 1)]
+            while valores and valores[-1] == '':
+                valores.pop()
+            resultado.append(valores)
+        while resultado and not resultado[-1]:
+            resultado.pop()
+        return resultado
+
+    def valor(self, rotulo: str):
+        """Valor de uma célula ('B2'), para conferência nos testes"""
+        return self.celulas.get(a1_to_rowcol(rotulo), '')
+
+    def linhas(self) -> List[list]:
+        """Todas as linhas preenchidas, para conferência nos testes"""
+        return self._valores(1, self._ultima_linha(), 1, self.col_count)
+
+    # --- API do gspread ---
+
+    def update(self, range_name: str = None, values: List[list] = None, **kwargs):
+        self.spreadsheet.cliente.http_client.request('PUT', 'values.update')
+        linha, coluna = a1_to_rowcol(range_name.split(':')[0].split('!')[-1])
+        self._escrever(linha, coluna, values)
+
+    def append_row(self, values: list, **kwargs):
+        self.spreadsheet.cliente.http_client.request('POST', 'values.append')
+        linha = self._ultima_linha() + 1
+        if linha > self.row_count:
+            self.row_count = linha
+        self._escrever(linha, 1, [values])
+
+    def col_values(self, col: int, **kwargs) -> list:
+        self.spreadsheet.cliente.http_client.request('GET', 'values.get')
+        valores = [self.celulas.get((l, col), '') for l in range(1, self._ultima_linha() + 1)]
+        while valores and valores[-1] == '':
+            valores.pop()
+        return valores
+
+    def get_values(self, range_name: str = None, **kwargs) -> List[list]:
+        self.spreadsheet.cliente.http_client.request('GET', 'values.get')
+        if range_name is None:
+            return self.linhas()
+        grade = a1_range_to_grid_range(range_name.split('!')[-1])
+        return self._valores(grade.get('startRowIndex', 0) + 1, grade.get('endRowIndex', self.row_count),
+                             grade.get('startColumnIndex', 0) + 1, grade.get('endColumnIndex', self.col_count))
+
+    def format(self, ranges: str, format: dict, **kwargs):
+        grade = a1_range_to_grid_range(ranges)
+        grade['sheetId'] = self.id
+        self.spreadsheet.batch_update({'requests': [{
+            'repeatCell': {'range': grade, 'cell': {'userEnteredFormat': format},
+                           'fields': 'userEnteredFormat(%s)' % ','.join(format)}
+        }]})
+
+    def merge_cells(self, name: str, merge_type: str = 'MERGE_ALL'):
+        grade = a1_range_to_grid_range(name)
+        grade['sheetId'] = self.id
+        self.spreadsheet.batch_update({'requests': [{'mergeCells': {'range': grade, 'mergeType': merge_type}}]})
+
+    def freeze(self, rows: int = None, cols: int = None):
+        self.spreadsheet.batch_update({'requests': [{'updateSheetProperties': {
+            'properties': {'sheetId': self.id, 'gridProperties': {'frozenRowCount': rows or 0}},
+            'fields': 'gridProperties.frozenRowCount'
+        }}]})
+
+    def clear(self):
+        self.spreadsheet.cliente.http_client.request('POST', 'values.clear')
+        self.celulas.clear()
+
+
+class SpreadsheetFake:
+    def __init__(self, cliente: 'ClienteSheetsFake', chave: str):
+        self.cliente = cliente
+        self.id = chave
+        self._abas: Dict[str, WorksheetFake] = {}
+        self._proximo_id = 1
+
+    # --- Acesso interno ---
+
+    def _aba_por_id(self, sheet_id: int) -> WorksheetFake:
+        for ws in self._abas.values():
+            if ws.id == sheet_id:
+                return ws
+        raise _erro_api(400, f"No grid with id: {sheet_id}")
+
+    def _nova_aba(self, titulo: str, linhas: int, colunas: int, sheet_id: int = None) -> WorksheetFake:
+        if titulo in self._abas:
+            raise _erro_api(400, f'A sheet with the name "{titulo}" already exists.')
+        if sheet_id is None:
+            sheet_id = self._proximo_id
+        self._proximo_id = max(self._proximo_id, sheet_id) + 1
+        ws = WorksheetFake(self, sheet_id, titulo, linhas, colunas)
+        self._abas[titulo] = ws
+        return ws
+
+    def aba(self, titulo: str) -> Optional[WorksheetFake]:
+        """Aba pelo título sem contar chamada, para conferência nos testes"""
+        return self._abas.get(titulo)
+
+    # --- API do gspread ---
+
+    def fetch_sheet_metadata(self, params=None):
+        self.cliente.http_client.request('GET', 'spreadsheets.get')
+        return {'sheets': [{'properties': {'sheetId': ws.id, 'title': ws.title,
+                                           'gridProperties': {'rowCount': ws.row_count,
+                                                              'columnCount': ws.col_count}},
+                            'conditionalFormats': list(ws.regras_condicionais)}
+                           for ws in self._abas.values()]}
+
+    def worksheet(self, title: str) -> WorksheetFake:
+        self.cliente.http_client.request('GET', 'spreadsheets.get')
+        if title not in self._abas:
+            raise WorksheetNotFound(title)
+        return self._abas[title]
+
+    def worksheets(self) -> List[WorksheetFake]:
+        self.cliente.http_client.request('GET', 'spreadsheets.get')
+        return list(self._abas.values())
+
+    def add_worksheet(self, title: str, rows: int, cols: int, index: int = None) -> WorksheetFake:
+        resposta = self.batch_update({'requests': [{'addSheet': {'properties': {
+            'title': title, 'gridProperties': {'rowCount': rows, 'columnCount': cols}}}}]})
+        return self._aba_por_id(resposta['replies'][0]['addSheet']['properties']['sheetId'])
+
+    def duplicate_sheet(self, source_sheet_id: int, insert_sheet_index: int = None,
+                        new_sheet_id: int = None, new_sheet_name: str = None) -> WorksheetFake:
+        resposta = self.batch_update({'requests': [{'duplicateSheet': {
+            'sourceSheetId': source_sheet_id, 'newSheetName': new_sheet_name,
+            'newSheetId': new_sheet_id, 'insertSheetIndex': insert_sheet_index}}]})
+        return self._aba_por_id(resposta['replies'][0]['duplicateSheet']['properties']['sheetId'])
+
+    def values_get(self, range: str, params=None) -> dict:
+        titulo, intervalo = self._separar_intervalo(range)
+        ws = self._abas.get(titulo)
+        if ws is None:
+            self.cliente.http_client.request('GET', 'values.get')
+            raise _erro_api(400, f"Unable to parse range: {range}")
+        valores = ws.get_values(intervalo)
+        if (params or {}).get('majorDimension') == 'COLUMNS':
+            largura = max((len(v) for v in valores), default=0)
+            valores = [list(coluna) for coluna in zip(*(v + [''] * (largura - len(v)) for v in valores))]
+            for coluna in valores:
+                while coluna and coluna[-1] == '':
+                    coluna.pop()
+        return {'range': range, 'values': valores}
+
+    def values_batch_update(self, body: dict = None) -> dict:
+        self.cliente.http_client.request('POST', 'values.batchUpdate')
+        alvos = []
+        for dado in body.get('data', []):
+            titulo, intervalo = self._separar_intervalo(dado['range'])
+            ws = self._abas.get(titulo)
+            if ws is None:
+                raise _erro_api(400, f"Unable to parse range: {dado['range']}")
+            linha, coluna = a1_to_rowcol(intervalo.split(':')[0])
+            for i, valores_linha in enumerate(dado['values']):
+                ws._validar(linha + i, coluna + max(len(valores_linha), 1) - 1)
+            alvos.append((ws, linha, coluna, dado['values']))
+        # Tudo ou nada, como na API real
+        for ws, linha, coluna, valores in alvos:
+            ws._escrever(linha, coluna, valores)
+        return {'totalUpdatedRows': sum(len(a[3]) for a in alvos)}
+
+    def batch_update(self, body: dict) -> dict:
+        self.cliente.http_client.request('POST', 'spreadsheets.batchUpdate')
+        respostas = []
+        for requisicao in body.get('requests', []):
+            (tipo, conteudo), = requisicao.items()
+            tratador = getattr(self, f'_req_{tipo}', None)
+            if tratador is None:
+                raise _erro_api(400, f"Requisição não suportada pelo simulador: {tipo}")
+            respostas.append(tratador(conteudo) or {})
+        return {'replies': respostas}
+
+    @staticmethod
+    def _separar_intervalo(intervalo: str) -> Tuple[Optional[str], str]:
+        if '!' not in intervalo:
+            return None, intervalo
+        titulo, resto = intervalo.rsplit('!', 1)
+        return titulo.strip("'").replace("''", "'"), resto
+
+    # --- Requisições de batch_update ---
+
+    def _celulas_grade(self, grade: dict):
+        ws = self._aba_por_id(grade['sheetId'])
+        linha_fim = grade.get('endRowIndex', ws.row_count)
+        col_fim = grade.get('endColumnIndex', ws.col_count)
+        ws._validar(linha_fim, col_fim)
+        for linha in range(grade.get('startRowIndex', 0) + 1, linha_fim + 1):
+            for coluna in range(grade.get('startColumnIndex', 0) + 1, col_fim + 1):
+                yield ws, (linha, coluna)
+
+    def _req_repeatCell(self, conteudo):
+        formato = conteudo['cell'].get('userEnteredFormat', {})
+        for ws, celula in self._celulas_grade(conteudo['range']):
+            ws.formatos.setdefault(celula, {}).update(formato)
+
+    def _req_appendDimension(self, conteudo):
+        ws = self._aba_por_id(conteudo['sheetId'])
+        if conteudo['dimension'] == 'ROWS':
+            ws.row_count += conteudo['length']
+        else:
+            ws.col_count += conteudo['length']
+
+    def _req_autoResizeDimensions(self, conteudo):
+        self._aba_por_id(conteudo['dimensions']['sheetId'])
+
+    def _req_updateDimensionProperties(self, conteudo):
+        self._aba_por_id(conteudo['range']['sheetId'])
+
+    def _req_mergeCells(self, conteudo):
+        self._aba_por_id(conteudo['range']['sheetId']).mescladas.append(conteudo['range'])
+
+    def _req_updateSheetProperties(self, conteudo):
+        propriedades = conteudo['properties']
+        ws = self._aba_por_id(propriedades['sheetId'])
+        grade = propriedades.get('gridProperties', {})
+        ws.linhas_congeladas = grade.get('frozenRowCount', ws.linhas_congeladas)
+        if 'title' in propriedades:
+            del self._abas[ws.title]
+            ws.title = propriedades['title']
+            self._abas[ws.title] = ws
+
+    def _req_addConditionalFormatRule(self, conteudo):
+        for intervalo in conteudo['rule']['ranges']:
+            self._aba_por_id(intervalo['sheetId'])
+        ws = self._aba_por_id(conteudo['rule']['ranges'][0]['sheetId'])
+        ws.regras_condicionais.insert(conteudo.get('index', len(ws.regras_condicionais)), conteudo['rule'])
+
+    def _req_addSheet(self, conteudo):
+        propriedades = conteudo['properties']
+        grade = propriedades.get('gridProperties', {})
+        ws = self._nova_aba(propriedades['title'], grade.get('rowCount', 1000),
+                            grade.get('columnCount', 26), propriedades.get('sheetId'))
+        return {'addSheet': {'properties': {'sheetId': ws.id, 'title': ws.title}}}
+
+    def _req_deleteSheet(self, conteudo):
+        ws = self._aba_por_id(conteudo['sheetId'])
+        del self._abas[ws.title]
+
+    def _req_duplicateSheet(self, conteudo):
+        origem = self._aba_por_id(conteudo['sourceSheetId'])
+        ws = self._nova_aba(conteudo.get('newSheetName') or f"Cópia de {origem.title}",
+                            origem.row_count, origem.col_count, conteudo.get('newSheetId'))
+        ws.celulas = dict(origem.celulas)
+        ws.formatos = {c: dict(f) for c, f in origem.formatos.items()}
+        ws.regras_condicionais = [dict(regra, ranges=[dict(r, sheetId=ws.id) for r in regra['ranges']])
+                                  for regra in origem.regras_condicionais]
+        ws.mescladas = list(origem.mescladas)
+        ws.linhas_congeladas = origem.linhas_congeladas
+        return {'duplicateSheet': {'properties': {'sheetId': ws.id, 'title': ws.title}}}
+
+
+class ClienteSheetsFake:
+    """
+    Substituto do gspread.Client. Os parâmetros vão para o HttpClientFake:
+    latência por chamada (s), cota por janela (leitura/escrita, None = sem
+    limite), tamanho da janela da cota (s) e probabilidade de 429 aleatório.
+    """
+
+    def __init__(self, **parametros_http):
+        self.http_client = HttpClientFake(**parametros_http)
+        self._planilhas: Dict[str, SpreadsheetFake] = {}
+        self._observadores: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def open_by_key(self, key: str) -> SpreadsheetFake:
+        with self._lock:
+            planilha = self._planilhas.get(key)
+            if planilha is None:
+                planilha = self._planilhas[key] = SpreadsheetFake(self, key)
+        planilha.fetch_sheet_metadata()
+        return planilha
+
+    def planilha(self, key: str) -> SpreadsheetFake:
+        """Planilha pela chave sem contar chamada, para conferência nos testes"""
+        with self._lock:
+            return self._planilhas.setdefault(key, SpreadsheetFake(self, key))
+
+    def observar_escritas(self, funcao: Callable):
+        """funcao(aba, linha, valores, instante) é chamada a cada escrita de valores"""
+        self._observadores.append(funcao)
+
+    def _notificar(self, ws: WorksheetFake, linha: int, valores: List[list]):
+        agora = time.monotonic()
+        for funcao in self._observadores:
+            funcao(ws, linha, valores, agora)
@@ -4,6 +4,7 @@ Arquivo: main.py
 """
 
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from src.ui.main_window import MainWindow
@@ -30,4 +31,7 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # Executável congelado (PyInstaller) no Windows: os processos da extração
+    # de PDF (ProcessPoolExecutor) rodam este mesmo executável
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
@@ -0,0 +1,386 @@
+"""
+Sistema de Conferência de Manifestos - Backup do Banco de Dados
+Arquivo: src/backup.py
+
+Cópia de segurança online de data/database.db com a API de backup do
+SQLite: as páginas são copiadas em pequenos passos, em uma thread própria,
+com o sistema em uso. A cópia acontece dentro de uma transação de leitura,
+então é um retrato consistente do banco mesmo com gravações no WAL durante
+o backup, e essas gravações não ficam esperando por ele.
+
+Cada backup é verificado com integrity_check antes de ser compactado (gzip)
+em data/backups/; os mais antigos são apagados, ficando os MANTER_BACKUPS
+mais recentes. O arquivo histórico (arquivo.db) não entra no backup.
+
+A restauração só roda com o sistema fechado: a janela principal mantém
+travado o arquivo data/sistema.lock enquanto está aberta, e restaurar_backup
+recusa (SistemaEmUso) se não conseguir travá-lo.
+
+
+    python -m src.backup listar
+    python -m src.backup criar
+    python -m src.backup verificar data/backups/backup_20250305_180000_123456.db.gz
+    python -m src.backup restaurar data/backups/backup_20250305_180000_123456.db.gz
+"""
+
+import argparse
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from src import database
+
+# ================= CONFIGURAÇÃO =================
+PASTA_BACKUPS = "backups"         # Dentro da pasta do banco
+MANTER_BACKUPS = 7                # Backups mantidos na rotação
+PAGINAS_POR_PASSO = 256           # Páginas copiadas por passo (1 MB com páginas de 4 KB)
+PAUSA_ENTRE_PASSOS = 0.005        # Segundos livres entre os passos
+PREFIXO = "backup"
+PREFIXO_RESTAURACAO = "antes_restauracao"
+EXTENSAO = ".db.gz"
+ARQUIVO_EM_USO = "sistema.lock"   # Travado enquanto o sistema está aberto (dentro da pasta do banco)
+
+# Estados de um backup
+EM_ANDAMENTO = 'EM ANDAMENTO'
+CONCLUIDO = 'CONCLUÍDO'
+CANCELADO = 'CANCELADO'
+ERRO = 'ERRO'
+
+
+# Um backup por vez (o manual e o agendado podem coincidir)
+_lock_backup = threading.Lock()
+
+# Data no fim do nome: aaaammdd_hhmmss e, a partir de agora, _microssegundos
+_CARIMBO = re.compile(r'(\d{8}_\d{6})(?:_(\d{6}))?$')
+
+
+class BackupCancelado(Exception):
+    """Backup interrompido por cancelar()"""
+
+
+class BackupInvalido(Exception):
+    """Backup que não passou no integrity_check"""
+
+
+class SistemaEmUso(Exception):
+    """Restauração pedida com o sistema aberto"""
+
+
+def pasta_backups() -> Path:
+    return database.DB_PATH.parent / PASTA_BACKUPS
+
+
+def listar_backups(prefixo: str = None) -> List[Path]:
+    """Backups da pasta, do mais recente para o mais antigo"""
+    pasta = pasta_backups()
+    if not pasta.exists():
+        return []
+    padrao = f"{prefixo}_*{EXTENSAO}" if prefixo else f"*{EXTENSAO}"
+    # Ordena pela data no fim do nome, qualquer que seja o prefixo
+    return sorted(pasta.glob(padrao), key=_carimbo, reverse=True)
+
+
+def _carimbo(caminho: Path) -> str:
+    """aaaammdd_hhmmss_ffffff do nome (nomes antigos, sem microssegundos, valem _000000)"""
+    encontrado = _CARIMBO.search(caminho.name[:-len(EXTENSAO)])
+    if encontrado is None:
+        return ''
+    return f"{encontrado.group(1)}_{encontrado.group(2) or '000000'}"
+
+
+def _somente_leitura(caminho: Path) -> str:
+    return caminho.resolve().as_uri() + "?mode=ro"
+
+
+def _verificar(caminho: Path) -> str:
+    """integrity_check de um banco descompactado: 'ok' ou os problemas encontrados"""
+    conn = sqlite3.connect(_somente_leitura(caminho), uri=True)
+    try:
+        problemas = [row[0] for row in conn.execute("PRAGMA integrity_check(10)")]
+        return "; ".join(problemas)
+    finally:
+        conn.close()
+
+
+def _descompactar(caminho: Path, destino: Path):
+    with gzip.open(caminho, 'rb') as origem, open(destino, 'wb') as saida:
+        shutil.copyfileobj(origem, saida, 1024 * 1024)
+
+
+def _compactar(caminho: Path, destino: Path):
+    temporario = destino.with_name(destino.name + '.parcial')
+    with open(caminho, 'rb') as origem, gzip.open(temporario, 'wb', compresslevel=6) as saida:
+        shutil.copyfileobj(origem, saida, 1024 * 1024)
+    os.replace(temporario, destino)
+
+
+def _remover(*caminhos: Path):
+    for caminho in caminhos:
+        if caminho.exists():
+            caminho.unlink()
+
+
+def verificar_backup(caminho) -> str:
+    """Descompacta o backup em um arquivo temporário e roda o integrity_check"""
+    caminho = Path(caminho)
+    temporario = caminho.with_name(caminho.name + '.verificacao')
+    try:
+        _descompactar(caminho, temporario)
+        return _verificar(temporario)
+    except (OSError, EOFError, sqlite3.DatabaseError) as e:
+        return f"backup ilegível: {e}"
+    finally:
+        _remover(temporario)
+
+
+# ================= BACKUP =================
+
+class Backup:
+    """
+    Um backup do banco. Roda na thread atual (executar) ou em segundo plano
+    (iniciar), e a interface acompanha pelo percentual, como na exportação.
+    """
+
+    def __init__(self, prefixo: str = PREFIXO, manter: int = MANTER_BACKUPS,
+                 paginas_por_passo: int = PAGINAS_POR_PASSO):
+        self.prefixo = prefixo
+        self.manter = manter
+        self.paginas_por_passo = paginas_por_passo
+        self.estado = EM_ANDAMENTO
+        self.caminho = None
+        self.paginas = 0
+        self.copiadas = 0
+        self.tamanho = 0
+        self.erro = None
+        self.iniciado_em = None
+        self.concluido_em = None
+        self._cancelar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Executa o backup em segundo plano"""
+        self._thread = threading.Thread(target=self._executar_em_fundo, daemon=True)
+        self._thread.start()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def aguardar(self, timeout: float = None) -> bool:
+        """Espera a thread terminar; True se terminou"""
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    @property
+    def em_andamento(self) -> bool:
+        return self.estado == EM_ANDAMENTO
+
+    @property
+    def percentual(self) -> int:
+        if not self.paginas:
+            return 100 if self.estado == CONCLUIDO else 0
+        return min(100, self.copiadas * 100 // self.paginas)
+
+    def _executar_em_fundo(self):
+        try:
+            self.executar()
+        except BackupCancelado:
+            print("[Backup] Cancelado")
+        except Exception as e:
+            print(f"[Backup] Erro: {e}")
+
+    def _progresso(self, status, restantes, total):
+        self.paginas = total
+        self.copiadas = total - restantes
+        if self._cancelar.is_set():
+            raise BackupCancelado()
+        # Dá a vez às outras threads (a API não pausa entre passos sem ocupado)
+        self._cancelar.wait(PAUSA_ENTRE_PASSOS)
+
+    def executar(self) -> Path:
+        """
+        Copia, verifica, compacta e faz a rotação. Retorna o caminho do
+        backup; levanta BackupCancelado ou BackupInvalido. Se outro backup
+        estiver em andamento, espera ele terminar.
+        """
+        with _lock_backup:
+            return self._executar()
+
+    def _executar(self) -> Path:
+        self.iniciado_em = datetime.now()
+        pasta = pasta_backups()
+        pasta.mkdir(parents=True, exist_ok=True)
+        # Com microssegundos: dois backups no mesmo segundo não dividem arquivos
+        nome = f"{self.prefixo}_{self.iniciado_em.strftime('%Y%m%d_%H%M%S_%f')}"
+        copia = pasta / f"{nome}.db.parcial"
+        destino = pasta / f"{nome}{EXTENSAO}"
+        try:
+            self._copiar(copia)
+            resultado = _verificar(copia)
+            if resultado != 'ok':
+                raise BackupInvalido(f"integrity_check: {resultado}")
+            _compactar(copia, destino)
+
+            self.caminho = destino
+            self.tamanho = destino.stat().st_size
+            self.estado = CONCLUIDO
+            self._rotacionar()
+            print(f"[Backup] {destino.name} ({self.tamanho // 1024} KB)")
+            return destino
+        except BackupCancelado:
+            self.estado = CANCELADO
+            raise
+        except Exception as e:
+            self.erro = str(e)
+            self.estado = ERRO
+            raise
+        finally:
+            self.concluido_em = datetime.now()
+            _remover(copia)
+
+    def _copiar(self, copia: Path):
+        _remover(copia)
+        # Sem o _db_lock: o backup não bloqueia as outras operações do banco
+        origem = database.get_connection()
+        destino = sqlite3.connect(copia)
+        try:
+            # A transação de leitura fixa o retrato do banco; sem ela, cada
+            # gravação no meio do backup faria a cópia recomeçar do início
+            origem.execute("BEGIN")
+            origem.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            origem.backup(destino, pages=self.paginas_por_passo, progress=self._progresso)
+            origem.rollback()
+            # O backup é um arquivo único, sem -wal
+            destino.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            destino.close()
+            origem.close()
+
+    def _rotacionar(self):
+        for antigo in listar_backups(self.prefixo)[self.manter:]:
+            try:
+                antigo.unlink()
+            except OSError as e:
+                print(f"[Backup] Não foi possível apagar {antigo.name}: {e}")
+
+
+def criar_backup(prefixo: str = PREFIXO) -> Path:
+    """Faz um backup de forma síncrona"""
+    return Backup(prefixo).executar()
+
+
+def resumo_backups() -> Dict:
+    backups = listar_backups(PREFIXO)
+    return {
+        'quantidade': len(backups),
+        'ultimo': backups[0] if backups else None,
+        'tamanho_total': sum(caminho.stat().st_size for caminho in backups),
+    }
+
+
+# ================= RESTAURAÇÃO =================
+
+def travar_uso():
+    """
+    Trava o arquivo de uso (sem esperar). Retorna o arquivo aberto, que
+    mantém a trava até ser fechado, ou None se outro processo (ou outra
+    abertura neste) já a tem. O sistema operacional solta a trava se o
+    processo terminar sem fechar o arquivo.
+    """
+    database.DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    arquivo = open(database.DB_PATH.parent / ARQUIVO_EM_USO, 'a+b')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return arquivo
+    except OSError:
+        arquivo.close()
+        return None
+
+
+def restaurar_backup(caminho) -> Path:
+    """
+    Reconstrói o banco a partir de um backup. O backup é verificado antes, e
+    o banco atual é salvo com o prefixo antes_restauracao (fora da rotação).
+    Retorna o caminho desse backup do banco atual (None se não havia banco).
+    Levanta SistemaEmUso se o sistema estiver aberto, e mantém a trava de
+    uso durante a restauração, para que ele não seja aberto no meio dela.
+    """
+    trava = travar_uso()
+    if trava is None:
+        raise SistemaEmUso("O sistema está aberto: feche-o antes de restaurar um backup")
+    caminho = Path(caminho)
+    temporario = caminho.with_name(caminho.name + '.restauracao')
+    try:
+        _descompactar(caminho, temporario)
+        resultado = _verificar(temporario)
+        if resultado != 'ok':
+            raise BackupInvalido(f"{caminho.name} não passou no integrity_check: {resultado}")
+
+        anterior = None
+        if database.DB_PATH.exists():
+            anterior = Backup(PREFIXO_RESTAURACAO, manter=MANTER_BACKUPS).executar()
+
+        # A API de backup reescreve o banco pelas páginas, respeitando o WAL
+        # e os locks, em vez de substituir o arquivo por baixo do SQLite
+        with database._db_lock:
+            origem = sqlite3.connect(_somente_leitura(temporario), uri=True)
+            destino = database.get_connection()
+            try:
+                origem.backup(destino)
+                destino.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                destino.close()
+                origem.close()
+        print(f"[Backup] Banco restaurado de {caminho.name}")
+        return anterior
+    finally:
+        _remover(temporario)
+        trava.close()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Backup do banco de dados de conferência")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    comandos.add_parser('listar', help='Lista os backups')
+    comandos.add_parser('criar', help='Faz um backup agora')
+    verificar = comandos.add_parser('verificar', help='Roda o integrity_check em um backup')
+    verificar.add_argument('arquivo')
+    restaurar = comandos.add_parser('restaurar', help='Reconstrói o banco a partir de um backup')
+    restaurar.add_argument('arquivo')
+    args = parser.parse_args(argv)
+
+    if args.comando == 'listar':
+        for caminho in listar_backups():
+            print(f"{caminho}  {caminho.stat().st_size // 1024} KB")
+    elif args.comando == 'criar':
+        print(criar_backup())
+    elif args.comando == 'verificar':
+        resultado = verificar_backup(args.arquivo)
+        print(resultado)
+        return 0 if resultado == 'ok' else 1
+    elif args.comando == 'restaurar':
+        try:
+            anterior = restaurar_backup(args.arquivo)
+        except SistemaEmUso as e:
+            print(e)
+            return 1
+        if anterior:
+            print(f"Banco anterior salvo em {anterior}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -4,66 +4,141 @@ Arquivo: src/database.py
 """
 
 import sqlite3
-from datetime import datetime
+import json
+import importlib.util
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import time
 import threading
-import sys
 
-# --- CONFIGURAÇÃO DE IMPORTAÇÃO (CORREÇÃO DO PATH) ---
+from src import feed
+from src.registros import Manifesto, Volume, Caixa, Log, todos, um
+
+# --- INTEGRAÇÃO COM GOOGLE SHEETS (CARREGADA SOB DEMANDA) ---
+# sheets_sync puxa gspread/oauth2client, que são pesados: o módulo só é
+# importado na primeira sincronização, em uma thread de fundo, para não
+# atrasar a abertura da interface. Aqui só se verifica se as dependências
+# estão instaladas (sem importá-las) e se a integração está configurada.
 sheets = None
-SHEETS_ENABLED = False
+SHEETS_INSTALADO = all(importlib.util.find_spec(m) is not None for m in ('gspread', 'oauth2client'))
+# Credenciais da conta de serviço (o mesmo arquivo de sheets_sync.CREDENTIALS_FILE)
+ARQUIVO_CREDENCIAIS = Path("credentials.json")
+# Configuração que liga ('1') ou desliga ('0') a integração, valendo mais que o
+# arquivo de credenciais (ex.: cliente simulado, credenciais em outro lugar)
+CHAVE_SHEETS_ATIVO = 'sheets_ativo'
+# Recalculado por init_database, que também lê a configuração
+SHEETS_ENABLED = SHEETS_INSTALADO and ARQUIVO_CREDENCIAIS.exists()
 
-try:
-    # 1. Identifica a pasta onde este arquivo (database.py) está
-    current_folder = Path(__file__).resolve().parent
-    
-    # 2. Adiciona essa pasta ao sistema de busca do Python se não estiver lá
-    if str(current_folder) not in sys.path:
-        sys.path.append(str(current_folder))
-
-    # 3. Tenta importar o módulo sheets_sync diretamente
-    import sheets_sync as s
-    sheets = s
-    SHEETS_ENABLED = True
-    # print("✅ Módulo Sheets Sync carregado com sucesso.") # Comentado para limpar log
-
-except ImportError as e:
-    print("--- ERRO DE IMPORTAÇÃO ---")
-    print(f"Erro detalhado: {e}")
-    SHEETS_ENABLED = False
+_sheets_lock = threading.Lock()
+_sheets_carregando = False
 # -----------------------------------------------------
 
 # Caminho do banco de dados
 DB_PATH = Path("data/database.db")
 
+# Arquivo histórico: manifestos finalizados há mais de DIAS_ARQUIVAMENTO dias
+# saem do banco principal para este arquivo, na mesma pasta
+ARQUIVO_HISTORICO = "arquivo.db"
+DIAS_ARQUIVAMENTO = 90
+TABELAS_ARQUIVO = ['manifestos', 'volumes', 'caixas_individuais', 'logs']
+
+# Tabela do outbox (também usada para recriá-la na migração do schema)
+SQL_SYNC_OUTBOX = """
+    CREATE TABLE IF NOT EXISTS sync_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tipo TEXT NOT NULL CHECK(tipo IN ('manifesto', 'volume', 'cabecalho', 'snapshot',
+                                          'exclusao', 'arquivamento')),
+        numero_manifesto TEXT NOT NULL,
+        chave TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT CHECK(status IN ('PENDENTE', 'ENVIADO', 'FALHA')) DEFAULT 'PENDENTE',
+        tentativas INTEGER DEFAULT 0,
+        ultimo_erro TEXT,
+        criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+        processado_em DATETIME
+    )
+"""
+SQL_INDICES_OUTBOX = [
+    "CREATE INDEX IF NOT EXISTS idx_outbox_status ON sync_outbox(status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_outbox_chave ON sync_outbox(chave, id)",
+]
+# Eventos só para os sinks do feed (manifesto que saiu do banco principal); a
+# planilha não os processa, então já são gravados como enviados
+TIPOS_SO_FEED = ('exclusao', 'arquivamento')
+
 # Lock global para sincronização
 _db_lock = threading.RLock()
 
-def run_async_sync(target_func, *args, **kwargs):
+def _carregar_sheets():
+    """Importa sheets_sync (fora da thread da interface) e começa a drenar o outbox"""
+    global sheets, SHEETS_ENABLED, _sheets_carregando
+    try:
+        from src import sheets_sync as s
+        sheets = s
+    except Exception as e:
+        print(f"[Sheets] Integração desativada: {e}")
+        SHEETS_ENABLED = False
+        return
+    finally:
+        _sheets_carregando = False
+    
+    try:
+        sheets.processar_outbox()
+    except Exception as e:
+        print(f"Erro ao agendar sincronização: {e}")
+
+def notificar_sync():
     """
-    Envia a tarefa para a fila de processamento do módulo sheets_sync.
-    Isso é não-bloqueante e muito rápido.
+    Avisa o módulo sheets_sync (e os sinks do feed) que há eventos novos no outbox.
+    Isso é não-bloqueante e muito rápido; os eventos já estão gravados no banco.
+    Na primeira chamada o módulo é carregado em segundo plano; eventos que
+    chegarem nesse meio-tempo são lidos do outbox quando ele terminar.
     """
-    if not SHEETS_ENABLED or sheets is None:
+    global _sheets_carregando
+    feed.notificar()
+    if not SHEETS_ENABLED:
+        return
+    
+    if sheets is None:
+        with _sheets_lock:
+            if sheets is None and not _sheets_carregando:
+                _sheets_carregando = True
+                threading.Thread(target=_carregar_sheets, daemon=True).start()
         return
 
     try:
-        # Passa a função e os argumentos para a fila
-        # O módulo sheets se encarrega de rodar isso em background
-        # Usamos *args apenas, pois a fila espera argumentos posicionais
-        sheets.agendar_tarefa(target_func, *args)
+        sheets.processar_outbox()
     except Exception as e:
         print(f"Erro ao agendar sincronização: {e}")
 
+def _registrar_eventos() -> bool:
+    """O outbox só é gravado se houver quem o consuma: o Sheets ou algum sink do feed"""
+    return SHEETS_ENABLED or feed.ativo()
+
+def _sheets_configurado() -> bool:
+    """
+    Integração com o Sheets ativa: dependências instaladas e credentials.json
+    presente, ou a configuração sheets_ativo. Sem isso nada é gravado no
+    outbox para a planilha (os eventos ficariam pendentes para sempre).
+    """
+    if not SHEETS_INSTALADO:
+        return False
+    ativo = obter_configuracao(CHAVE_SHEETS_ATIVO)
+    if ativo is not None:
+        return ativo == '1'
+    return ARQUIVO_CREDENCIAIS.exists()
+
 def init_database():
     """Inicializa o banco de dados criando as tabelas necessárias"""
+    global SHEETS_ENABLED
     DB_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     with _db_lock:
         conn = sqlite3.connect(str(DB_PATH), timeout=30.0)
         
+        # Só vale para um arquivo novo; bancos antigos são convertidos pela manutenção
+        conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
         conn.execute('PRAGMA journal_mode=WAL')
         conn.execute('PRAGMA synchronous=NORMAL')
         conn.execute('PRAGMA cache_size=10000')
@@ -109,7 +184,7 @@ def init_database():
                 data_hora_primeira_recepcao DATETIME,
                 data_hora_ultima_recepcao DATETIME,
                 usuario_recepcao TEXT,
-                FOREIGN KEY (manifesto_id) REFERENCES manifestos(id),
+                FOREIGN KEY (manifesto_id) REFERENCES manifestos(id) ON DELETE CASCADE,
                 UNIQUE(manifesto_id, numero_volume)
             )
         """)
@@ -123,7 +198,7 @@ def init_database():
                 status TEXT CHECK(status IN ('RECEBIDA', 'NÃO RECEBIDA')) DEFAULT 'NÃO RECEBIDA',
                 data_hora_recepcao DATETIME,
                 usuario_conferente TEXT,
-                FOREIGN KEY (volume_id) REFERENCES volumes(id),
+                FOREIGN KEY (volume_id) REFERENCES volumes(id) ON DELETE CASCADE,
                 UNIQUE(volume_id, numero_caixa)
             )
         """)
@@ -137,7 +212,87 @@ def init_database():
                 detalhes TEXT,
                 usuario TEXT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (manifesto_id) REFERENCES manifestos(id)
+                FOREIGN KEY (manifesto_id) REFERENCES manifestos(id) ON DELETE CASCADE
+            )
+        """)
+        # Histórico de um manifesto, do mais recente ao mais antigo (o id entra implícito)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_logs_manifesto ON logs(manifesto_id, timestamp)")
+        
+        # Regras de padronização de remetentes (editáveis)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS regras_remetente (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                palavra_chave TEXT UNIQUE NOT NULL,
+                padrao TEXT NOT NULL,
+                prioridade INTEGER NOT NULL DEFAULT 100,
+                ativo INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        
+        # Destinos aceitos por site (terminal de destino do manifesto ou '*')
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS destinos_aceitos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                site TEXT NOT NULL,
+                padrao TEXT NOT NULL,
+                termos TEXT NOT NULL,
+                UNIQUE(site, padrao)
+            )
+        """)
+        
+        # Outbox da sincronização com o Google Sheets: gravado na mesma transação
+        # da alteração e drenado pelo sheets_sync (entrega pelo menos uma vez)
+        cursor.execute(SQL_SYNC_OUTBOX)
+        for sql in SQL_INDICES_OUTBOX:
+            cursor.execute(sql)
+        
+        # Configurações gerais (chave/valor)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS configuracoes (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            )
+        """)
+        
+        # Posição de cada sink do feed de alterações no outbox (último id entregue)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS feed_cursores (
+                sink TEXT PRIMARY KEY,
+                ultimo_id INTEGER NOT NULL,
+                atualizado_em DATETIME
+            )
+        """)
+        
+        # Histórico da manutenção do banco (src/manutencao.py)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS manutencao_execucoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tarefa TEXT NOT NULL,
+                inicio DATETIME NOT NULL,
+                duracao REAL NOT NULL,
+                bytes_recuperados INTEGER NOT NULL DEFAULT 0,
+                resultado TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_manutencao_tarefa ON manutencao_execucoes(tarefa, id)")
+        
+        # Espelho local das abas do Google Sheets (evita leituras para achar linhas)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sheets_abas (
+                numero_manifesto TEXT PRIMARY KEY,
+                sheet_id INTEGER NOT NULL,
+                linhas_grade INTEGER NOT NULL,
+                proxima_linha INTEGER NOT NULL,
+                formatado INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sheets_linhas (
+                numero_manifesto TEXT NOT NULL,
+                numero_volume TEXT NOT NULL,
+                linha INTEGER NOT NULL,
+                PRIMARY KEY (numero_manifesto, numero_volume)
             )
         """)
         
@@ -145,6 +300,13 @@ def init_database():
         conn.close()
         
     migrar_schema()
+    SHEETS_ENABLED = _sheets_configurado()
+    
+    # Eventos que ficaram pendentes com o sistema fechado: sem isto só seriam
+    # enviados depois da primeira alteração da sessão. O sheets_sync continua
+    # sendo carregado em segundo plano, como em notificar_sync.
+    if SHEETS_ENABLED and contar_outbox()['PENDENTE']:
+        notificar_sync()
 
 def migrar_schema():
     with _db_lock:
@@ -157,12 +319,130 @@ def migrar_schema():
             if 'usuario_recepcao' not in colunas:
                 cursor.execute("ALTER TABLE volumes ADD COLUMN usuario_recepcao TEXT")
                 conn.commit()
+            
+            cursor.execute("PRAGMA table_info(sheets_abas)")
+            if 'formatado' not in [coluna[1] for coluna in cursor.fetchall()]:
+                cursor.execute("ALTER TABLE sheets_abas ADD COLUMN formatado INTEGER NOT NULL DEFAULT 0")
+            
+            # Tipos novos no outbox ('snapshot', 'exclusao', 'arquivamento'): o
+            # CHECK só muda recriando a tabela
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'sync_outbox'")
+            if "'arquivamento'" not in cursor.fetchone()[0]:
+                cursor.execute("BEGIN")
+                cursor.execute("ALTER TABLE sync_outbox RENAME TO sync_outbox_antigo")
+                cursor.execute(SQL_SYNC_OUTBOX)
+                cursor.execute("INSERT INTO sync_outbox SELECT * FROM sync_outbox_antigo")
+                cursor.execute("DROP TABLE sync_outbox_antigo")
+                for sql in SQL_INDICES_OUTBOX:
+                    cursor.execute(sql)
+                conn.commit()
+            
+            _migrar_exclusao_em_cascata(cursor)
+            
+            # Carga inicial das regras de normalização
+            from src.normalizacao import REGRAS_REMETENTE_PADRAO, DESTINOS_ACEITOS_PADRAO
+            
+            cursor.execute("SELECT COUNT(*) FROM regras_remetente")
+            if cursor.fetchone()[0] == 0:
+                cursor.executemany("""
+                    INSERT INTO regras_remetente (palavra_chave, padrao, prioridade)
+                    VALUES (?, ?, ?)
+                """, [(palavra, padrao, (i + 1) * 10)
+                      for i, (palavra, padrao) in enumerate(REGRAS_REMETENTE_PADRAO)])
+            
+            cursor.execute("SELECT COUNT(*) FROM destinos_aceitos")
+            if cursor.fetchone()[0] == 0:
+                cursor.executemany("""
+                    INSERT INTO destinos_aceitos (site, padrao, termos) VALUES (?, ?, ?)
+                """, DESTINOS_ACEITOS_PADRAO)
+            
+            # Arquivo histórico acompanha as colunas novas (as buscas fazem UNION com ele)
+            if caminho_arquivo().exists():
+                cursor.execute("ATTACH DATABASE ? AS arquivo", (str(caminho_arquivo()),))
+                _preparar_arquivo(cursor)
+                cursor.execute("DETACH DATABASE arquivo")
         except Exception as e:
             print(f"Erro na migração do schema: {e}")
         finally:
             conn.close()
 
-def get_connection():
+# Chaves estrangeiras que apagam os filhos junto com o pai
+FKS_CASCATA = {
+    'volumes': 'manifestos(id)',
+    'caixas_individuais': 'volumes(id)',
+    'logs': 'manifestos(id)',
+}
+
+def _migrar_exclusao_em_cascata(cursor):
+    """
+    Bancos criados antes do ON DELETE CASCADE: a FK só muda recriando a
+    tabela (com foreign_keys desligado, que não pode mudar dentro de uma
+    transação). Filhos órfãos de exclusões antigas são descartados, senão a
+    tabela nova violaria a FK.
+    """
+    pendentes = []
+    for tabela, referencia in FKS_CASCATA.items():
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (tabela,))
+        sql = cursor.fetchone()[0]
+        if 'ON DELETE CASCADE' not in sql:
+            pendentes.append((tabela, sql.replace(f"REFERENCES {referencia}",
+                                                  f"REFERENCES {referencia} ON DELETE CASCADE", 1)))
+    if not pendentes:
+        return
+    
+    cursor.execute("PRAGMA foreign_keys=OFF")
+    # Renomear a tabela antiga sem levar junto as referências das outras tabelas
+    cursor.execute("PRAGMA legacy_alter_table=ON")
+    try:
+        cursor.execute("BEGIN")
+        try:
+            for tabela, sql in pendentes:
+                cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                               (tabela,))
+                indices = [row[0] for row in cursor.fetchall()]
+                # O AUTOINCREMENT não pode reaproveitar ids (o arquivo histórico usa os mesmos)
+                cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (tabela,))
+                row = cursor.fetchone()
+                sequencia = row[0] if row else 0
+                
+                colunas = ", ".join(_colunas(cursor, 'main', tabela))
+                cursor.execute(f"ALTER TABLE {tabela} RENAME TO {tabela}_antiga")
+                cursor.execute(sql)
+                cursor.execute(f"INSERT INTO {tabela} ({colunas}) SELECT {colunas} FROM {tabela}_antiga")
+                cursor.execute(f"DROP TABLE {tabela}_antiga")
+                for indice in indices:
+                    cursor.execute(indice)
+                cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequencia, tabela))
+                if not cursor.rowcount and sequencia:
+                    cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (tabela, sequencia))
+            
+            orfaos = {}
+            cursor.execute("DELETE FROM volumes WHERE manifesto_id NOT IN (SELECT id FROM manifestos)")
+            orfaos['volumes'] = cursor.rowcount
+            cursor.execute("DELETE FROM caixas_individuais WHERE volume_id NOT IN (SELECT id FROM volumes)")
+            orfaos['caixas_individuais'] = cursor.rowcount
+            cursor.execute("DELETE FROM logs WHERE manifesto_id NOT IN (SELECT id FROM manifestos)")
+            orfaos['logs'] = cursor.rowcount
+            
+            cursor.execute("PRAGMA foreign_key_check")
+            if cursor.fetchone():
+                raise sqlite3.IntegrityError("chaves estrangeiras inválidas após a migração")
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+    finally:
+        cursor.execute("PRAGMA legacy_alter_table=OFF")
+        cursor.execute("PRAGMA foreign_keys=ON")
+    
+    descartados = ", ".join(f"{quantidade} {tabela}" for tabela, quantidade in orfaos.items() if quantidade)
+    print(f"[Migração] ON DELETE CASCADE em {', '.join(t for t, _ in pendentes)}"
+          + (f" (órfãos descartados: {descartados})" if descartados else ""))
+
+def get_connection(arquivado: bool = False):
+    if arquivado:
+        return _conexao_arquivo()
+    
     max_retries = 5
     retry_delay = 0.1
     
@@ -172,12 +452,14 @@ def get_connection():
                 str(DB_PATH), 
                 timeout=30.0,
                 isolation_level=None,
-                check_same_thread=False
+                check_same_thread=False,
+                uri=True  # Para anexar o arquivo histórico somente leitura
             )
             conn.row_factory = sqlite3.Row
             conn.execute('PRAGMA journal_mode=WAL')
             conn.execute('PRAGMA synchronous=NORMAL')
             conn.execute('PRAGMA busy_timeout=30000')
+            conn.execute('PRAGMA foreign_keys=ON')
             return conn
         except sqlite3.OperationalError as e:
             if 'locked' in str(e) and attempt < max_retries - 1:
@@ -209,42 +491,18 @@ def criar_manifesto(numero: str, data: str, origem: str, destino: str,
     conn = get_connection()
     try:
         cursor = conn.cursor()
+        _verificar_numero_arquivado(cursor, numero)
         
         try:
-            cursor.execute("""
-                INSERT INTO manifestos (numero_manifesto, data_manifesto, terminal_origem, 
-                                       terminal_destino, missao, aeronave, pdf_path)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (numero, data, origem, destino, missao, aeronave, pdf_path))
-            
-            manifesto_id = cursor.lastrowid
-            
-            cursor.execute("""
-                INSERT INTO logs (manifesto_id, acao, detalhes, usuario)
-                VALUES (?, ?, ?, ?)
-            """, (manifesto_id, "CRIAÇÃO", f"Manifesto {numero} registrado no sistema", "Sistema"))
-
-            # --- SHEETS SYNC ---
-            if SHEETS_ENABLED and sheets:
-                # Captura a data atual para enviar como data de inclusão
-                data_inclusao = datetime.now().isoformat()
-                
-                dados_manifesto = {
-                    'numero_manifesto': numero,
-                    'data_manifesto': data,
-                    'data_registro': data_inclusao, # NOVA LINHA
-                    'terminal_origem': origem,
-                    'terminal_destino': destino,
-                    'missao': missao,
-                    'aeronave': aeronave,
-                    'status': 'NÃO RECEBIDO'
-                }
-                run_async_sync(sheets.sincronizar_manifesto, dados_manifesto)
-            # -------------------
-            
+            cursor.execute("BEGIN")
+            manifesto_id = _inserir_manifesto(cursor, numero, data, origem, destino,
+                                              missao, aeronave, pdf_path)
+            conn.commit()
+            notificar_sync()
             return manifesto_id
 
         except sqlite3.IntegrityError as e:
+            conn.rollback()
             if 'UNIQUE constraint failed' in str(e) or 'manifestos.numero_manifesto' in str(e):
                 raise ValueError(f"O Manifesto nº {numero} já está cadastrado no sistema.")
             raise e
@@ -252,46 +510,132 @@ def criar_manifesto(numero: str, data: str, origem: str, destino: str,
     finally:
         conn.close()
 
+def _inserir_manifesto(cursor, numero: str, data: str, origem: str, destino: str,
+                       missao: str = None, aeronave: str = None, pdf_path: str = None) -> int:
+    """Manifesto, log de criação e evento do outbox, na transação do cursor"""
+    cursor.execute("""
+        INSERT INTO manifestos (numero_manifesto, data_manifesto, terminal_origem, 
+                               terminal_destino, missao, aeronave, pdf_path)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """, (numero, data, origem, destino, missao, aeronave, pdf_path))
+    
+    manifesto_id = cursor.lastrowid
+    
+    cursor.execute("""
+        INSERT INTO logs (manifesto_id, acao, detalhes, usuario)
+        VALUES (?, ?, ?, ?)
+    """, (manifesto_id, "CRIAÇÃO", f"Manifesto {numero} registrado no sistema", "Sistema"))
+
+    # --- SHEETS SYNC ---
+    if _registrar_eventos():
+        # Captura a data atual para enviar como data de inclusão
+        data_inclusao = datetime.now().isoformat()
+        
+        dados_manifesto = {
+            'numero_manifesto': numero,
+            'data_manifesto': data,
+            'data_registro': data_inclusao, # NOVA LINHA
+            'terminal_origem': origem,
+            'terminal_destino': destino,
+            'missao': missao,
+            'aeronave': aeronave,
+            'status': 'NÃO RECEBIDO'
+        }
+        _registrar_outbox(cursor, 'manifesto', numero, dados_manifesto)
+    # -------------------
+    return manifesto_id
+
+@execute_with_retry
+def importar_manifesto(dados: Dict, volumes: List[Dict], logs: List[Tuple[str, str]] = ()) -> int:
+    """
+    Registra um manifesto com todos os volumes (e caixas, eventos e logs
+    extras, como (acao, detalhes)) em uma única transação: se qualquer volume
+    falhar, nada fica gravado. dados tem os argumentos de criar_manifesto;
+    cada volume, as chaves da extração do PDF. Retorna o id do manifesto.
+    Número já cadastrado (aqui ou no arquivo histórico) levanta ValueError.
+    """
+    numero = dados['numero']
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        _verificar_numero_arquivado(cursor, numero)
+        
+        cursor.execute("BEGIN")
+        try:
+            manifesto_id = _inserir_manifesto(cursor, **dados)
+            for volume in volumes:
+                _inserir_volume(cursor, manifesto_id, numero, volume['remetente'],
+                                volume['destinatario'], volume['numero_volume'],
+                                volume['quantidade_expedida'], volume.get('peso_total'),
+                                volume.get('cubagem'), volume.get('prioridade'),
+                                volume.get('tipo_material'), volume.get('embalagem'))
+            for acao, detalhes in logs:
+                cursor.execute("""
+                    INSERT INTO logs (manifesto_id, acao, detalhes, usuario)
+                    VALUES (?, ?, ?, ?)
+                """, (manifesto_id, acao, detalhes, "Sistema"))
+            conn.commit()
+        except sqlite3.IntegrityError as e:
+            conn.rollback()
+            if 'manifestos.numero_manifesto' in str(e):
+                raise ValueError(f"O Manifesto nº {numero} já está cadastrado no sistema.")
+            raise
+        except Exception:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    
+    notificar_sync()
+    return manifesto_id
+
 @execute_with_retry
 def listar_manifestos(filtro_status: str = None, filtro_data_inicio: str = None, 
-                     filtro_data_fim: str = None) -> List[Dict]:
+                     filtro_data_fim: str = None, incluir_arquivados: bool = False) -> List[Manifesto]:
+    """Manifestos com totais; com incluir_arquivados, também os do arquivo histórico (arquivado = 1)"""
     conn = get_connection()
     try:
         cursor = conn.cursor()
-        query = """
-            SELECT m.*, 
+        consulta = """
+            SELECT m.*, {arquivado} as arquivado,
                    COUNT(DISTINCT v.id) as total_volumes,
                    SUM(v.quantidade_expedida) as total_caixas_expedidas,
                    SUM(v.quantidade_recebida) as total_caixas_recebidas
-            FROM manifestos m
-            LEFT JOIN volumes v ON m.id = v.manifesto_id
+            FROM {esquema}.manifestos m
+            LEFT JOIN {esquema}.volumes v ON m.id = v.manifesto_id
             WHERE 1=1
         """
+        filtros = ""
         params = []
         if filtro_status:
-            query += " AND m.status = ?"
+            filtros += " AND m.status = ?"
             params.append(filtro_status)
         if filtro_data_inicio:
-            query += " AND m.data_manifesto >= ?"
+            filtros += " AND m.data_manifesto >= ?"
             params.append(filtro_data_inicio)
         if filtro_data_fim:
-            query += " AND m.data_manifesto <= ?"
+            filtros += " AND m.data_manifesto <= ?"
             params.append(filtro_data_fim)
+        filtros += " GROUP BY m.id"
         
-        query += " GROUP BY m.id ORDER BY m.data_manifesto DESC, m.id DESC"
+        query = consulta.format(esquema='main', arquivado=0) + filtros
+        if incluir_arquivados and anexar_arquivo(cursor):
+            query += " UNION ALL " + consulta.format(esquema='arquivo', arquivado=1) + filtros
+            params = params * 2
+        
+        query += " ORDER BY data_manifesto DESC, id DESC"
         cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        return todos(cursor, Manifesto)
     finally:
         conn.close()
 
 @execute_with_retry
-def obter_manifesto(manifesto_id: int) -> Optional[Dict]:
-    conn = get_connection()
+def obter_manifesto(manifesto_id: int, arquivado: bool = False) -> Optional[Manifesto]:
+    conn = get_connection(arquivado)
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM manifestos WHERE id = ?", (manifesto_id,))
-        manifesto = cursor.fetchone()
-        return dict(manifesto) if manifesto else None
+        return um(cursor, Manifesto)
     finally:
         conn.close()
 
@@ -321,6 +665,7 @@ def finalizar_conferencia(manifesto_id: int):
         cursor = conn.cursor()
         agora = datetime.now().isoformat()
         
+        cursor.execute("BEGIN")
         cursor.execute("""
             SELECT 
                 COUNT(*) as total_volumes,
@@ -352,15 +697,121 @@ def finalizar_conferencia(manifesto_id: int):
               f"Status: {status}", "Sistema"))
         
         # --- SHEETS SYNC ---
-        if SHEETS_ENABLED and sheets:
+        # Fim da conferência: a aba inteira é conferida com o banco (inclui o status geral)
+        if _registrar_eventos():
             cursor.execute("SELECT numero_manifesto FROM manifestos WHERE id = ?", (manifesto_id,))
             res = cursor.fetchone()
             if res:
-                run_async_sync(sheets.atualizar_status_cabecalho, res['numero_manifesto'], status)
+                _registrar_outbox(cursor, 'snapshot', res['numero_manifesto'], {'motivo': 'finalização'})
         # -------------------
         
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    notificar_sync()
+
+# Números dos manifestos a apagar: o outbox e o espelho da planilha são por número
+_NUMEROS_APAGAR = "SELECT numero_manifesto FROM manifestos WHERE id IN (SELECT id FROM temp.apagar_ids)"
+
+def _contar_para_apagar(cursor) -> Dict[str, int]:
+    """Manifestos da tabela temporária apagar_ids e o que sai junto com eles"""
+    cursor.execute(f"""
+        SELECT
+            (SELECT COUNT(*) FROM manifestos WHERE id IN (SELECT id FROM temp.apagar_ids)) as manifestos,
+            (SELECT COUNT(*) FROM volumes WHERE manifesto_id IN (SELECT id FROM temp.apagar_ids)) as volumes,
+            (SELECT COUNT(*) FROM caixas_individuais WHERE volume_id IN
+                (SELECT v.id FROM volumes v WHERE v.manifesto_id IN (SELECT id FROM temp.apagar_ids))) as caixas,
+            (SELECT COUNT(*) FROM logs WHERE manifesto_id IN (SELECT id FROM temp.apagar_ids)) as logs,
+            (SELECT COUNT(*) FROM sync_outbox WHERE numero_manifesto IN ({_NUMEROS_APAGAR})) as eventos,
+            (SELECT COUNT(*) FROM sheets_abas WHERE numero_manifesto IN ({_NUMEROS_APAGAR})) as abas
+    """)
+    return dict(cursor.fetchone())
+
+@execute_with_retry
+def apagar_manifestos(ids: List[int], simular: bool = False) -> Dict:
+    """
+    Apaga os manifestos com volumes, caixas e logs (ON DELETE CASCADE), os
+    eventos deles no outbox e o espelho das abas da planilha, tudo em uma
+    transação, na qual também é gravado o evento de exclusão para o feed.
+    Com simular, só conta. Retorna as quantidades apagadas (manifestos,
+    volumes, caixas, logs, eventos, abas) e a duração em segundos.
+    """
+    inicio = time.perf_counter()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        # Tabela temporária: sem limite de parâmetros e usada pelo IN de cada contagem
+        cursor.execute("CREATE TEMP TABLE apagar_ids (id INTEGER PRIMARY KEY)")
+        cursor.executemany("INSERT OR IGNORE INTO temp.apagar_ids VALUES (?)", [(i,) for i in ids])
+        
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = _contar_para_apagar(cursor)
+            if not simular:
+                cursor.execute("SELECT id, numero_manifesto FROM manifestos WHERE id IN (SELECT id FROM temp.apagar_ids)")
+                apagados = [(row[0], row[1]) for row in cursor.fetchall()]
+                numeros = [numero for _, numero in apagados]
+                # Antes dos manifestos, enquanto os números ainda estão lá
+                cursor.execute(f"DELETE FROM sync_outbox WHERE numero_manifesto IN ({_NUMEROS_APAGAR})")
+                cursor.execute(f"DELETE FROM sheets_linhas WHERE numero_manifesto IN ({_NUMEROS_APAGAR})")
+                cursor.execute(f"DELETE FROM sheets_abas WHERE numero_manifesto IN ({_NUMEROS_APAGAR})")
+                cursor.execute("DELETE FROM manifestos WHERE id IN (SELECT id FROM temp.apagar_ids)")
+                # Os sinks do feed (réplica, arquivos) ficam sabendo da exclusão
+                _registrar_saida(cursor, 'exclusao', apagados)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
     finally:
         conn.close()
+    
+    resultado['duracao'] = time.perf_counter() - inicio
+    if not simular and resultado['manifestos']:
+        # O sheets_sync também guarda o espelho em memória
+        if sheets is not None:
+            for numero in numeros:
+                sheets.descartar_espelho(numero)
+        feed.notificar()
+        print(f"[Exclusão] {resultado['manifestos']} manifesto(s), {resultado['volumes']} volume(s), "
+              f"{resultado['caixas']} caixa(s), {resultado['logs']} log(s), "
+              f"{resultado['eventos']} evento(s) do outbox em {resultado['duracao']:.2f} s")
+    return resultado
+
+@execute_with_retry
+def selecionar_manifestos(data_inicio: str = None, data_fim: str = None, status: str = None,
+                          somente_finalizados: bool = True) -> List[int]:
+    """Ids dos manifestos do banco principal pelos critérios (datas do manifesto em aaaa-mm-dd, inclusive)"""
+    condicoes = ["1=1"]
+    params = []
+    if data_inicio:
+        condicoes.append(f"{_DATA_MANIFESTO_ISO} >= ?")
+        params.append(data_inicio)
+    if data_fim:
+        condicoes.append(f"{_DATA_MANIFESTO_ISO} <= ?")
+        params.append(data_fim)
+    if status:
+        condicoes.append("m.status = ?")
+        params.append(status)
+    if somente_finalizados:
+        condicoes.append("m.data_conferencia_fim IS NOT NULL")
+    
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT m.id FROM manifestos m WHERE {' AND '.join(condicoes)} ORDER BY m.id", params)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+def purgar_manifestos(data_inicio: str = None, data_fim: str = None, status: str = None,
+                      somente_finalizados: bool = True, simular: bool = False) -> Dict:
+    """Apaga (ou, com simular, conta) os manifestos que atendem aos critérios de selecionar_manifestos"""
+    ids = selecionar_manifestos(data_inicio, data_fim, status, somente_finalizados)
+    return apagar_manifestos(ids, simular)
 
 # ==================== VOLUMES ====================
 
@@ -374,54 +825,76 @@ def adicionar_volume(manifesto_id: int, remetente: str, destinatario: str,
     try:
         cursor = conn.cursor()
         
-        cursor.execute("""
-            INSERT INTO volumes (manifesto_id, remetente, destinatario, numero_volume,
-                               quantidade_expedida, peso_total, cubagem, prioridade,
-                               tipo_material, embalagem)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (manifesto_id, remetente, destinatario, numero_volume, quantidade_exp,
-              peso, cubagem, prioridade, tipo_material, embalagem))
-        
-        volume_id = cursor.lastrowid
-        
-        for i in range(1, quantidade_exp + 1):
-            cursor.execute("""
-                INSERT INTO caixas_individuais (volume_id, numero_caixa)
-                VALUES (?, ?)
-            """, (volume_id, i))
-            
-        # --- SHEETS SYNC ---
-        if SHEETS_ENABLED and sheets:
+        cursor.execute("BEGIN")
+        numero_manifesto = None
+        if _registrar_eventos():
             cursor.execute("SELECT numero_manifesto FROM manifestos WHERE id = ?", (manifesto_id,))
             man = cursor.fetchone()
-            
-            if man:
-                dados_volume = {
-                    'remetente': remetente,
-                    'destinatario': destinatario,
-                    'numero_volume': numero_volume,
-                    'quantidade_expedida': quantidade_exp,
-                    'quantidade_recebida': 0,
-                    'status': 'NÃO RECEBIDO'
-                }
-                run_async_sync(sheets.sincronizar_volume, man['numero_manifesto'], dados_volume)
-        # -------------------
-            
-        return volume_id
+            numero_manifesto = man['numero_manifesto'] if man else None
+        volume_id = _inserir_volume(cursor, manifesto_id, numero_manifesto, remetente, destinatario,
+                                    numero_volume, quantidade_exp, peso, cubagem, prioridade,
+                                    tipo_material, embalagem)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         conn.close()
+    
+    notificar_sync()
+    return volume_id
+
+def _inserir_volume(cursor, manifesto_id: int, numero_manifesto: Optional[str], remetente: str,
+                    destinatario: str, numero_volume: str, quantidade_exp: int = 1,
+                    peso: float = None, cubagem: float = None, prioridade: str = None,
+                    tipo_material: str = None, embalagem: str = None) -> int:
+    """Volume, caixas e evento do outbox (se houver numero_manifesto), na transação do cursor"""
+    cursor.execute("""
+        INSERT INTO volumes (manifesto_id, remetente, destinatario, numero_volume,
+                           quantidade_expedida, peso_total, cubagem, prioridade,
+                           tipo_material, embalagem)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (manifesto_id, remetente, destinatario, numero_volume, quantidade_exp,
+          peso, cubagem, prioridade, tipo_material, embalagem))
+    
+    volume_id = cursor.lastrowid
+    
+    cursor.executemany("""
+        INSERT INTO caixas_individuais (volume_id, numero_caixa)
+        VALUES (?, ?)
+    """, [(volume_id, i) for i in range(1, quantidade_exp + 1)])
+        
+    # --- SHEETS SYNC ---
+    if numero_manifesto and _registrar_eventos():
+        dados_volume = {
+            'remetente': remetente,
+            'destinatario': destinatario,
+            'numero_volume': numero_volume,
+            'quantidade_expedida': quantidade_exp,
+            'quantidade_recebida': 0,
+            'status': 'NÃO RECEBIDO'
+        }
+        _registrar_outbox(cursor, 'volume', numero_manifesto, dados_volume)
+    # -------------------
+    return volume_id
 
 @execute_with_retry
-def buscar_volume(manifesto_id: int, remetente: str, ultimos_digitos: str) -> List[Dict]:
+def buscar_volume(manifesto_id: int, remetente: str, ultimos_digitos: str) -> List[Volume]:
+    from src.normalizacao import obter_motor
+    
+    # Mesmo identificador canônico usado na extração (ex: GACPAC -> GAC-PAC);
+    # o texto digitado continua valendo para volumes cadastrados manualmente
+    remetente_canonico = obter_motor().remetente(remetente)
+    
     conn = get_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT * FROM volumes
-            WHERE manifesto_id = ? AND remetente = ?
-        """, (manifesto_id, remetente))
+            WHERE manifesto_id = ? AND remetente IN (?, ?)
+        """, (manifesto_id, remetente_canonico, remetente))
         
-        todos_volumes = [dict(row) for row in cursor.fetchall()]
+        todos_volumes = todos(cursor, Volume)
         volumes_encontrados = []
         
         import re
@@ -437,7 +910,7 @@ def buscar_volume(manifesto_id: int, remetente: str, ultimos_digitos: str) -> Li
         conn.close()
 
 @execute_with_retry
-def listar_volumes(manifesto_id: int) -> List[Dict]:
+def listar_volumes(manifesto_id: int) -> List[Volume]:
     conn = get_connection()
     try:
         cursor = conn.cursor()
@@ -446,23 +919,82 @@ def listar_volumes(manifesto_id: int) -> List[Dict]:
             WHERE manifesto_id = ?
             ORDER BY remetente, numero_volume
         """, (manifesto_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        return todos(cursor, Volume)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def listar_volumes_com_caixas(manifesto_id: int, arquivado: bool = False) -> List[Volume]:
+    """
+    Como listar_volumes, com o estado das caixas de cada volume na mesma consulta:
+    caixas_recebidas e caixas_faltantes são os números separados por vírgula
+    (GROUP_CONCAT, sem ordem garantida), ou None.
+    """
+    conn = get_connection(arquivado)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT v.*,
+                   GROUP_CONCAT(CASE WHEN c.status = 'RECEBIDA' THEN c.numero_caixa END) AS caixas_recebidas,
+                   GROUP_CONCAT(CASE WHEN c.status != 'RECEBIDA' THEN c.numero_caixa END) AS caixas_faltantes
+            FROM volumes v
+            LEFT JOIN caixas_individuais c ON c.volume_id = v.id
+            WHERE v.manifesto_id = ?
+            GROUP BY v.id
+            ORDER BY v.remetente, v.numero_volume
+        """, (manifesto_id,))
+        return todos(cursor, Volume)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def listar_volumes_por_numero(numero_manifesto: str) -> List[Volume]:
+    """Como listar_volumes, pelo número do manifesto (usado pela sincronização)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT v.* FROM volumes v
+            JOIN manifestos m ON v.manifesto_id = m.id
+            WHERE m.numero_manifesto = ?
+            ORDER BY v.remetente, v.numero_volume
+        """, (numero_manifesto,))
+        return todos(cursor, Volume)
     finally:
         conn.close()
 
 @execute_with_retry
-def obter_volume(volume_id: int) -> Optional[Dict]:
+def obter_snapshot_manifesto(numero_manifesto: str) -> Optional[Dict]:
+    """Status e volumes do manifesto lidos na mesma transação (reconciliação com a planilha)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT id, status FROM manifestos WHERE numero_manifesto = ?", (numero_manifesto,))
+        manifesto = cursor.fetchone()
+        if not manifesto:
+            return None
+        cursor.execute("""
+            SELECT * FROM volumes WHERE manifesto_id = ?
+            ORDER BY remetente, numero_volume
+        """, (manifesto['id'],))
+        return {'status': manifesto['status'], 'volumes': todos(cursor, Volume)}
+    finally:
+        conn.rollback()
+        conn.close()
+
+@execute_with_retry
+def obter_volume(volume_id: int) -> Optional[Volume]:
     conn = get_connection()
     try:
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM volumes WHERE id = ?", (volume_id,))
-        volume = cursor.fetchone()
-        return dict(volume) if volume else None
+        return um(cursor, Volume)
     finally:
         conn.close()
 
 @execute_with_retry
-def obter_caixas(volume_id: int) -> List[Dict]:
+def obter_caixas(volume_id: int) -> List[Caixa]:
     conn = get_connection()
     try:
         cursor = conn.cursor()
@@ -471,7 +1003,7 @@ def obter_caixas(volume_id: int) -> List[Dict]:
             WHERE volume_id = ?
             ORDER BY numero_caixa
         """, (volume_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        return todos(cursor, Caixa)
     finally:
         conn.close()
 
@@ -480,12 +1012,11 @@ def marcar_caixa_recebida(volume_id: int, numero_caixa: int, usuario: str = "Sis
     """Marca caixa como recebida e dispara sync do volume"""
     conn = get_connection()
     
-    dados_para_sync = None 
-    
     try:
         cursor = conn.cursor()
         agora = datetime.now().isoformat()
         
+        cursor.execute("BEGIN")
         cursor.execute("""
             UPDATE caixas_individuais
             SET status = 'RECEBIDA', data_hora_recepcao = ?, usuario_conferente = ?
@@ -547,7 +1078,7 @@ def marcar_caixa_recebida(volume_id: int, numero_caixa: int, usuario: str = "Sis
             cursor.execute("UPDATE manifestos SET status = ? WHERE id = ?", (novo_status_manifesto, manifesto_id))
             
             # --- SHEETS SYNC ---
-            if SHEETS_ENABLED and sheets:
+            if _registrar_eventos():
                 cursor.execute("""
                     SELECT v.*, m.numero_manifesto 
                     FROM volumes v 
@@ -555,15 +1086,19 @@ def marcar_caixa_recebida(volume_id: int, numero_caixa: int, usuario: str = "Sis
                     WHERE v.id = ?
                 """, (volume_id,))
                 dados_para_sync = dict(cursor.fetchone())
+                num_man = dados_para_sync.pop('numero_manifesto')
+                _registrar_outbox(cursor, 'volume', num_man, dados_para_sync)
+                _registrar_outbox(cursor, 'cabecalho', num_man, {'status': novo_status_manifesto})
             # -------------------
-            
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
         conn.close()
-        
-    if dados_para_sync and SHEETS_ENABLED and sheets:
-        num_man = dados_para_sync.pop('numero_manifesto')
-        run_async_sync(sheets.sincronizar_volume, num_man, dados_para_sync)
-        run_async_sync(sheets.atualizar_status_cabecalho, num_man, novo_status_manifesto)
+    
+    notificar_sync()
 
 @execute_with_retry
 def marcar_volume_recebido(volume_id: int, quantidade: int = None, usuario: str = "Sistema"):
@@ -603,22 +1138,65 @@ def registrar_log(manifesto_id: int, acao: str, detalhes: str = None, usuario: s
         conn.close()
 
 @execute_with_retry
-def obter_logs(manifesto_id: int) -> List[Dict]:
-    conn = get_connection()
+def obter_logs(manifesto_id: int, limite: int = None, antes_de: Tuple[str, int] = None,
+               acao: str = None, usuario: str = None, busca: str = None,
+               arquivado: bool = False) -> List[Log]:
+    """
+    Histórico do manifesto, do mais recente ao mais antigo.
+
+    Paginação por chave: antes_de é o (timestamp, id) do último registro da
+    página anterior, então cada página custa o mesmo, por mais fundo que se vá
+    (idx_logs_manifesto). acao e usuario filtram por igualdade; busca procura
+    o trecho na ação, nos detalhes e no usuário. Com arquivado, lê do
+    arquivo histórico.
+    """
+    condicoes = ["manifesto_id = ?"]
+    params = [manifesto_id]
+    if antes_de:
+        condicoes.append("(timestamp, id) < (?, ?)")
+        params.extend(antes_de)
+    if acao:
+        condicoes.append("acao = ?")
+        params.append(acao)
+    if usuario:
+        condicoes.append("usuario = ?")
+        params.append(usuario)
+    if busca:
+        condicoes.append("(acao LIKE ? OR detalhes LIKE ? OR usuario LIKE ?)")
+        params.extend([f"%{busca}%"] * 3)
+    
+    query = f"SELECT * FROM logs WHERE {' AND '.join(condicoes)} ORDER BY timestamp DESC, id DESC"
+    if limite:
+        query += " LIMIT ?"
+        params.append(limite)
+    
+    conn = get_connection(arquivado)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        return todos(cursor, Log)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def obter_filtros_logs(manifesto_id: int, arquivado: bool = False) -> Dict[str, List[str]]:
+    """Ações e usuários distintos do histórico do manifesto (para os filtros)"""
+    conn = get_connection(arquivado)
     try:
         cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT acao FROM logs WHERE manifesto_id = ? ORDER BY acao", (manifesto_id,))
+        acoes = [row[0] for row in cursor.fetchall()]
         cursor.execute("""
-            SELECT * FROM logs
-            WHERE manifesto_id = ?
-            ORDER BY timestamp DESC
+            SELECT DISTINCT usuario FROM logs
+            WHERE manifesto_id = ? AND usuario IS NOT NULL ORDER BY usuario
         """, (manifesto_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        return {'acoes': acoes, 'usuarios': [row[0] for row in cursor.fetchall()]}
     finally:
         conn.close()
 
 @execute_with_retry
-def obter_estatisticas_manifesto(manifesto_id: int) -> Dict:
-    conn = get_connection()
+def obter_estatisticas_manifesto(manifesto_id: int, arquivado: bool = False) -> Dict:
+    conn = get_connection(arquivado)
     try:
         cursor = conn.cursor()
         cursor.execute("""
@@ -645,4 +1223,980 @@ def obter_estatisticas_manifesto(manifesto_id: int) -> Dict:
         
         return stats
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+# ==================== EXPORTAÇÃO ====================
+
+# data_manifesto é gravada como dd/mm/aaaa; para comparar períodos é preciso aaaa-mm-dd
+_DATA_MANIFESTO_ISO = ("substr(m.data_manifesto, 7, 4) || '-' || substr(m.data_manifesto, 4, 2)"
+                       " || '-' || substr(m.data_manifesto, 1, 2)")
+
+def _filtro_exportacao(manifesto_id: int = None, data_inicio: str = None, data_fim: str = None,
+                       status: str = None, status_volume: str = None,
+                       remetente: str = None) -> Tuple[str, List]:
+    """Cláusula WHERE da exportação. Datas no formato aaaa-mm-dd, inclusive."""
+    condicoes = ["1=1"]
+    params = []
+    if manifesto_id is not None:
+        condicoes.append("m.id = ?")
+        params.append(manifesto_id)
+    if data_inicio:
+        condicoes.append(f"{_DATA_MANIFESTO_ISO} >= ?")
+        params.append(data_inicio)
+    if data_fim:
+        condicoes.append(f"{_DATA_MANIFESTO_ISO} <= ?")
+        params.append(data_fim)
+    if status:
+        condicoes.append("m.status = ?")
+        params.append(status)
+    if status_volume:
+        condicoes.append("v.status = ?")
+        params.append(status_volume)
+    if remetente:
+        condicoes.append("v.remetente LIKE ?")
+        params.append(f"%{remetente}%")
+    return " AND ".join(condicoes), params
+
+def _esquemas_exportacao(cursor, incluir_arquivados: bool) -> List[str]:
+    """Arquivo histórico (se pedido e existir) e banco principal, nesta ordem: a dos ids"""
+    if incluir_arquivados and anexar_arquivo(cursor):
+        return ['arquivo', 'main']
+    return ['main']
+
+@execute_with_retry
+def contar_exportacao(incluir_arquivados: bool = True, **filtros) -> int:
+    """Quantidade de linhas que a exportação com estes filtros vai gerar"""
+    where, params = _filtro_exportacao(**filtros)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        total = 0
+        for esquema in _esquemas_exportacao(cursor, incluir_arquivados):
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM {esquema}.volumes v
+                JOIN {esquema}.manifestos m ON v.manifesto_id = m.id
+                WHERE {where}
+            """, params)
+            total += cursor.fetchone()[0]
+        return total
+    finally:
+        conn.close()
+
+def iterar_exportacao(tamanho_lote: int = 1000, incluir_arquivados: bool = True, **filtros):
+    """
+    Linhas da exportação (dados do manifesto + volume), em lotes de tuplas.
+    Com incluir_arquivados, também as do arquivo histórico.
+
+    É um gerador: a consulta fica aberta enquanto o chamador consome e só um
+    lote fica em memória. Não usa execute_with_retry de propósito, porque o
+    lock global ficaria preso durante toda a exportação; com WAL esta leitura
+    não bloqueia a conferência, e o BEGIN garante um retrato consistente.
+    A ordem segue o índice único (manifesto_id, numero_volume), sem ordenação
+    em memória: uma consulta por banco, em vez de um UNION ALL que precisaria
+    ordenar o resultado inteiro (os arquivados, mais antigos, vêm antes).
+    """
+    where, params = _filtro_exportacao(**filtros)
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        esquemas = _esquemas_exportacao(cursor, incluir_arquivados)  # ATTACH fora da transação
+        cursor.execute("BEGIN")
+        for esquema in esquemas:
+            cursor.execute(f"""
+                SELECT m.numero_manifesto, m.data_manifesto, m.terminal_origem, m.terminal_destino,
+                       m.status, v.status, v.remetente, v.destinatario, v.numero_volume,
+                       v.quantidade_expedida, v.quantidade_recebida, v.peso_total, v.cubagem,
+                       v.prioridade, v.data_hora_primeira_recepcao, v.usuario_recepcao
+                FROM {esquema}.manifestos m
+                JOIN {esquema}.volumes v ON v.manifesto_id = m.id
+                WHERE {where}
+                ORDER BY m.id, v.numero_volume
+            """, params)
+            while True:
+                lote = cursor.fetchmany(tamanho_lote)
+                if not lote:
+                    break
+                yield lote
+    finally:
+        conn.rollback()
+        conn.close()
+
+# ==================== ARQUIVO HISTÓRICO ====================
+
+def caminho_arquivo() -> Path:
+    return DB_PATH.parent / ARQUIVO_HISTORICO
+
+def _uri_arquivo() -> str:
+    return caminho_arquivo().resolve().as_uri() + "?mode=ro"
+
+def _conexao_arquivo():
+    """Conexão somente leitura direto no arquivo histórico (mesmas tabelas do banco principal)"""
+    conn = sqlite3.connect(_uri_arquivo(), uri=True, timeout=30.0,
+                           isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def anexar_arquivo(cursor) -> bool:
+    """Anexa o arquivo histórico, somente leitura, como 'arquivo'. False se ainda não existe."""
+    if not caminho_arquivo().exists():
+        return False
+    cursor.execute("ATTACH DATABASE ? AS arquivo", (_uri_arquivo(),))
+    return True
+
+def _verificar_numero_arquivado(cursor, numero: str):
+    """
+    ValueError se o número já está no arquivo histórico: o UNIQUE de
+    numero_manifesto só vale dentro de cada banco. Chamar fora de transação
+    (o arquivo é anexado e desanexado aqui).
+    """
+    if not anexar_arquivo(cursor):
+        return
+    try:
+        cursor.execute("SELECT 1 FROM arquivo.manifestos WHERE numero_manifesto = ?", (numero,))
+        arquivado = cursor.fetchone() is not None
+    finally:
+        cursor.execute("DETACH DATABASE arquivo")
+    if arquivado:
+        raise ValueError(f"O Manifesto nº {numero} já está cadastrado no sistema (arquivo histórico).")
+
+def _colunas(cursor, esquema: str, tabela: str) -> List[str]:
+    cursor.execute(f"PRAGMA {esquema}.table_info({tabela})")
+    return [coluna[1] for coluna in cursor.fetchall()]
+
+def _preparar_arquivo(cursor):
+    """Cria no arquivo anexado as tabelas e índices do banco principal, e as colunas que faltarem"""
+    for tabela in TABELAS_ARQUIVO:
+        cursor.execute("SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (tabela,))
+        sql = cursor.fetchone()[0]
+        cursor.execute(sql.replace(f"CREATE TABLE {tabela}", f"CREATE TABLE IF NOT EXISTS arquivo.{tabela}", 1))
+
+        # Colunas acrescentadas por migrar_schema depois que o arquivo foi criado
+        existentes = set(_colunas(cursor, 'arquivo', tabela))
+        cursor.execute(f"PRAGMA main.table_info({tabela})")
+        for _, nome, tipo, _, _, _ in cursor.fetchall():
+            if nome not in existentes:
+                cursor.execute(f"ALTER TABLE arquivo.{tabela} ADD COLUMN {nome} {tipo}")
+
+    cursor.execute(f"""
+        SELECT sql FROM main.sqlite_master
+        WHERE type = 'index' AND sql IS NOT NULL
+          AND tbl_name IN ({','.join('?' * len(TABELAS_ARQUIVO))})
+    """, TABELAS_ARQUIVO)
+    for (sql,) in cursor.fetchall():
+        cursor.execute(sql.replace("CREATE INDEX ", "CREATE INDEX IF NOT EXISTS arquivo.", 1))
+
+@execute_with_retry
+def arquivar_manifestos(dias: int = DIAS_ARQUIVAMENTO) -> int:
+    """
+    Move para o arquivo histórico os manifestos totalmente recebidos e
+    finalizados há mais de `dias` dias, com volumes, caixas e logs. Com a
+    integração do Sheets ativa, manifestos com eventos ainda não enviados à
+    planilha ficam para a próxima vez; sem ela, ninguém enviaria esses eventos.
+
+    Com o banco principal em WAL, uma transação que grava nos dois arquivos não
+    é atômica entre eles; por isso são duas: primeiro copia (pode repetir: a
+    linha com o mesmo id é atualizada) e só depois apaga do principal o que já
+    está no arquivo. Nunca substitui outro manifesto do arquivo: manifestos
+    com um número que já está lá ficam no banco principal.
+    Retorna a quantidade de manifestos arquivados.
+    """
+    limite = (datetime.now() - timedelta(days=dias)).isoformat()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("ATTACH DATABASE ? AS arquivo", (str(caminho_arquivo()),))
+        _preparar_arquivo(cursor)
+
+        pendentes = """
+              AND NOT EXISTS (
+                  SELECT 1 FROM main.sync_outbox o
+                  WHERE o.numero_manifesto = m.numero_manifesto AND o.status = 'PENDENTE'
+              )""" if SHEETS_ENABLED else ""
+        cursor.execute(f"""
+            CREATE TEMP TABLE arquivar AS
+            SELECT m.id FROM main.manifestos m
+            WHERE m.status = 'TOTALMENTE RECEBIDO'
+              AND m.data_conferencia_fim < ?{pendentes}
+        """, (limite,))
+        # Número repetido no arquivo (de antes da verificação em criar_manifesto)
+        cursor.execute("""
+            DELETE FROM temp.arquivar WHERE id IN (
+                SELECT m.id FROM main.manifestos m
+                JOIN arquivo.manifestos a ON a.numero_manifesto = m.numero_manifesto AND a.id != m.id
+            )
+        """)
+        if cursor.rowcount:
+            print(f"[Arquivo] {cursor.rowcount} manifesto(s) com número já arquivado "
+                  f"ficam no banco principal")
+        cursor.execute("SELECT COUNT(*) FROM temp.arquivar")
+        quantidade = cursor.fetchone()[0]
+        if quantidade == 0:
+            return 0
+
+        filtros = {
+            'manifestos': "id IN (SELECT id FROM temp.arquivar)",
+            'volumes': "manifesto_id IN (SELECT id FROM temp.arquivar)",
+            'caixas_individuais': """volume_id IN (SELECT v.id FROM main.volumes v
+                                     WHERE v.manifesto_id IN (SELECT id FROM temp.arquivar))""",
+            'logs': "manifesto_id IN (SELECT id FROM temp.arquivar)",
+        }
+
+        # 1) Cópia: só o arquivo é gravado
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            for tabela in TABELAS_ARQUIVO:
+                nomes = _colunas(cursor, 'main', tabela)
+                colunas = ", ".join(nomes)
+                atualizar = ", ".join(f"{nome} = excluded.{nome}" for nome in nomes if nome != 'id')
+                # Sem OR REPLACE: um conflito de outro UNIQUE apagaria a linha
+                # arquivada (e, em cascata, os filhos dela); aqui ele aborta
+                cursor.execute(f"""
+                    INSERT INTO arquivo.{tabela} ({colunas})
+                    SELECT {colunas} FROM main.{tabela} WHERE {filtros[tabela]}
+                    ON CONFLICT(id) DO UPDATE SET {atualizar}
+                """)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        # 2) Remoção: só o banco principal é gravado (com o evento para o feed)
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.execute("""
+                SELECT id, numero_manifesto FROM main.manifestos WHERE id IN (SELECT id FROM temp.arquivar)
+            """)
+            _registrar_saida(cursor, 'arquivamento', [(row[0], row[1]) for row in cursor.fetchall()])
+            for tabela in reversed(TABELAS_ARQUIVO):
+                cursor.execute(f"DELETE FROM main.{tabela} WHERE {filtros[tabela]}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        feed.notificar()
+        print(f"[Arquivo] {quantidade} manifesto(s) movido(s) para {caminho_arquivo().name}")
+        return quantidade
+    finally:
+        conn.close()
+
+@execute_with_retry
+def buscar_volumes_por_numero(trecho: str, incluir_arquivados: bool = False) -> List[Volume]:
+    """
+    Volumes cujo número contém o trecho, com número e data do manifesto e a
+    coluna arquivado (0/1). O histórico só é lido se incluir_arquivados.
+    """
+    consulta = """
+        SELECT v.*, m.numero_manifesto, m.data_manifesto, {arquivado} AS arquivado
+        FROM {esquema}.volumes v
+        JOIN {esquema}.manifestos m ON v.manifesto_id = m.id
+        WHERE v.numero_volume LIKE ?
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        query = consulta.format(esquema='main', arquivado=0)
+        params = [f"%{trecho}%"]
+        if incluir_arquivados and anexar_arquivo(cursor):
+            query += " UNION ALL " + consulta.format(esquema='arquivo', arquivado=1)
+            params.append(f"%{trecho}%")
+        cursor.execute(query + " ORDER BY arquivado, manifesto_id DESC, numero_volume", params)
+        return todos(cursor, Volume)
+    finally:
+        conn.close()
+
+# ==================== MANUTENÇÃO ====================
+
+def _tamanho(caminho: Path) -> int:
+    try:
+        return caminho.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+@execute_with_retry
+def estado_armazenamento() -> Dict:
+    """Tamanho do banco e do WAL, páginas livres e modo de auto_vacuum (0 nenhum, 1 total, 2 incremental)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        estado = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'):
+            cursor.execute(f"PRAGMA {pragma}")
+            estado[pragma] = cursor.fetchone()[0]
+        estado['tamanho_banco'] = _tamanho(DB_PATH)
+        estado['tamanho_wal'] = _tamanho(DB_PATH.with_name(DB_PATH.name + '-wal'))
+        estado['espaco_livre'] = estado['freelist_count'] * estado['page_size']
+        return estado
+    finally:
+        conn.close()
+
+@execute_with_retry
+def otimizar_banco() -> str:
+    """PRAGMA optimize (ANALYZE completo na primeira vez, quando ainda não há estatísticas)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if not cursor.fetchone():
+            cursor.execute("ANALYZE")
+            return "ANALYZE inicial"
+        cursor.execute("PRAGMA analysis_limit=400")
+        cursor.execute("PRAGMA optimize")
+        return "ok"
+    finally:
+        conn.close()
+
+@execute_with_retry
+def checkpoint_wal() -> str:
+    """Copia o WAL para o banco e o zera (TRUNCATE)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        ocupado, paginas_wal, copiadas = cursor.fetchone()
+        if ocupado:
+            return f"parcial: {copiadas} de {paginas_wal} páginas (leitores ativos)"
+        return f"{copiadas} página(s) copiada(s)"
+    finally:
+        conn.close()
+
+@execute_with_retry
+def vacuum_incremental() -> str:
+    """
+    Devolve ao sistema as páginas livres. Um banco criado antes do
+    auto_vacuum incremental é convertido antes, com um VACUUM completo.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
+            return "convertido para auto_vacuum incremental (VACUUM)"
+        cursor.execute("PRAGMA freelist_count")
+        livres = cursor.fetchone()[0]
+        # executescript roda o pragma até o fim (execute só libera a primeira página)
+        cursor.executescript("PRAGMA incremental_vacuum;")
+        return f"{livres} página(s) liberada(s)"
+    finally:
+        conn.close()
+
+@execute_with_retry
+def verificar_integridade(completa: bool = False) -> str:
+    """quick_check (ou integrity_check completo): 'ok' ou os primeiros problemas encontrados"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA integrity_check(10)" if completa else "PRAGMA quick_check(10)")
+        problemas = [row[0] for row in cursor.fetchall()]
+        return "; ".join(problemas)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def registrar_manutencao(tarefa: str, inicio: str, duracao: float,
+                         bytes_recuperados: int = 0, resultado: str = None):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO manutencao_execucoes (tarefa, inicio, duracao, bytes_recuperados, resultado)
+            VALUES (?, ?, ?, ?, ?)
+        """, (tarefa, inicio, duracao, bytes_recuperados, resultado))
+    finally:
+        conn.close()
+
+@execute_with_retry
+def ultimas_manutencoes() -> Dict[str, Dict]:
+    """Última execução de cada tarefa de manutenção"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM manutencao_execucoes
+            WHERE id IN (SELECT MAX(id) FROM manutencao_execucoes GROUP BY tarefa)
+        """)
+        return {row['tarefa']: dict(row) for row in cursor.fetchall()}
+    finally:
+        conn.close()
+
+@execute_with_retry
+def listar_manutencoes(limite: int = 50) -> List[Dict]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM manutencao_execucoes ORDER BY id DESC LIMIT ?", (limite,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+# ==================== NORMALIZAÇÃO ====================
+
+def _incrementar_versao_regras(cursor):
+    """Sinaliza que as regras mudaram e o motor de normalização deve ser recompilado"""
+    cursor.execute("""
+        INSERT INTO configuracoes (chave, valor) VALUES ('versao_regras', '1')
+        ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+    """)
+    # O motor deste processo guarda a versão por alguns segundos; aqui ele já
+    # fica sabendo (as conexões são autocommit, a alteração já foi gravada)
+    from src.normalizacao import invalidar_motor
+    invalidar_motor()
+
+@execute_with_retry
+def obter_versao_regras() -> int:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT valor FROM configuracoes WHERE chave = 'versao_regras'")
+        row = cursor.fetchone()
+        return int(row['valor']) if row else 0
+    finally:
+        conn.close()
+
+@execute_with_retry
+def listar_regras_remetente(apenas_ativas: bool = True) -> List[Dict]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        query = "SELECT * FROM regras_remetente"
+        if apenas_ativas:
+            query += " WHERE ativo = 1"
+        query += " ORDER BY prioridade, id"
+        cursor.execute(query)
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+@execute_with_retry
+def salvar_regra_remetente(palavra_chave: str, padrao: str, prioridade: int = 100, ativo: bool = True):
+    """Cria ou atualiza a regra da palavra-chave (menor prioridade vence)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO regras_remetente (palavra_chave, padrao, prioridade, ativo)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(palavra_chave) DO UPDATE SET
+                padrao = excluded.padrao,
+                prioridade = excluded.prioridade,
+                ativo = excluded.ativo
+        """, (palavra_chave.upper().strip(), padrao.upper().strip(), prioridade, int(ativo)))
+        _incrementar_versao_regras(cursor)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def remover_regra_remetente(palavra_chave: str):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM regras_remetente WHERE palavra_chave = ?",
+                       (palavra_chave.upper().strip(),))
+        _incrementar_versao_regras(cursor)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def listar_destinos_aceitos(site: str = None) -> List[Dict]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if site:
+            cursor.execute("SELECT * FROM destinos_aceitos WHERE site = ? ORDER BY id", (site,))
+        else:
+            cursor.execute("SELECT * FROM destinos_aceitos ORDER BY site, id")
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+@execute_with_retry
+def salvar_destino_aceito(site: str, padrao: str, termos: str):
+    """
+    Aceita um destino para o site (terminal de destino, ou '*' para todos).
+    termos: palavras separadas por vírgula que devem aparecer no destinatário.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO destinos_aceitos (site, padrao, termos) VALUES (?, ?, ?)
+            ON CONFLICT(site, padrao) DO UPDATE SET termos = excluded.termos
+        """, (site.strip(), padrao.upper().strip(), termos.upper()))
+        _incrementar_versao_regras(cursor)
+    finally:
+        conn.close()
+
+@execute_with_retry
+def remover_destino_aceito(site: str, padrao: str):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM destinos_aceitos WHERE site = ? AND padrao = ?",
+                       (site.strip(), padrao.upper().strip()))
+        _incrementar_versao_regras(cursor)
+    finally:
+        conn.close()
+
+# ==================== ESPELHO DO GOOGLE SHEETS ====================
+
+@execute_with_retry
+def carregar_espelho_planilha(numero_manifesto: str) -> Optional[Dict]:
+    """Aba do manifesto no Sheets: sheet_id, linhas da grade, próxima linha livre e numero_volume -> linha"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM sheets_abas WHERE numero_manifesto = ?", (numero_manifesto,))
+        aba = cursor.fetchone()
+        if not aba:
+            return None
+        
+        cursor.execute("SELECT numero_volume, linha FROM sheets_linhas WHERE numero_manifesto = ?",
+                       (numero_manifesto,))
+        espelho = dict(aba)
+        espelho['linhas'] = {row['numero_volume']: row['linha'] for row in cursor.fetchall()}
+        return espelho
+    finally:
+        conn.close()
+
+@execute_with_retry
+def salvar_espelho_planilha(numero_manifesto: str, sheet_id: int, linhas_grade: int,
+                            proxima_linha: int, linhas: Dict[str, int] = None, substituir: bool = False,
+                            formatado: bool = False):
+    """
+    Grava a situação da aba. linhas: numero_volume -> linha a incluir/atualizar;
+    com substituir=True o índice anterior do manifesto é descartado.
+    formatado: a aba já tem a formatação condicional por status.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("""
+            INSERT INTO sheets_abas (numero_manifesto, sheet_id, linhas_grade, proxima_linha, formatado)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(numero_manifesto) DO UPDATE SET
+                sheet_id = excluded.sheet_id,
+                linhas_grade = excluded.linhas_grade,
+                proxima_linha = excluded.proxima_linha,
+                formatado = excluded.formatado
+        """, (numero_manifesto, sheet_id, linhas_grade, proxima_linha, int(formatado)))
+        
+        if substituir:
+            cursor.execute("DELETE FROM sheets_linhas WHERE numero_manifesto = ?", (numero_manifesto,))
+        if linhas:
+            cursor.executemany("""
+                INSERT OR REPLACE INTO sheets_linhas (numero_manifesto, numero_volume, linha)
+                VALUES (?, ?, ?)
+            """, [(numero_manifesto, num_vol, linha) for num_vol, linha in linhas.items()])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@execute_with_retry
+def remover_espelho_planilha(numero_manifesto: str):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM sheets_linhas WHERE numero_manifesto = ?", (numero_manifesto,))
+        cursor.execute("DELETE FROM sheets_abas WHERE numero_manifesto = ?", (numero_manifesto,))
+    finally:
+        conn.close()
+
+# ==================== OUTBOX DO GOOGLE SHEETS ====================
+
+def _chave_outbox(tipo: str, numero_manifesto: str, payload: Dict) -> str:
+    """Linha da planilha afetada pelo evento; eventos com a mesma chave se substituem"""
+    if tipo == 'volume':
+        return f"{numero_manifesto}|volume|{payload.get('numero_volume', '')}"
+    return f"{numero_manifesto}|{tipo}"
+
+def _registrar_outbox(cursor, tipo: str, numero_manifesto: str, payload: Dict):
+    """Grava o evento usando o cursor da transação da alteração"""
+    if tipo in TIPOS_SO_FEED:
+        status, processado_em = 'ENVIADO', datetime.now().isoformat()
+    else:
+        status, processado_em = 'PENDENTE', None
+    cursor.execute("""
+        INSERT INTO sync_outbox (tipo, numero_manifesto, chave, payload, status, processado_em)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (tipo, numero_manifesto, _chave_outbox(tipo, numero_manifesto, payload),
+          json.dumps(payload, ensure_ascii=False, default=str), status, processado_em))
+
+def _registrar_saida(cursor, tipo: str, manifestos: List[Tuple[int, str]]):
+    """Eventos de manifestos que saíram do banco principal (exclusão ou arquivamento), para o feed"""
+    if not feed.ativo():
+        return
+    for manifesto_id, numero in manifestos:
+        _registrar_outbox(cursor, tipo, numero, {'id': manifesto_id, 'numero_manifesto': numero})
+
+@execute_with_retry
+def listar_outbox_pendente(apos_id: int = 0, limite: int = 500) -> List[Dict]:
+    """
+    Eventos pendentes em ordem; de cada linha da planilha, só o mais recente.
+    Um evento mais novo em FALHA não esconde os pendentes anteriores a ele.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, tipo, numero_manifesto, chave, payload, tentativas, criado_em
+            FROM sync_outbox o
+            WHERE status = 'PENDENTE' AND id > ?
+              AND NOT EXISTS (SELECT 1 FROM sync_outbox n
+                              WHERE n.chave = o.chave AND n.id > o.id AND n.status != 'FALHA')
+            ORDER BY id
+            LIMIT ?
+        """, (apos_id, limite))
+        eventos = []
+        for row in cursor.fetchall():
+            evento = dict(row)
+            evento['payload'] = json.loads(evento['payload'])
+            eventos.append(evento)
+        return eventos
+    finally:
+        conn.close()
+
+@execute_with_retry
+def confirmar_outbox(ids: List[int]):
+    """
+    Marca os eventos como enviados. Eventos mais antigos da mesma linha que
+    ainda estavam pendentes (ou em falha) também ficam resolvidos, pois o
+    estado enviado é mais novo que o deles. Um snapshot resolve todos os
+    eventos anteriores do manifesto.
+    """
+    if not ids:
+        return
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        agora = datetime.now().isoformat()
+        marcadores = ",".join("?" * len(ids))
+        cursor.execute("BEGIN")
+        cursor.execute(f"""
+            SELECT chave, MAX(id) AS ultimo FROM sync_outbox
+            WHERE id IN ({marcadores}) GROUP BY chave
+        """, list(ids))
+        chaves = [(row['chave'], row['ultimo']) for row in cursor.fetchall()]
+        cursor.execute(f"""
+            SELECT numero_manifesto, MAX(id) AS ultimo FROM sync_outbox
+            WHERE id IN ({marcadores}) AND tipo = 'snapshot' GROUP BY numero_manifesto
+        """, list(ids))
+        snapshots = [(row['numero_manifesto'], row['ultimo']) for row in cursor.fetchall()]
+        
+        cursor.execute(f"""
+            UPDATE sync_outbox SET status = 'ENVIADO', processado_em = ?
+            WHERE id IN ({marcadores})
+        """, [agora, *ids])
+        cursor.executemany("""
+            UPDATE sync_outbox SET status = 'ENVIADO', processado_em = ?
+            WHERE chave = ? AND id < ? AND status != 'ENVIADO'
+        """, [(agora, chave, ultimo) for chave, ultimo in chaves])
+        cursor.executemany("""
+            UPDATE sync_outbox SET status = 'ENVIADO', processado_em = ?
+            WHERE numero_manifesto = ? AND id < ? AND status != 'ENVIADO'
+        """, [(agora, numero, ultimo) for numero, ultimo in snapshots])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@execute_with_retry
+def registrar_falha_outbox(ids: List[int], erro: str, max_tentativas: int) -> int:
+    """
+    Conta mais uma tentativa. Eventos que atingem max_tentativas vão para
+    FALHA (dead letter) e não são mais reenviados automaticamente, junto com
+    os pendentes mais antigos da mesma linha, que eles substituíam (reenviar
+    as falhas devolve todos e vale o mais recente).
+    Retorna quantos eventos foram para FALHA.
+    """
+    if not ids:
+        return 0
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        marcadores = ",".join("?" * len(ids))
+        cursor.execute("BEGIN")
+        cursor.execute(f"""
+            UPDATE sync_outbox
+            SET tentativas = tentativas + 1, ultimo_erro = ?, processado_em = ?
+            WHERE id IN ({marcadores})
+        """, [erro, datetime.now().isoformat(), *ids])
+        cursor.execute(f"""
+            UPDATE sync_outbox SET status = 'FALHA'
+            WHERE id IN ({marcadores}) AND status = 'PENDENTE' AND tentativas >= ?
+        """, [*ids, max_tentativas])
+        falhas = cursor.rowcount
+        if falhas:
+            cursor.execute(f"""
+                UPDATE sync_outbox SET status = 'FALHA', ultimo_erro = 'Substituído por evento em FALHA'
+                WHERE status = 'PENDENTE' AND EXISTS (
+                    SELECT 1 FROM sync_outbox f
+                    WHERE f.id IN ({marcadores}) AND f.status = 'FALHA'
+                      AND f.chave = sync_outbox.chave AND f.id > sync_outbox.id
+                )
+            """, ids)
+            falhas += cursor.rowcount
+        conn.commit()
+        return falhas
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+@execute_with_retry
+def registrar_reconciliacao(desde: str) -> int:
+    """
+    Agenda um snapshot para cada manifesto com eventos enviados desde o
+    instante informado (ISO, hora local). Retorna quantos foram agendados.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("""
+            SELECT DISTINCT numero_manifesto FROM sync_outbox
+            WHERE status = 'ENVIADO' AND tipo NOT IN ('snapshot', 'exclusao', 'arquivamento')
+              AND processado_em >= ?
+        """, (desde,))
+        numeros = [row['numero_manifesto'] for row in cursor.fetchall()]
+        for numero in numeros:
+            _registrar_outbox(cursor, 'snapshot', numero, {'motivo': 'reconciliação'})
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    
+    if numeros:
+        notificar_sync()
+    return len(numeros)
+
+@execute_with_retry
+def listar_falhas_outbox(limite: int = 200) -> List[Dict]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, tipo, numero_manifesto, chave, tentativas, ultimo_erro, criado_em, processado_em
+            FROM sync_outbox WHERE status = 'FALHA'
+            ORDER BY id DESC LIMIT ?
+        """, (limite,))
+        return [dict(row) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+@execute_with_retry
+def expirar_outbox_pendente(dias: int = 30, maximo: int = 100000) -> int:
+    """
+    Move para FALHA os eventos pendentes criados há mais de N dias e os que
+    passam do máximo (ficam os mais recentes), para o outbox não crescer sem
+    limite com a planilha fora do ar. Podem ser reenviados como as falhas.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE sync_outbox SET status = 'FALHA', ultimo_erro = 'Expirado sem envio'
+            WHERE status = 'PENDENTE'
+              AND (datetime(criado_em) < datetime('now', ?)
+                   OR id <= COALESCE((SELECT id FROM sync_outbox WHERE status = 'PENDENTE'
+                                      ORDER BY id DESC LIMIT 1 OFFSET ?), 0))
+        """, (f"-{int(dias)} days", int(maximo)))
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+@execute_with_retry
+def reenviar_falhas_outbox() -> int:
+    """Devolve os eventos em FALHA para a fila (zera as tentativas)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE sync_outbox SET status = 'PENDENTE', tentativas = 0
+            WHERE status = 'FALHA'
+        """)
+        reenviados = cursor.rowcount
+    finally:
+        conn.close()
+    
+    if reenviados:
+        notificar_sync()
+    return reenviados
+
+@execute_with_retry
+def contar_outbox() -> Dict[str, int]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) AS total FROM sync_outbox GROUP BY status")
+        contagem = {'PENDENTE': 0, 'ENVIADO': 0, 'FALHA': 0}
+        contagem.update({row['status']: row['total'] for row in cursor.fetchall()})
+        return contagem
+    finally:
+        conn.close()
+
+@execute_with_retry
+def resumo_outbox() -> Dict:
+    """Contagem por status e idade (s) do evento pendente mais antigo (None se não houver)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT status, COUNT(*) AS total FROM sync_outbox GROUP BY status")
+        resumo = {'PENDENTE': 0, 'ENVIADO': 0, 'FALHA': 0}
+        resumo.update({row['status']: row['total'] for row in cursor.fetchall()})
+        
+        # criado_em é CURRENT_TIMESTAMP (UTC), assim como julianday('now')
+        cursor.execute("""
+            SELECT (julianday('now') - julianday(criado_em)) * 86400 AS idade
+            FROM sync_outbox WHERE status = 'PENDENTE'
+            ORDER BY id LIMIT 1
+        """)
+        row = cursor.fetchone()
+        resumo['idade_pendente'] = max(row['idade'], 0.0) if row else None
+        return resumo
+    finally:
+        conn.close()
+
+def obter_metricas_sync() -> Dict:
+    """
+    Situação da sincronização com o Sheets para a interface. Enquanto o módulo
+    não foi carregado, só o que está no outbox.
+    """
+    if sheets is not None:
+        return sheets.metricas_sync()
+    metricas = resumo_outbox()
+    metricas['estado'] = 'não iniciada' if SHEETS_ENABLED else 'desativada'
+    return metricas
+
+@execute_with_retry
+def limpar_outbox_enviado(dias: int = 7) -> int:
+    """
+    Remove eventos já enviados há mais de N dias. Eventos que algum sink do
+    feed ainda não entregou são mantidos. Sem Sheets, vale a data de criação.
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if SHEETS_ENABLED:
+            cursor.execute("""
+                DELETE FROM sync_outbox
+                WHERE status = 'ENVIADO' AND datetime(processado_em) < datetime('now', 'localtime', ?)
+                  AND id <= COALESCE((SELECT MIN(ultimo_id) FROM feed_cursores), id)
+            """, (f"-{int(dias)} days",))
+        else:
+            cursor.execute("""
+                DELETE FROM sync_outbox
+                WHERE datetime(criado_em) < datetime('now', ?)
+                  AND id <= COALESCE((SELECT MIN(ultimo_id) FROM feed_cursores), id)
+            """, (f"-{int(dias)} days",))
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+# ==================== FEED DE ALTERAÇÕES ====================
+
+@execute_with_retry
+def listar_feed(apos_id: int, limite: int = 500) -> List[Dict]:
+    """Eventos do outbox em ordem, todos (sem descartar os substituídos), a partir de um cursor"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, tipo, numero_manifesto, chave, payload, criado_em
+            FROM sync_outbox WHERE id > ?
+            ORDER BY id LIMIT ?
+        """, (apos_id, limite))
+        eventos = []
+        for row in cursor.fetchall():
+            evento = dict(row)
+            evento['payload'] = json.loads(evento['payload'])
+            eventos.append(evento)
+        return eventos
+    finally:
+        conn.close()
+
+@execute_with_retry
+def obter_cursor_feed(sink: str) -> int:
+    """Último id entregue pelo sink. Um sink novo começa no fim do outbox (só eventos novos)."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR IGNORE INTO feed_cursores (sink, ultimo_id, atualizado_em)
+            SELECT ?, COALESCE(MAX(id), 0), ? FROM sync_outbox
+        """, (sink, datetime.now().isoformat()))
+        cursor.execute("SELECT ultimo_id FROM feed_cursores WHERE sink = ?", (sink,))
+        return cursor.fetchone()['ultimo_id']
+    finally:
+        conn.close()
+
+@execute_with_retry
+def salvar_cursor_feed(sink: str, ultimo_id: int):
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            UPDATE feed_cursores SET ultimo_id = ?, atualizado_em = ? WHERE sink = ?
+        """, (ultimo_id, datetime.now().isoformat(), sink))
+    finally:
+        conn.close()
+
+@execute_with_retry
+def remover_cursor_feed(sink: str):
+    """Esquece o sink (seus eventos deixam de ser retidos no outbox)"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM feed_cursores WHERE sink = ?", (sink,))
+    finally:
+        conn.close()
+
+@execute_with_retry
+def ultimo_id_outbox() -> int:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM sync_outbox")
+        return cursor.fetchone()[0]
+    finally:
+        conn.close()
+
+# ==================== CONFIGURAÇÕES ====================
+
+@execute_with_retry
+def obter_configuracao(chave: str, padrao: str = None) -> Optional[str]:
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT valor FROM configuracoes WHERE chave = ?", (chave,))
+        row = cursor.fetchone()
+        return row['valor'] if row else padrao
+    finally:
+        conn.close()
+
+@execute_with_retry
+def salvar_configuracao(chave: str, valor: Optional[str]):
+    """Grava (ou, com valor None, remove) uma configuração"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        if valor is None:
+            cursor.execute("DELETE FROM configuracoes WHERE chave = ?", (chave,))
+        else:
+            cursor.execute("""
+                INSERT INTO configuracoes (chave, valor) VALUES (?, ?)
+                ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor
+            """, (chave, valor))
+    finally:
+        conn.close()
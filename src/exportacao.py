@@ -0,0 +1,215 @@
+"""
+Sistema de Conferência de Manifestos - Exportação de Relatórios
+Arquivo: src/exportacao.py
+
+Exporta os volumes (com os dados do manifesto em cada linha) para CSV ou XLSX,
+de um manifesto, de um período ou de um filtro. As linhas saem do cursor do
+banco em lotes e vão direto para o arquivo, então a memória usada não depende
+do tamanho da exportação. O XLSX usa o modo write_only do openpyxl
+(dependência opcional), que também grava linha a linha.
+
+A exportação roda em uma thread própria; a interface acompanha o progresso
+consultando o objeto periodicamente (como faz com a ingestão) e pode cancelar
+a qualquer momento. O arquivo é gravado com outro nome e só é renomeado no
+final: exportação cancelada ou com erro não deixa arquivo pela metade.
+"""
+
+import csv
+import importlib.util
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from src.database import contar_exportacao, iterar_exportacao
+
+# ================= CONFIGURAÇÃO =================
+TAMANHO_LOTE = 1000               # Linhas lidas do banco por vez
+LIMITE_LINHAS_XLSX = 1048576      # Máximo de linhas de uma planilha do Excel
+XLSX_DISPONIVEL = importlib.util.find_spec('openpyxl') is not None
+
+FORMATOS = {'csv': "CSV (*.csv)", 'xlsx': "Excel (*.xlsx)"}
+
+# Mesma ordem das colunas de database.iterar_exportacao
+CABECALHO = [
+    'Manifesto', 'Data', 'Origem', 'Destino', 'Status Manifesto',
+    'Status', 'Remetente', 'Destinatário', 'N° Volume',
+    'Qtd Expedida', 'Qtd Recebida', 'Peso (kg)', 'Cubagem (m³)',
+    'Prioridade', 'Data Recebimento', 'Recebido por'
+]
+
+# Estados de uma exportação
+EM_ANDAMENTO = 'EM ANDAMENTO'
+CONCLUIDA = 'CONCLUÍDA'
+CANCELADA = 'CANCELADA'
+ERRO = 'ERRO'
+
+
+class ExportacaoCancelada(Exception):
+    """Exportação interrompida por cancelar()"""
+
+
+# ================= ESCRITORES =================
+
+class _EscritorCsv:
+    """CSV com ; e BOM, como o Excel em português espera"""
+
+    def __init__(self, caminho: str):
+        self.arquivo = open(caminho, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.arquivo, delimiter=';')
+        self.writer.writerow(CABECALHO)
+
+    def escrever(self, linhas):
+        self.writer.writerows(['' if valor is None else valor for valor in linha] for linha in linhas)
+
+    def fechar(self):
+        self.arquivo.close()
+
+    descartar = fechar
+
+
+class _EscritorXlsx:
+    """XLSX em modo write_only: cada linha vai para o disco ao ser adicionada"""
+
+    def __init__(self, caminho: str):
+        from openpyxl import Workbook
+        self.caminho = caminho
+        self.workbook = Workbook(write_only=True)
+        self.planilhas = 0
+        self._nova_planilha()
+
+    def _nova_planilha(self):
+        self.planilhas += 1
+        titulo = "Volumes" if self.planilhas == 1 else f"Volumes ({self.planilhas})"
+        self.planilha = self.workbook.create_sheet(titulo)
+        self.planilha.freeze_panes = 'A2'
+        self.planilha.append(CABECALHO)
+        self.linhas = 1
+
+    def escrever(self, linhas):
+        for linha in linhas:
+            if self.linhas >= LIMITE_LINHAS_XLSX:
+                self._nova_planilha()
+            self.planilha.append(linha)
+            self.linhas += 1
+
+    def fechar(self):
+        self.workbook.save(self.caminho)
+
+    def descartar(self):
+        """Encerra as planilhas sem gerar o arquivo (libera os temporários do openpyxl)"""
+        for planilha in self.workbook.worksheets:
+            if not planilha.closed:
+                planilha.close()
+
+
+def formato_do_arquivo(caminho: str) -> str:
+    """'csv' ou 'xlsx', pela extensão (CSV quando não reconhecida)"""
+    return 'xlsx' if Path(caminho).suffix.lower() == '.xlsx' else 'csv'
+
+
+# ================= EXPORTAÇÃO =================
+
+class Exportacao:
+    """
+    Uma exportação de volumes para arquivo.
+
+    Filtros aceitos (todos opcionais, combinados com E): manifesto_id,
+    data_inicio e data_fim (aaaa-mm-dd, inclusive), status (do manifesto),
+    status_volume e remetente (trecho do nome).
+    """
+
+    def __init__(self, caminho: str, formato: str = None, tamanho_lote: int = TAMANHO_LOTE, **filtros):
+        self.caminho = str(caminho)
+        self.formato = formato or formato_do_arquivo(self.caminho)
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato de exportação desconhecido: {self.formato}")
+        if self.formato == 'xlsx' and not XLSX_DISPONIVEL:
+            raise ValueError("Exportação em XLSX requer o pacote openpyxl")
+
+        self.tamanho_lote = tamanho_lote
+        self.filtros = filtros
+        self.estado = EM_ANDAMENTO
+        self.exportadas = 0
+        self.total = None
+        self.erro = None
+        self.iniciada_em = None
+        self.concluida_em = None
+        self._cancelar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        """Executa a exportação em segundo plano"""
+        self._thread = threading.Thread(target=self._executar_em_fundo, daemon=True)
+        self._thread.start()
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def aguardar(self, timeout: float = None) -> bool:
+        """Espera a thread terminar; True se terminou"""
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    @property
+    def em_andamento(self) -> bool:
+        return self.estado == EM_ANDAMENTO
+
+    @property
+    def percentual(self) -> int:
+        if not self.total:
+            return 100 if self.estado == CONCLUIDA else 0
+        return min(100, self.exportadas * 100 // self.total)
+
+    def _executar_em_fundo(self):
+        try:
+            self.executar()
+        except ExportacaoCancelada:
+            print(f"[Exportação] Cancelada: {self.caminho}")
+        except Exception as e:
+            print(f"[Exportação] Erro ao exportar {self.caminho}: {e}")
+
+    def executar(self) -> int:
+        """
+        Exporta na thread atual. Retorna a quantidade de linhas exportadas;
+        levanta ExportacaoCancelada se cancelar() for chamado no meio.
+        """
+        self.iniciada_em = datetime.now()
+        temporario = f"{self.caminho}.parcial"
+        escritor = None
+        lotes = iterar_exportacao(self.tamanho_lote, **self.filtros)
+        try:
+            self.total = contar_exportacao(**self.filtros)
+            escritor = (_EscritorXlsx if self.formato == 'xlsx' else _EscritorCsv)(temporario)
+            for lote in lotes:
+                if self._cancelar.is_set():
+                    raise ExportacaoCancelada()
+                escritor.escrever(lote)
+                self.exportadas += len(lote)
+            escritor.fechar()
+            escritor = None
+            os.replace(temporario, self.caminho)
+            self.estado = CONCLUIDA
+            return self.exportadas
+        except ExportacaoCancelada:
+            self.estado = CANCELADA
+            raise
+        except Exception as e:
+            self.erro = str(e)
+            self.estado = ERRO
+            raise
+        finally:
+            lotes.close()  # Fecha a consulta já, sem esperar o coletor de lixo
+            self.concluida_em = datetime.now()
+            if self.estado != CONCLUIDA:
+                if escritor is not None:
+                    escritor.descartar()
+                if os.path.exists(temporario):
+                    os.remove(temporario)
+
+
+def exportar(caminho: str, formato: str = None, **filtros) -> int:
+    """Exporta de forma síncrona (scripts e linha de comando)"""
+    return Exportacao(caminho, formato, **filtros).executar()
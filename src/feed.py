@@ -0,0 +1,421 @@
+"""
+Sistema de Conferência de Manifestos - Feed de Alterações
+Arquivo: src/feed.py
+
+O outbox (tabela sync_outbox) é gravado na mesma transação de cada alteração
+e funciona como feed de alterações. O Google Sheets é o primeiro consumidor
+(sheets_sync, que controla o progresso pelo status de cada evento, com
+retentativas e falhas definitivas); os demais destinos são sinks plugáveis:
+
+    - arquivo:  JSONL ou CSV, com rotação por tamanho
+    - replica:  cópia SQLite com o estado atual de manifestos e volumes
+    - webhook:  POST JSON com o lote de eventos para uma URL local
+
+Manifestos que saem do banco principal geram os eventos 'exclusao' e
+'arquivamento' ({"id", "numero_manifesto"}), só para os sinks.
+
+Cada sink tem a própria thread, o próprio cursor (último id entregue, salvo
+no banco), o tamanho de lote e a janela de agrupamento. Se um destino fica
+lento ou fora do ar, só ele se atrasa: a gravação no banco nunca espera por
+um sink (o evento já está no outbox), e a entrega é retomada do cursor com
+espera crescente entre as tentativas. Os eventos ainda não entregues por
+algum sink não são apagados na limpeza do outbox.
+
+Configuração (tabela configuracoes, chave 'feed_sinks'), lista JSON:
+    [{"nome": "arquivo", "tipo": "jsonl", "pasta": "data/feed"},
+     {"nome": "painel", "tipo": "webhook", "url": "http://127.0.0.1:8080/eventos"}]
+"""
+
+import csv
+import json
+import sqlite3
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+CHAVE_CONFIGURACAO = 'feed_sinks'
+INTERVALO_VERIFICACAO = 30.0   # Sem aviso de eventos novos, relê o outbox a cada N segundos
+ESPERA_MAXIMA_ERRO = 300.0     # Teto da espera entre tentativas de um sink com erro
+
+
+class Sink(ABC):
+    """
+    Destino do feed de alterações. Subclasses implementam entregar(eventos),
+    que recebe um lote em ordem de id e deve levantar exceção se não conseguir
+    entregar (o lote é repetido, entrega pelo menos uma vez).
+    """
+
+    tipo = None
+
+    def __init__(self, nome: str, tamanho_lote: int = 500, janela: float = 1.0):
+        """
+        tamanho_lote: máximo de eventos por entrega
+        janela: segundos aguardando mais eventos antes de entregar um lote
+        """
+        self.nome = nome
+        self.tamanho_lote = tamanho_lote
+        self.janela = janela
+        self.entregues = 0
+        self.ultimo_id = None
+        self.ultimo_erro = None
+        self.ultima_entrega = None
+        self._sinal = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    @abstractmethod
+    def entregar(self, eventos: List[Dict]):
+        """Entrega o lote; levanta exceção se não conseguir"""
+
+    def fechar(self):
+        """Libera recursos do destino ao parar"""
+
+    # --- Execução ---
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # O cursor de um sink novo é criado já aqui, para não perder eventos
+        # gravados enquanto a thread ainda está começando
+        if self.ultimo_id is None:
+            from src import database
+            try:
+                self.ultimo_id = database.obter_cursor_feed(self.nome)
+            except Exception as e:
+                print(f"[Feed] Cursor do sink {self.nome} indisponível: {e}")
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name=f"Feed-{self.nome}", daemon=True)
+        self._thread.start()
+
+    def parar(self, timeout: float = 5.0):
+        self._parar.set()
+        self._sinal.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.fechar()
+
+    def notificar(self):
+        self._sinal.set()
+
+    def _executar(self):
+        from src import database
+
+        espera_erro = 1.0
+        while not self._parar.is_set():
+            try:
+                if self.ultimo_id is None:
+                    self.ultimo_id = database.obter_cursor_feed(self.nome)
+
+                eventos = database.listar_feed(self.ultimo_id, self.tamanho_lote)
+                if not eventos:
+                    self._sinal.wait(INTERVALO_VERIFICACAO)
+                    self._sinal.clear()
+                    # Agrupa o que chegar logo em seguida em um só lote
+                    if self.janela:
+                        self._parar.wait(self.janela)
+                    continue
+
+                self.entregar(eventos)
+                self.ultimo_id = eventos[-1]['id']
+                database.salvar_cursor_feed(self.nome, self.ultimo_id)
+                self.entregues += len(eventos)
+                self.ultima_entrega = datetime.now().isoformat(timespec='seconds')
+                self.ultimo_erro = None
+                espera_erro = 1.0
+            except Exception as e:
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                print(f"[Feed] Erro no sink {self.nome}: {self.ultimo_erro}. "
+                      f"Nova tentativa em {espera_erro:.0f}s")
+                self._parar.wait(espera_erro)
+                espera_erro = min(espera_erro * 2, ESPERA_MAXIMA_ERRO)
+
+    def status(self, ultimo_id_outbox: int = None) -> Dict:
+        situacao = {
+            'nome': self.nome,
+            'tipo': self.tipo,
+            'ativo': self._thread is not None and self._thread.is_alive(),
+            'cursor': self.ultimo_id,
+            'entregues': self.entregues,
+            'ultima_entrega': self.ultima_entrega,
+            'ultimo_erro': self.ultimo_erro,
+        }
+        if ultimo_id_outbox is not None and self.ultimo_id is not None:
+            situacao['atraso_eventos'] = max(ultimo_id_outbox - self.ultimo_id, 0)
+        return situacao
+
+
+class SinkArquivo(Sink):
+    """Eventos anexados a arquivos JSONL ou CSV; um arquivo novo a cada tamanho_maximo bytes"""
+
+    tipo = 'arquivo'
+    COLUNAS_CSV = ['id', 'criado_em', 'tipo', 'numero_manifesto', 'chave', 'payload']
+
+    def __init__(self, nome: str, pasta: str = "data/feed", formato: str = 'jsonl',
+                 tamanho_maximo: int = 10 * 1024 * 1024, **kwargs):
+        super().__init__(nome, **kwargs)
+        if formato not in ('jsonl', 'csv'):
+            raise ValueError(f"Formato de arquivo inválido: {formato}")
+        self.pasta = Path(pasta)
+        self.formato = formato
+        self.tamanho_maximo = tamanho_maximo
+        self._arquivo_atual = None
+
+    def _arquivo(self) -> Path:
+        if self._arquivo_atual is None or self._arquivo_atual.stat().st_size >= self.tamanho_maximo:
+            self.pasta.mkdir(parents=True, exist_ok=True)
+            carimbo = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+            self._arquivo_atual = self.pasta / f"{self.nome}_{carimbo}.{self.formato}"
+            if self.formato == 'csv':
+                with open(self._arquivo_atual, 'w', newline='', encoding='utf-8-sig') as f:
+                    csv.writer(f, delimiter=';').writerow(self.COLUNAS_CSV)
+            else:
+                self._arquivo_atual.touch()
+        return self._arquivo_atual
+
+    def entregar(self, eventos: List[Dict]):
+        caminho = self._arquivo()
+        if self.formato == 'csv':
+            with open(caminho, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=';')
+                for evento in eventos:
+                    writer.writerow([evento['id'], evento['criado_em'], evento['tipo'],
+                                     evento['numero_manifesto'], evento['chave'],
+                                     json.dumps(evento['payload'], ensure_ascii=False, default=str)])
+        else:
+            with open(caminho, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(evento, ensure_ascii=False, default=str) + '\n' for evento in eventos)
+
+
+class SinkReplicaSQLite(Sink):
+    """
+    Cópia SQLite com o estado atual (manifestos e volumes) para consulta por
+    outros programas sem tocar no banco principal. Manifestos apagados ou
+    movidos para o arquivo histórico saem da réplica. Aplicar o mesmo lote
+    duas vezes dá o mesmo resultado.
+    """
+
+    tipo = 'replica'
+    CAMPOS_VOLUME = ['remetente', 'destinatario', 'quantidade_expedida', 'quantidade_recebida',
+                     'status', 'data_hora_ultima_recepcao', 'usuario_recepcao']
+
+    def __init__(self, nome: str, caminho: str = "data/replica.db", **kwargs):
+        super().__init__(nome, **kwargs)
+        self.caminho = Path(caminho)
+        self._conn = None
+
+    def _conexao(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.caminho), isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS manifestos (
+                    numero_manifesto TEXT PRIMARY KEY,
+                    data_manifesto TEXT,
+                    terminal_origem TEXT,
+                    terminal_destino TEXT,
+                    status TEXT,
+                    atualizado_em DATETIME
+                )
+            """)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS volumes (
+                    numero_manifesto TEXT NOT NULL,
+                    numero_volume TEXT NOT NULL,
+                    {', '.join(f'{campo} TEXT' for campo in self.CAMPOS_VOLUME)},
+                    atualizado_em DATETIME,
+                    PRIMARY KEY (numero_manifesto, numero_volume)
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _gravar_volume(self, cursor, numero_manifesto: str, volume: Dict, agora: str):
+        campos = ['numero_manifesto', 'numero_volume'] + self.CAMPOS_VOLUME + ['atualizado_em']
+        valores = [numero_manifesto, volume.get('numero_volume')]
+        valores += [volume.get(campo) for campo in self.CAMPOS_VOLUME] + [agora]
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO volumes ({', '.join(campos)})
+            VALUES ({', '.join('?' * len(campos))})
+        """, valores)
+
+    def entregar(self, eventos: List[Dict]):
+        from src import database
+
+        conn = self._conexao()
+        cursor = conn.cursor()
+        agora = datetime.now().isoformat()
+        cursor.execute("BEGIN")
+        try:
+            for evento in eventos:
+                numero, payload = evento['numero_manifesto'], evento['payload']
+                if evento['tipo'] == 'manifesto':
+                    cursor.execute("""
+                        INSERT INTO manifestos (numero_manifesto, data_manifesto, terminal_origem,
+                                                terminal_destino, status, atualizado_em)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(numero_manifesto) DO UPDATE SET
+                            data_manifesto = excluded.data_manifesto,
+                            terminal_origem = excluded.terminal_origem,
+                            terminal_destino = excluded.terminal_destino,
+                            atualizado_em = excluded.atualizado_em
+                    """, (numero, payload.get('data_manifesto'), payload.get('terminal_origem'),
+                          payload.get('terminal_destino'), payload.get('status', 'NÃO RECEBIDO'), agora))
+                elif evento['tipo'] == 'volume':
+                    self._gravar_volume(cursor, numero, payload, agora)
+                elif evento['tipo'] == 'cabecalho':
+                    cursor.execute("""
+                        UPDATE manifestos SET status = ?, atualizado_em = ? WHERE numero_manifesto = ?
+                    """, (payload.get('status'), agora, numero))
+                elif evento['tipo'] in ('exclusao', 'arquivamento'):
+                    # A réplica espelha o banco principal, de onde o manifesto saiu
+                    cursor.execute("DELETE FROM volumes WHERE numero_manifesto = ?", (numero,))
+                    cursor.execute("DELETE FROM manifestos WHERE numero_manifesto = ?", (numero,))
+                elif evento['tipo'] == 'snapshot':
+                    # Estado completo do manifesto, lido do banco no momento da entrega
+                    dados = database.obter_snapshot_manifesto(numero)
+                    cursor.execute("DELETE FROM volumes WHERE numero_manifesto = ?", (numero,))
+                    if dados is None:
+                        cursor.execute("DELETE FROM manifestos WHERE numero_manifesto = ?", (numero,))
+                        continue
+                    cursor.execute("""
+                        UPDATE manifestos SET status = ?, atualizado_em = ? WHERE numero_manifesto = ?
+                    """, (dados['status'], agora, numero))
+                    for volume in dados['volumes']:
+                        self._gravar_volume(cursor, numero, volume, agora)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+    def fechar(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class SinkWebhook(Sink):
+    """POST de {"eventos": [...]} em JSON; qualquer resposta fora de 2xx repete o lote"""
+
+    tipo = 'webhook'
+
+    def __init__(self, nome: str, url: str, timeout: float = 10.0, cabecalhos: Dict = None, **kwargs):
+        kwargs.setdefault('tamanho_lote', 200)
+        super().__init__(nome, **kwargs)
+        self.url = url
+        self.timeout = timeout
+        self.cabecalhos = dict(cabecalhos or {})
+
+    def entregar(self, eventos: List[Dict]):
+        corpo = json.dumps({'eventos': eventos}, ensure_ascii=False, default=str).encode('utf-8')
+        cabecalhos = {'Content-Type': 'application/json; charset=utf-8', **self.cabecalhos}
+        requisicao = urllib.request.Request(self.url, data=corpo, headers=cabecalhos, method='POST')
+        with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+            if not 200 <= resposta.status < 300:
+                raise RuntimeError(f"HTTP {resposta.status}")
+
+
+# Tipos aceitos na configuração
+TIPOS_SINK = {
+    'jsonl': lambda nome, **p: SinkArquivo(nome, formato='jsonl', **p),
+    'csv': lambda nome, **p: SinkArquivo(nome, formato='csv', **p),
+    'replica': SinkReplicaSQLite,
+    'webhook': SinkWebhook,
+}
+
+# ================= REGISTRO DE SINKS =================
+
+_sinks: Dict[str, Sink] = {}
+_lock = threading.Lock()
+
+
+def ativo() -> bool:
+    """Há algum sink registrado (o outbox precisa ser gravado)"""
+    return bool(_sinks)
+
+
+def registrar_sink(sink: Sink, iniciar: bool = True) -> Sink:
+    """Adiciona (ou substitui, pelo nome) um sink e inicia sua thread"""
+    with _lock:
+        anterior = _sinks.get(sink.nome)
+        _sinks[sink.nome] = sink
+    if anterior is not None:
+        anterior.parar()
+    if iniciar:
+        sink.iniciar()
+    return sink
+
+
+def remover_sink(nome: str, esquecer_cursor: bool = False):
+    """Para o sink. Com esquecer_cursor, o outbox deixa de reter eventos para ele."""
+    with _lock:
+        sink = _sinks.pop(nome, None)
+    if sink is not None:
+        sink.parar()
+    if esquecer_cursor:
+        from src import database
+        database.remover_cursor_feed(nome)
+
+
+def notificar():
+    """Chamado após gravar no outbox: acorda os sinks (não-bloqueante)"""
+    for sink in list(_sinks.values()):
+        sink.notificar()
+
+
+def criar_sink(configuracao: Dict) -> Sink:
+    parametros = dict(configuracao)
+    tipo = parametros.pop('tipo')
+    nome = parametros.pop('nome', tipo)
+    if tipo not in TIPOS_SINK:
+        raise ValueError(f"Tipo de sink desconhecido: {tipo}")
+    return TIPOS_SINK[tipo](nome, **parametros)
+
+
+def iniciar_configurados() -> int:
+    """Cria e inicia os sinks da configuração 'feed_sinks'. Retorna quantos foram iniciados."""
+    from src import database
+    try:
+        configuracoes = json.loads(database.obter_configuracao(CHAVE_CONFIGURACAO) or '[]')
+    except (ValueError, TypeError) as e:
+        print(f"[Feed] Configuração '{CHAVE_CONFIGURACAO}' inválida: {e}")
+        return 0
+
+    iniciados = 0
+    for configuracao in configuracoes:
+        try:
+            registrar_sink(criar_sink(configuracao))
+            iniciados += 1
+        except Exception as e:
+            print(f"[Feed] Sink {configuracao!r} não iniciado: {e}")
+    return iniciados
+
+
+def salvar_configuracao(configuracoes: List[Dict]):
+    """Grava a lista de sinks (aplicada no próximo iniciar_configurados)"""
+    from src import database
+    for configuracao in configuracoes:
+        if configuracao.get('tipo') not in TIPOS_SINK:
+            raise ValueError(f"Tipo de sink desconhecido: {configuracao.get('tipo')}")
+    database.salvar_configuracao(CHAVE_CONFIGURACAO, json.dumps(configuracoes, ensure_ascii=False))
+
+
+def parar():
+    """Para todos os sinks (ao fechar o programa); os cursores ficam salvos"""
+    with _lock:
+        sinks = list(_sinks.values())
+        _sinks.clear()
+    for sink in sinks:
+        sink.parar()
+
+
+def status_sinks() -> List[Dict]:
+    from src import database
+    try:
+        ultimo = database.ultimo_id_outbox()
+    except Exception:
+        ultimo = None
+    return [sink.status(ultimo) for sink in list(_sinks.values())]
@@ -0,0 +1,320 @@
+"""
+Sistema de Conferência de Manifestos - Ingestão Automática de PDFs
+Arquivo: src/ingestao.py
+
+Observa uma pasta compartilhada e importa automaticamente cada manifesto PDF
+novo ou alterado. No Linux usa inotify (via ctypes); nos demais sistemas faz
+varredura periódica. Um arquivo só é processado depois de ficar estável
+(tamanho e data inalterados) pelo tempo de debounce, para não ler PDFs que
+ainda estão sendo copiados.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.database import importar_manifesto
+from src.pdf_extractor import extrair_manifesto_pdf
+
+# ================= CONFIGURAÇÃO =================
+PASTA_ENTRADA = Path("data/entrada")
+DEBOUNCE_SEGUNDOS = 2.0       # Tempo sem alterações para considerar a cópia concluída
+INTERVALO_POLLING = 1.0       # Intervalo de varredura quando não há inotify
+MAX_CONCORRENCIA = 2          # Extrações simultâneas
+
+# Estados de um arquivo na fila de ingestão
+AGUARDANDO = 'AGUARDANDO'     # Detectado, esperando a cópia terminar
+PROCESSANDO = 'PROCESSANDO'   # Em extração/registro
+IMPORTADO = 'IMPORTADO'
+DUPLICADO = 'DUPLICADO'       # Manifesto já cadastrado
+ERRO = 'ERRO'
+
+
+class ItemIngestao:
+    """Situação de um PDF na fila de ingestão"""
+
+    def __init__(self, arquivo: Path):
+        self.arquivo = arquivo
+        self.estado = AGUARDANDO
+        self.mensagem = ""
+        self.numero_manifesto = None
+        self.total_volumes = 0
+        self.atualizado_em = datetime.now()
+
+    def atualizar(self, estado: str, mensagem: str = ""):
+        self.estado = estado
+        self.mensagem = mensagem
+        self.atualizado_em = datetime.now()
+
+
+# ================= OBSERVADORES =================
+
+class _ObservadorPolling:
+    """Detecta alterações varrendo a pasta periodicamente"""
+
+    def __init__(self, pasta: Path, intervalo: float = INTERVALO_POLLING):
+        self.pasta = pasta
+        self.intervalo = intervalo
+
+    def aguardar(self, timeout: float) -> Optional[List[Path]]:
+        """Retorna None, indicando que todos os PDFs devem ser verificados"""
+        time.sleep(min(timeout, self.intervalo))
+        return None
+
+    def fechar(self):
+        pass
+
+
+class _ObservadorInotify:
+    """Recebe eventos de criação/escrita/renomeação da pasta via inotify"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _EVENTO = struct.Struct('iIII')
+
+    def __init__(self, pasta: Path):
+        self.pasta = pasta
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+        mascara = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(str(pasta)), mascara) < 0:
+            erro = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(erro, f"inotify_add_watch falhou para {pasta}")
+
+    def aguardar(self, timeout: float) -> Optional[List[Path]]:
+        """Retorna os arquivos que tiveram eventos (lista vazia se nenhum)"""
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return []
+
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        arquivos = []
+        posicao = 0
+        while posicao + self._EVENTO.size <= len(dados):
+            _, _, _, tamanho = self._EVENTO.unpack_from(dados, posicao)
+            posicao += self._EVENTO.size
+            nome = dados[posicao:posicao + tamanho].rstrip(b'\0')
+            posicao += tamanho
+            if nome:
+                arquivos.append(self.pasta / os.fsdecode(nome))
+        return arquivos
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+def _criar_observador(pasta: Path):
+    """inotify no Linux; varredura periódica como alternativa"""
+    if sys.platform.startswith('linux'):
+        try:
+            return _ObservadorInotify(pasta)
+        except (OSError, AttributeError) as e:
+            print(f"[Ingestão] inotify indisponível ({e}). Usando varredura periódica.")
+    return _ObservadorPolling(pasta)
+
+
+# ================= PROCESSAMENTO =================
+
+def _extrair_para_ingestao(pdf_path: str) -> Tuple[Dict, List[Dict], List[str]]:
+    """Executado em um processo separado para não disputar a GIL com a interface"""
+    return extrair_manifesto_pdf(pdf_path)
+
+
+def registrar_manifesto_extraido(dados_manifesto: Dict, volumes: List[Dict], pdf_path: str) -> int:
+    """
+    Registra no banco um manifesto extraído, com os mesmos campos usados pelo
+    diálogo de novo manifesto, em uma única transação: se algum volume falhar,
+    nada fica gravado e o PDF corrigido pode ser importado de novo.
+    Retorna o id do manifesto.
+    """
+    dados = {
+        'numero': dados_manifesto['numero_manifesto'],
+        'data': datetime.now().strftime("%d/%m/%Y"),  # Data de inclusão no sistema
+        'origem': '',
+        'destino': dados_manifesto['terminal_destino'],
+        'pdf_path': pdf_path,
+    }
+    log = ("IMPORTAÇÃO AUTOMÁTICA", f"Importado da pasta de entrada: {Path(pdf_path).name}")
+    return importar_manifesto(dados, volumes, [log])
+
+
+class ServicoIngestao:
+    """
+    Serviço em segundo plano que importa os PDFs que chegam na pasta de entrada.
+    A extração roda em até MAX_CONCORRENCIA processos; o registro no banco
+    grava o manifesto e todos os volumes em uma única transação.
+    """
+
+    def __init__(self, pasta: Path = PASTA_ENTRADA, max_concorrencia: int = MAX_CONCORRENCIA,
+                 debounce: float = DEBOUNCE_SEGUNDOS):
+        self.pasta = Path(pasta)
+        self.max_concorrencia = max_concorrencia
+        self.debounce = debounce
+
+        self._lock = threading.Lock()
+        self._itens: Dict[Path, ItemIngestao] = {}
+        # arquivo -> (tamanho, mtime, instante da última alteração observada)
+        self._observados: Dict[Path, Tuple[int, float, float]] = {}
+        # arquivo -> (tamanho, mtime) da versão já processada
+        self._processados: Dict[Path, Tuple[int, float]] = {}
+        self._versao = 0  # Incrementada a cada manifesto importado
+
+        self._executor = None
+        self._thread = None
+        self._parar = threading.Event()
+
+    # --- Ciclo de vida ---
+
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self.pasta.mkdir(parents=True, exist_ok=True)
+        self._parar.clear()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_concorrencia)
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Status ---
+
+    def status_fila(self) -> Dict:
+        """Contagem por estado e lista dos itens, para exibição na janela principal"""
+        with self._lock:
+            itens = sorted(self._itens.values(), key=lambda i: i.atualizado_em, reverse=True)
+            contagem = {estado: 0 for estado in (AGUARDANDO, PROCESSANDO, IMPORTADO, DUPLICADO, ERRO)}
+            for item in itens:
+                contagem[item.estado] += 1
+            return {
+                'pasta': str(self.pasta),
+                'contagem': contagem,
+                'itens': list(itens),
+                'versao': self._versao,
+            }
+
+    # --- Laço principal ---
+
+    def _loop(self):
+        print(f"[Ingestão] Observando {self.pasta}")
+        observador = _criar_observador(self.pasta)
+        try:
+            self._verificar(self._listar_pdfs())  # PDFs que chegaram com o sistema fechado
+            while not self._parar.is_set():
+                alterados = observador.aguardar(timeout=0.5)
+                if alterados is None:
+                    alterados = self._listar_pdfs()
+                # Arquivos em debounce precisam ser reavaliados mesmo sem novos eventos
+                with self._lock:
+                    alterados = set(alterados) | set(self._observados)
+                self._verificar(alterados)
+        except Exception as e:
+            print(f"[Ingestão] Erro no observador: {e}")
+        finally:
+            observador.fechar()
+
+    def _listar_pdfs(self) -> List[Path]:
+        try:
+            return [p for p in self.pasta.iterdir() if p.suffix.lower() == '.pdf']
+        except OSError:
+            return []
+
+    def _verificar(self, arquivos):
+        agora = time.monotonic()
+        for arquivo in arquivos:
+            if arquivo.suffix.lower() != '.pdf':
+                continue
+            try:
+                info = arquivo.stat()
+            except OSError:
+                with self._lock:
+                    self._observados.pop(arquivo, None)
+                continue
+
+            assinatura = (info.st_size, info.st_mtime)
+            with self._lock:
+                if self._processados.get(arquivo) == assinatura:
+                    continue
+
+                anterior = self._observados.get(arquivo)
+                if anterior is None or anterior[:2] != assinatura:
+                    # Novo ou ainda sendo escrito: reinicia o debounce
+                    self._observados[arquivo] = (*assinatura, agora)
+                    item = self._itens.get(arquivo)
+                    if item is None or item.estado != PROCESSANDO:
+                        self._itens[arquivo] = ItemIngestao(arquivo)
+                    continue
+
+                if agora - anterior[2] < self.debounce or info.st_size == 0:
+                    continue
+
+                del self._observados[arquivo]
+                self._processados[arquivo] = assinatura
+                self._itens[arquivo].atualizar(PROCESSANDO)
+
+            futuro = self._executor.submit(_extrair_para_ingestao, str(arquivo))
+            futuro.add_done_callback(lambda f, a=arquivo: self._concluir(a, f))
+
+    def _concluir(self, arquivo: Path, futuro):
+        # Chamado na thread do executor, enquanto o laço e a interface usam _itens
+        with self._lock:
+            item = self._itens[arquivo]
+        try:
+            dados_manifesto, volumes, erros = futuro.result()
+        except Exception as e:
+            with self._lock:
+                item.atualizar(ERRO, f"Falha na extração: {e}")
+            return
+
+        # Mesmas regras de ManifestoExtractor.validar_dados: qualquer aviso bloqueia
+        if erros:
+            with self._lock:
+                item.atualizar(ERRO, "; ".join(erros))
+            print(f"[Ingestão] {arquivo.name} rejeitado: {'; '.join(erros)}")
+            return
+
+        try:
+            registrar_manifesto_extraido(dados_manifesto, volumes, str(arquivo))
+        except ValueError as e:
+            # Manifesto já cadastrado (UNIQUE numero_manifesto)
+            with self._lock:
+                item.atualizar(DUPLICADO, str(e))
+            return
+        except Exception as e:
+            with self._lock:
+                item.atualizar(ERRO, f"Falha ao registrar: {e}")
+            return
+
+        with self._lock:
+            item.numero_manifesto = dados_manifesto['numero_manifesto']
+            item.total_volumes = len(volumes)
+            item.atualizar(IMPORTADO, f"{len(volumes)} volume(s)")
+            self._versao += 1
+        print(f"[Ingestão] Manifesto {item.numero_manifesto} importado ({len(volumes)} volumes)")
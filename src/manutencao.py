@@ -0,0 +1,210 @@
+"""
+Sistema de Conferência de Manifestos - Manutenção do Banco de Dados
+Arquivo: src/manutencao.py
+
+Roda em segundo plano as tarefas que mantêm o SQLite pequeno e rápido:
+PRAGMA optimize (estatísticas do planejador), checkpoint do WAL quando ele
+passa do limite, vacuum incremental quando sobra espaço livre (depois de
+exclusões e arquivamentos), verificação de integridade e limpeza do outbox
+(enviados antigos removidos, pendentes antigos expirados). O backup diário
+(src/backup.py) também é agendado por aqui.
+
+As tarefas só rodam com o banco ocioso: nenhuma janela de conferência aberta
+e nenhuma gravação recente (data de modificação do banco e do WAL). Cada execução fica
+registrada em manutencao_execucoes com a duração e o espaço recuperado.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src import backup, database
+
+# ================= CONFIGURAÇÃO =================
+INTERVALO_VERIFICACAO = 60.0          # Segundos entre verificações
+OCIOSIDADE_MINIMA = 120.0             # Segundos sem gravações no banco
+LIMITE_WAL = 16 * 1024 * 1024         # Checkpoint(TRUNCATE) acima disto
+LIMITE_ESPACO_LIVRE = 4 * 1024 * 1024 # Vacuum incremental acima disto
+DIAS_OUTBOX = 7                       # Eventos enviados mantidos no outbox
+DIAS_PENDENTE = 30                    # Eventos não enviados que passam disto vão para FALHA
+MAX_PENDENTES = 100000                # Teto de eventos pendentes (os mais antigos vão para FALHA)
+
+# Tarefas periódicas e o intervalo mínimo entre execuções
+PERIODICAS = {
+    'otimizar': timedelta(days=1),
+    'integridade': timedelta(days=1),
+    'integridade_completa': timedelta(days=7),
+    'limpar_outbox': timedelta(days=1),
+    'backup': timedelta(days=1),
+}
+
+# Manifestos com janela de conferência aberta
+_conferencias_ativas = set()
+_lock_conferencias = threading.Lock()
+
+
+def conferencia_aberta(manifesto_id: int):
+    with _lock_conferencias:
+        _conferencias_ativas.add(manifesto_id)
+
+
+def conferencia_fechada(manifesto_id: int):
+    with _lock_conferencias:
+        _conferencias_ativas.discard(manifesto_id)
+
+
+def conferencia_em_andamento() -> bool:
+    with _lock_conferencias:
+        return bool(_conferencias_ativas)
+
+
+def _segundos_desde_ultima_gravacao() -> float:
+    # O WAL recebe as gravações; quando a última conexão fecha, ele é copiado
+    # para o banco e apagado, então vale a modificação mais recente dos dois
+    caminhos = (database.DB_PATH, database.DB_PATH.with_name(database.DB_PATH.name + '-wal'))
+    modificado = 0.0
+    for caminho in caminhos:
+        try:
+            modificado = max(modificado, caminho.stat().st_mtime)
+        except FileNotFoundError:
+            pass
+    return time.time() - modificado
+
+
+def motivo_para_adiar() -> Optional[str]:
+    """Por que a manutenção não pode rodar agora (None se pode)"""
+    if conferencia_em_andamento():
+        return "conferência em andamento"
+    ocioso = _segundos_desde_ultima_gravacao()
+    if ocioso < OCIOSIDADE_MINIMA:
+        return f"banco em uso (última gravação há {int(ocioso)} s)"
+    return None
+
+
+class ServicoManutencao:
+    """Verifica periodicamente o que está vencido e executa com o banco ocioso"""
+
+    def __init__(self, intervalo: float = INTERVALO_VERIFICACAO):
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+        self._lock = threading.Lock()  # Uma rodada por vez (agendada ou manual)
+        self._thread = None
+        self.executando = None
+        self.adiada = None
+        self.ultima_verificacao = None
+
+    def iniciar(self):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def status(self) -> Dict:
+        return {
+            'executando': self.executando,
+            'adiada': self.adiada,
+            'ultima_verificacao': self.ultima_verificacao,
+        }
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.executar_pendentes()
+            except Exception as e:
+                print(f"[Manutenção] Erro: {e}")
+
+    def tarefas_pendentes(self, forcar: bool = False) -> List[str]:
+        """Tarefas vencidas (ou todas, com forcar), na ordem de execução"""
+        ultimas = database.ultimas_manutencoes()
+        agora = datetime.now()
+        pendentes = []
+        # A verificação completa também conta como a rápida
+        if 'integridade_completa' in ultimas:
+            completa = ultimas['integridade_completa']
+            if 'integridade' not in ultimas or completa['inicio'] > ultimas['integridade']['inicio']:
+                ultimas['integridade'] = completa
+        for tarefa, intervalo in PERIODICAS.items():
+            ultima = ultimas.get(tarefa)
+            if forcar or not ultima or datetime.fromisoformat(ultima['inicio']) + intervalo <= agora:
+                pendentes.append(tarefa)
+        if 'integridade_completa' in pendentes and 'integridade' in pendentes:
+            pendentes.remove('integridade')
+
+        estado = database.estado_armazenamento()
+        if forcar or estado['espaco_livre'] >= LIMITE_ESPACO_LIVRE or estado['auto_vacuum'] != 2:
+            pendentes.append('vacuum')
+        # Por último: o checkpoint também leva as gravações das tarefas anteriores
+        # (em WAL, o arquivo do banco só diminui depois do checkpoint do vacuum)
+        if forcar or 'vacuum' in pendentes or estado['tamanho_wal'] >= LIMITE_WAL:
+            pendentes.append('checkpoint')
+        return pendentes
+
+    def executar_pendentes(self, forcar: bool = False) -> List[Dict]:
+        """
+        Executa as tarefas vencidas se o banco estiver ocioso. Com forcar,
+        executa todas sem esperar a ociosidade, mas nunca durante uma conferência.
+        """
+        if not self._lock.acquire(blocking=False):
+            return []
+        try:
+            self.ultima_verificacao = datetime.now()
+            if forcar:
+                motivo = "conferência em andamento" if conferencia_em_andamento() else None
+            else:
+                motivo = motivo_para_adiar()
+            self.adiada = motivo
+            if motivo:
+                return []
+
+            execucoes = []
+            for tarefa in self.tarefas_pendentes(forcar):
+                # Uma conferência pode ter começado no meio da rodada
+                if conferencia_em_andamento():
+                    self.adiada = "conferência em andamento"
+                    break
+                execucoes.append(self._executar(tarefa))
+            return execucoes
+        finally:
+            self.executando = None
+            self._lock.release()
+
+    def _executar(self, tarefa: str) -> Dict:
+        self.executando = tarefa
+        antes = database.estado_armazenamento()
+        inicio = datetime.now()
+        t0 = time.perf_counter()
+        try:
+            resultado = _TAREFAS[tarefa]()
+        except Exception as e:
+            resultado = f"ERRO: {e}"
+        duracao = time.perf_counter() - t0
+        depois = database.estado_armazenamento()
+        recuperados = max(0, (antes['tamanho_banco'] + antes['tamanho_wal'])
+                          - (depois['tamanho_banco'] + depois['tamanho_wal']))
+
+        database.registrar_manutencao(tarefa, inicio.isoformat(), duracao, recuperados, resultado)
+        if tarefa.startswith('integridade') and resultado != 'ok':
+            print(f"[Manutenção] ATENÇÃO - integridade do banco: {resultado}")
+        print(f"[Manutenção] {tarefa}: {resultado} ({duracao:.2f} s, {recuperados // 1024} KB recuperados)")
+        return {'tarefa': tarefa, 'duracao': duracao, 'bytes_recuperados': recuperados,
+                'resultado': resultado}
+
+
+def _limpar_outbox() -> str:
+    removidos = database.limpar_outbox_enviado(DIAS_OUTBOX)
+    expirados = database.expirar_outbox_pendente(DIAS_PENDENTE, MAX_PENDENTES)
+    return f"{removidos} evento(s) removido(s), {expirados} expirado(s)"
+
+
+_TAREFAS = {
+    'otimizar': database.otimizar_banco,
+    'integridade': database.verificar_integridade,
+    'integridade_completa': lambda: database.verificar_integridade(completa=True),
+    'limpar_outbox': _limpar_outbox,
+    'backup': lambda: backup.criar_backup().name,
+    'vacuum': database.vacuum_incremental,
+    'checkpoint': database.checkpoint_wal,
+}
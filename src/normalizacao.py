@@ -0,0 +1,200 @@
+"""
+Sistema de Conferência de Manifestos - Normalização de Remetentes e Destinatários
+Arquivo: src/normalizacao.py
+
+As regras ficam no banco (tabelas regras_remetente e destinos_aceitos) e são
+compiladas em uma única expressão regular. O motor compilado é reaproveitado
+até que as regras sejam alteradas (controle por versão no banco).
+"""
+
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Regras padrão, na ordem de prioridade (a primeira palavra-chave encontrada vence)
+REGRAS_REMETENTE_PADRAO = [
+    ('CABW', 'CABW'),
+    ('CABE', 'CABE'),
+    ('BACO', 'BACO'),  # Captura BACO/ESUP, SUP BACO, BACOESUP, etc
+    ('BACG', 'BACG'),
+    ('GAC-PAC', 'GAC-PAC'),
+    ('GACPAC', 'GAC-PAC'),
+    ('BAGL', 'BAGL'),
+    ('CTLA', 'CTLA'),
+    ('CLTA', 'CTLA'),  # Correção comum
+    ('BAAN', 'BAAN'),
+    ('BASP', 'BASP'),
+    ('BANT', 'BANT'),
+]
+
+# Site '*' vale para qualquer terminal sem configuração própria
+SITE_PADRAO = '*'
+
+# (site, destino canônico, termos que precisam aparecer no texto)
+# PAMALS aceita: PAMALS, PAMA-LS, PAMA LS, LS PAMA-LS, etc
+DESTINOS_ACEITOS_PADRAO = [
+    (SITE_PADRAO, 'PAMALS', 'PAMA,LS'),
+]
+
+# Limite de entradas memorizadas por motor
+TAMANHO_MAXIMO_CACHE = 10000
+VALIDADE_VERSAO = 30.0   # Segundos sem reler a versão das regras no banco
+
+
+class MotorNormalizacao:
+    """Regras de remetente e destinos aceitos, compiladas para uso no laço de extração"""
+
+    def __init__(self, regras: List[Tuple[str, str]], destinos: List[Tuple[str, str, str]]):
+        """
+        regras: (palavra_chave, padrao) em ordem de prioridade
+        destinos: (site, padrao, termos separados por vírgula)
+        """
+        prioridades: Dict[str, Tuple[int, str]] = {}
+        for ordem, (palavra, padrao) in enumerate(regras):
+            palavra = palavra.upper().strip()
+            if palavra and palavra not in prioridades:
+                prioridades[palavra] = (ordem, padrao)
+
+        # Se uma palavra-chave contém outra, qualquer ocorrência dela também contém
+        # a menor; a regra efetiva é a de maior prioridade entre as duas. Assim a
+        # correspondência mais longa em cada posição preserva a ordem das regras.
+        self._regra_efetiva = {
+            palavra: min(regra for outra, regra in prioridades.items() if outra in palavra)
+            for palavra in prioridades
+        }
+
+        if prioridades:
+            alternativas = sorted(prioridades, key=len, reverse=True)
+            # Lookahead permite encontrar ocorrências sobrepostas em uma única passada
+            self._regex = re.compile('(?=(%s))' % '|'.join(re.escape(p) for p in alternativas))
+        else:
+            self._regex = None
+
+        self._destinos: Dict[str, List[Tuple[str, List[str]]]] = {}
+        for site, padrao, termos in destinos:
+            lista_termos = [t.strip().upper() for t in termos.split(',') if t.strip()]
+            self._destinos.setdefault(site, []).append((padrao.upper(), lista_termos))
+
+        self._cache_remetentes: Dict[str, str] = {}
+        self._cache_destinos: Dict[Tuple[str, str], Optional[str]] = {}
+
+    # --- Remetentes ---
+
+    def remetente(self, texto: str) -> str:
+        """Retorna o identificador canônico do remetente"""
+        rem = texto.upper().strip()
+        resultado = self._cache_remetentes.get(rem)
+        if resultado is not None:
+            return resultado
+
+        melhor = None
+        if self._regex is not None:
+            for match in self._regex.finditer(rem):
+                regra = self._regra_efetiva[match.group(1)]
+                if melhor is None or regra < melhor:
+                    melhor = regra
+
+        if melhor is not None:
+            resultado = melhor[1]
+        else:
+            # Se não encontrou nenhuma regra, retorna o primeiro termo válido
+            partes = rem.split()
+            resultado = partes[0] if partes else rem
+
+        if len(self._cache_remetentes) >= TAMANHO_MAXIMO_CACHE:
+            self._cache_remetentes.clear()
+        self._cache_remetentes[rem] = resultado
+        return resultado
+
+    # --- Destinatários ---
+
+    def _destinos_do_site(self, site: Optional[str]) -> List[Tuple[str, List[str]]]:
+        if site and site in self._destinos:
+            return self._destinos[site]
+        return self._destinos.get(SITE_PADRAO, [])
+
+    def destino_canonico(self, texto: str, site: Optional[str] = None) -> Optional[str]:
+        """Retorna o destino canônico se o texto corresponder a um destino aceito no site"""
+        if not texto:
+            return None
+
+        dest = texto.upper().strip()
+        chave = (dest, site or SITE_PADRAO)
+        if chave in self._cache_destinos:
+            return self._cache_destinos[chave]
+
+        resultado = None
+        for padrao, termos in self._destinos_do_site(site):
+            if padrao in dest or (termos and all(t in dest for t in termos)):
+                resultado = padrao
+                break
+
+        if len(self._cache_destinos) >= TAMANHO_MAXIMO_CACHE:
+            self._cache_destinos.clear()
+        self._cache_destinos[chave] = resultado
+        return resultado
+
+    def destinatario(self, texto: str, site: Optional[str] = None) -> str:
+        """Padroniza o destinatário (canônico se aceito, senão o próprio texto)"""
+        return self.destino_canonico(texto, site) or texto.upper().strip()
+
+    def destinos_aceitos(self, site: Optional[str] = None) -> List[str]:
+        return [padrao for padrao, _ in self._destinos_do_site(site)]
+
+
+# ================= MOTOR COMPARTILHADO =================
+
+_motor_padrao = MotorNormalizacao(REGRAS_REMETENTE_PADRAO, DESTINOS_ACEITOS_PADRAO)
+_motor_atual = None
+_versao_motor = None
+_versao_valida_ate = 0.0   # time.monotonic() até quando a versão lida vale
+_geracao = 0               # Incrementada por invalidar_motor
+_geracao_lida = 0
+_lock = threading.Lock()
+
+
+def invalidar_motor():
+    """Regras alteradas neste processo: a próxima chamada de obter_motor relê a versão"""
+    global _geracao
+    with _lock:
+        _geracao += 1
+
+
+def obter_motor() -> MotorNormalizacao:
+    """
+    Retorna o motor compilado a partir das regras do banco.
+    Só recompila quando a versão das regras muda; sem banco, usa as regras padrão.
+    A versão é relida a cada VALIDADE_VERSAO segundos (alterações de outros
+    processos) ou logo após invalidar_motor (alterações deste), e não a cada
+    chamada: a busca de volumes chama isto a cada leitura.
+    """
+    global _motor_atual, _versao_motor, _versao_valida_ate, _geracao_lida
+
+    with _lock:
+        if (_motor_atual is not None and _geracao == _geracao_lida
+                and time.monotonic() < _versao_valida_ate):
+            return _motor_atual
+        geracao = _geracao
+
+    try:
+        from src import database
+        if not database.DB_PATH.exists():
+            return _motor_padrao
+        versao = database.obter_versao_regras()
+    except Exception:
+        return _motor_padrao
+
+    with _lock:
+        if _motor_atual is None or versao != _versao_motor:
+            try:
+                regras = [(r['palavra_chave'], r['padrao']) for r in database.listar_regras_remetente()]
+                destinos = [(d['site'], d['padrao'], d['termos']) for d in database.listar_destinos_aceitos()]
+            except Exception:
+                return _motor_padrao
+            _motor_atual = MotorNormalizacao(regras, destinos)
+            _versao_motor = versao
+        # Uma invalidação durante a leitura faz a próxima chamada ler de novo
+        _geracao_lida = geracao
+        _versao_valida_ate = time.monotonic() + VALIDADE_VERSAO
+        return _motor_atual
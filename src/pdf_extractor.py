@@ -4,18 +4,306 @@ Arquivo: src/pdf_extractor.py
 """
 
 import re
-import pdfplumber
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+from src.normalizacao import obter_motor
+
+# Backends opcionais: cada um é detectado em tempo de execução
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Motores de extração disponíveis:
+# - 'texto': achata cada página com extract_text() e infere colunas pela ordem dos tokens
+# - 'coordenadas': usa extract_words() e mapeia cada palavra para a coluna pela posição x
+MOTOR_TEXTO = 'texto'
+MOTOR_COORDENADAS = 'coordenadas'
+MOTORES_EXTRACAO = (MOTOR_TEXTO, MOTOR_COORDENADAS)
+MOTOR_PADRAO = MOTOR_TEXTO
+
+# Colunas da tabela de volumes, na ordem em que aparecem no manifesto
+COLUNAS_TABELA = [
+    'remetente', 'destinatario', 'numero_volume', 'peso_total', 'cubagem',
+    'tipo_material', 'quantidade_expedida', 'quantidade_recebida', 'prioridade'
+]
+
+# Colunas alinhadas à esquerda (texto); as demais são numéricas, alinhadas à direita
+COLUNAS_TEXTO = {'remetente', 'destinatario', 'numero_volume', 'tipo_material'}
+
+# Palavras que identificam linhas de cabeçalho/rodapé da tabela
+PALAVRAS_IGNORADAS = ['MANIFESTO', 'PÁGINA', 'TOTAIS', 'ENTREGUE', 'RECEBIDO']
+
+
+# ==================== BACKENDS DE PDF ====================
+
+class BackendPDF(ABC):
+    """
+    Interface dos backends de leitura de PDF usados pelo motor de texto.
+    Cada backend devolve o texto de cada página, na ordem das páginas.
+    """
+    
+    nome = None
+    
+    @classmethod
+    @abstractmethod
+    def disponivel(cls) -> bool:
+        """A biblioteca ou o programa do backend está instalado"""
+    
+    @abstractmethod
+    def contar_paginas(self, pdf_path: Path) -> int:
+        """Quantidade de páginas do PDF"""
+    
+    @abstractmethod
+    def extrair_textos(self, pdf_path: Path, paginas: Optional[range] = None) -> List[str]:
+        """Retorna o texto de cada página (todas, ou apenas o intervalo informado)"""
+
+
+class BackendPdfplumber(BackendPDF):
+    """Análise de layout do pdfplumber (Python puro, mais lento)"""
+    
+    nome = 'pdfplumber'
+    
+    @classmethod
+    def disponivel(cls) -> bool:
+        return pdfplumber is not None
+    
+    def contar_paginas(self, pdf_path: Path) -> int:
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    
+    def extrair_textos(self, pdf_path: Path, paginas: Optional[range] = None) -> List[str]:
+        with pdfplumber.open(pdf_path) as pdf:
+            indices = paginas if paginas is not None else range(len(pdf.pages))
+            return [pdf.pages[i].extract_text() or "" for i in indices]
+
+
+class BackendPdftotext(BackendPDF):
+    """pdftotext -layout do Poppler (dependência de sistema já documentada)"""
+    
+    nome = 'pdftotext'
+    
+    @classmethod
+    def disponivel(cls) -> bool:
+        return shutil.which('pdftotext') is not None
+    
+    def _executar(self, pdf_path: Path, primeira: int = None, ultima: int = None) -> str:
+        comando = ['pdftotext', '-layout', '-enc', 'UTF-8']
+        if primeira is not None:
+            comando += ['-f', str(primeira), '-l', str(ultima)]
+        comando += [str(pdf_path), '-']
+        resultado = subprocess.run(comando, capture_output=True, check=True)
+        return resultado.stdout.decode('utf-8', errors='replace')
+    
+    def contar_paginas(self, pdf_path: Path) -> int:
+        if shutil.which('pdfinfo'):
+            saida = subprocess.run(['pdfinfo', str(pdf_path)], capture_output=True, check=True)
+            match = re.search(r'^Pages:\s*(\d+)', saida.stdout.decode('utf-8', errors='replace'), re.MULTILINE)
+            if match:
+                return int(match.group(1))
+        return len(self.extrair_textos(pdf_path))
+    
+    def extrair_textos(self, pdf_path: Path, paginas: Optional[range] = None) -> List[str]:
+        if paginas is not None:
+            if len(paginas) == 0:
+                return []
+            texto = self._executar(pdf_path, paginas[0] + 1, paginas[-1] + 1)
+        else:
+            texto = self._executar(pdf_path)
+        
+        # Páginas separadas por form feed; o último vem após a última página
+        textos = texto.split('\f')
+        if textos and textos[-1].strip() == '':
+            textos.pop()
+        return textos
+
+
+class BackendPdfium(BackendPDF):
+    """Extração de texto do PDFium via pypdfium2 (se instalado)"""
+    
+    nome = 'pdfium'
+    
+    @classmethod
+    def disponivel(cls) -> bool:
+        return pypdfium2 is not None
+    
+    def contar_paginas(self, pdf_path: Path) -> int:
+        documento = pypdfium2.PdfDocument(str(pdf_path))
+        try:
+            return len(documento)
+        finally:
+            documento.close()
+    
+    def extrair_textos(self, pdf_path: Path, paginas: Optional[range] = None) -> List[str]:
+        documento = pypdfium2.PdfDocument(str(pdf_path))
+        try:
+            indices = paginas if paginas is not None else range(len(documento))
+            textos = []
+            for i in indices:
+                pagina = documento[i]
+                textpage = pagina.get_textpage()
+                textos.append(textpage.get_text_range().replace('\r\n', '\n'))
+                textpage.close()
+                pagina.close()
+            return textos
+        finally:
+            documento.close()
+
+
+BACKENDS_PDF = {
+    backend.nome: backend
+    for backend in (BackendPdfplumber, BackendPdftotext, BackendPdfium)
+}
+
+BACKEND_AUTO = 'auto'
+BACKEND_PADRAO = BackendPdfplumber.nome
+
+# Ordem de preferência do modo 'auto' (mais rápido primeiro)
+ORDEM_BACKENDS_AUTO = ['pdfium', 'pdftotext', 'pdfplumber']
+
+
+def backends_disponiveis() -> List[str]:
+    """Lista os backends instalados nesta máquina, na ordem de preferência"""
+    return [nome for nome in ORDEM_BACKENDS_AUTO if BACKENDS_PDF[nome].disponivel()]
+
+
+def obter_backend(nome: str = BACKEND_PADRAO) -> BackendPDF:
+    """Instancia o backend pelo nome ('auto' escolhe o mais rápido disponível)"""
+    if nome == BACKEND_AUTO:
+        disponiveis = backends_disponiveis()
+        if not disponiveis:
+            raise RuntimeError("Nenhum backend de PDF disponível (instale pdfplumber)")
+        nome = disponiveis[0]
+    
+    if nome not in BACKENDS_PDF:
+        raise ValueError(f"Backend de PDF desconhecido: {nome}")
+    
+    classe = BACKENDS_PDF[nome]
+    if not classe.disponivel():
+        raise RuntimeError(f"Backend de PDF '{nome}' não está instalado")
+    return classe()
+
+
+# ==================== MOTOR POR COORDENADAS ====================
+
+class TemplateColunas:
+    """
+    Limites horizontais das colunas da tabela de volumes para um layout de manifesto.
+    Aprendido uma única vez por layout e reaproveitado para todas as páginas/arquivos.
+    """
+    
+    TOLERANCIA = 2.0
+    
+    def __init__(self, extensoes: Dict[str, Tuple[float, float]]):
+        # extensoes: coluna -> (x0, x1) observados na linha de referência
+        self.extensoes = extensoes
+        colunas = sorted(extensoes.items(), key=lambda item: item[1][0])
+        
+        # Limite inicial de cada coluna (a primeira começa em -infinito)
+        self.limites = []
+        for i, (nome, (x0, _)) in enumerate(colunas):
+            if i == 0:
+                limite = float('-inf')
+            elif nome in COLUNAS_TEXTO:
+                # Texto alinhado à esquerda: a coluna começa exatamente em x0
+                limite = x0 - self.TOLERANCIA
+            else:
+                # Números alinhados à direita: divide o espaço livre ao meio
+                anterior_x1 = colunas[i - 1][1][1]
+                limite = (anterior_x1 + x0) / 2
+            self.limites.append((limite, nome))
+    
+    def coluna_da_palavra(self, palavra: Dict) -> str:
+        """Retorna a coluna a que a palavra pertence pela sua posição x"""
+        x = palavra['x0']
+        nome_coluna = self.limites[0][1]
+        for limite, nome in self.limites:
+            if x >= limite:
+                nome_coluna = nome
+            else:
+                break
+        return nome_coluna
+    
+    def mapear_linha(self, palavras: List[Dict]) -> Dict[str, List[str]]:
+        """Distribui as palavras de uma linha nas colunas, em uma única passada"""
+        colunas = {nome: [] for nome in COLUNAS_TABELA}
+        for palavra in palavras:
+            colunas[self.coluna_da_palavra(palavra)].append(palavra['text'])
+        return colunas
+
+
+# Cache de templates por layout (terminal de origem + largura da página)
+_templates_colunas: Dict[Tuple[str, int], TemplateColunas] = {}
+
+
+def limpar_cache_templates():
+    """Descarta os templates de colunas aprendidos"""
+    _templates_colunas.clear()
+
+
+# Abaixo deste número de páginas o custo de iniciar processos não compensa
+PAGINAS_MINIMAS_PARALELO = 20
+
+
+def _dividir_paginas(total_paginas: int, blocos: int) -> List[range]:
+    """Divide as páginas em blocos contíguos de tamanho equilibrado"""
+    blocos = max(1, min(blocos, total_paginas))
+    base, resto = divmod(total_paginas, blocos)
+    intervalos = []
+    inicio = 0
+    for i in range(blocos):
+        fim = inicio + base + (1 if i < resto else 0)
+        intervalos.append(range(inicio, fim))
+        inicio = fim
+    return intervalos
+
+
+def _extrair_bloco_paginas(pdf_path: str, paginas: range, motor: str, backend: str,
+                           cabecalho: Dict, templates: Dict) -> List[Dict]:
+    """
+    Executado em um processo de trabalho: extrai os volumes de um bloco de páginas.
+    Os templates de colunas já aprendidos pelo processo principal são reaproveitados.
+    """
+    for chave, template in templates.items():
+        _templates_colunas.setdefault(chave, template)
+    
+    extractor = ManifestoExtractor(pdf_path, motor=motor, backend=backend)
+    extractor.dados_manifesto = cabecalho
+    return extractor._extrair_volumes_paginas(paginas)
+
+
 class ManifestoExtractor:
     """Classe para extrair dados de manifestos em PDF"""
     
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, motor: str = MOTOR_PADRAO, backend: str = BACKEND_PADRAO,
+                 processos: Optional[int] = None):
+        if motor not in MOTORES_EXTRACAO:
+            raise ValueError(f"Motor de extração desconhecido: {motor}")
+        
+        # O motor por coordenadas depende das posições das palavras do pdfplumber
+        if motor == MOTOR_COORDENADAS and backend not in (BACKEND_AUTO, BackendPdfplumber.nome):
+            raise ValueError(f"O motor '{motor}' só funciona com o backend pdfplumber")
+        
         self.pdf_path = Path(pdf_path)
+        self.motor = motor
+        self.backend = BackendPdfplumber.nome if motor == MOTOR_COORDENADAS else backend
+        # Número de processos para dividir as páginas (None ou 1 = sequencial)
+        self.processos = processos
         self.dados_manifesto = {}
         self.volumes = []
+        self._motor_normalizacao = None
         
     def extrair(self) -> Tuple[Dict, List[Dict]]:
         """
@@ -25,20 +313,258 @@ class ManifestoExtractor:
         if not self.pdf_path.exists():
             raise FileNotFoundError(f"Arquivo não encontrado: {self.pdf_path}")
         
+        if self.processos and self.processos > 1:
+            total_paginas = obter_backend(self.backend).contar_paginas(self.pdf_path)
+            if total_paginas >= PAGINAS_MINIMAS_PARALELO:
+                return self._extrair_paralelo(total_paginas)
+        
+        if self.motor == MOTOR_COORDENADAS:
+            return self._extrair_por_coordenadas()
+        
+        # Extrair texto de todas as páginas pelo backend escolhido
+        textos = obter_backend(self.backend).extrair_textos(self.pdf_path)
+        texto_completo = "".join(texto + "\n" for texto in textos)
+        
+        # Extrair dados do cabeçalho
+        self.dados_manifesto = self._extrair_cabecalho(texto_completo)
+        
+        # Extrair volumes (destinatário PAMALS e variações)
+        self.volumes = self._extrair_volumes(texto_completo)
+        
+        return self.dados_manifesto, self.volumes
+    
+    # ==================== MOTOR POR COORDENADAS ====================
+    
+    def _extrair_por_coordenadas(self) -> Tuple[Dict, List[Dict]]:
+        """
+        Extrai usando a posição x de cada palavra (pdfplumber.extract_words).
+        As colunas são aprendidas uma vez por layout e as palavras são mapeadas
+        diretamente para elas, sem heurísticas de ordem de tokens.
+        """
+        if pdfplumber is None:
+            raise RuntimeError("O motor por coordenadas requer o pdfplumber instalado")
+        
         with pdfplumber.open(self.pdf_path) as pdf:
-            texto_completo = ""
+            linhas_paginas = self._linhas_das_paginas(pdf, range(len(pdf.pages)))
+        
+        self.dados_manifesto = self._extrair_cabecalho(self._texto_das_linhas(linhas_paginas))
+        
+        volumes = []
+        origem = self.dados_manifesto.get('terminal_origem') or ''
+        for largura, linhas in linhas_paginas:
+            volumes.extend(self._extrair_volumes_coordenadas(linhas, (origem, round(largura))))
+        self.volumes = volumes
+        
+        return self.dados_manifesto, self.volumes
+    
+    def _linhas_das_paginas(self, pdf, paginas: range) -> List[Tuple[float, List[List[Dict]]]]:
+        """Retorna (largura, linhas de palavras) de cada página do intervalo"""
+        resultado = []
+        for i in paginas:
+            pagina = pdf.pages[i]
+            resultado.append((pagina.width, self._agrupar_linhas(pagina.extract_words())))
+        return resultado
+    
+    @staticmethod
+    def _texto_das_linhas(linhas_paginas: List[Tuple[float, List[List[Dict]]]]) -> str:
+        """Reconstrói o texto corrido a partir das linhas de palavras"""
+        texto = ""
+        for _, linhas in linhas_paginas:
+            texto += "\n".join(" ".join(p['text'] for p in linha) for linha in linhas) + "\n"
+        return texto
+    
+    # ==================== EXTRAÇÃO PARALELA ====================
+    
+    def _extrair_volumes_paginas(self, paginas: range) -> List[Dict]:
+        """Extrai apenas os volumes de um intervalo de páginas (cabeçalho já conhecido)"""
+        terminal_origem = self.dados_manifesto.get('terminal_origem') or ''
+        if self.motor == MOTOR_COORDENADAS:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                linhas_paginas = self._linhas_das_paginas(pdf, paginas)
+            volumes = []
+            for largura, linhas in linhas_paginas:
+                volumes.extend(self._extrair_volumes_coordenadas(linhas, (terminal_origem, round(largura))))
+            return volumes
+        
+        textos = obter_backend(self.backend).extrair_textos(self.pdf_path, paginas)
+        return self._extrair_volumes("".join(texto + "\n" for texto in textos))
+    
+    def _extrair_paralelo(self, total_paginas: int) -> Tuple[Dict, List[Dict]]:
+        """
+        Divide as páginas do PDF entre processos de trabalho.
+        O cabeçalho vem da primeira página e os volumes de cada bloco são
+        concatenados na ordem das páginas.
+        """
+        templates = {}
+        if self.motor == MOTOR_COORDENADAS:
+            with pdfplumber.open(self.pdf_path) as pdf:
+                primeira = self._linhas_das_paginas(pdf, range(1))
+            self.dados_manifesto = self._extrair_cabecalho(self._texto_das_linhas(primeira))
+            origem = self.dados_manifesto.get('terminal_origem') or ''
             
-            # Extrair texto de todas as páginas
-            for pagina in pdf.pages:
-                texto_completo += pagina.extract_text() + "\n"
+            # Aprende o layout uma vez aqui e envia o template aos processos
+            largura, linhas = primeira[0]
+            self._extrair_volumes_coordenadas(linhas, (origem, round(largura)))
+            templates = {chave: t for chave, t in _templates_colunas.items() if chave[0] == origem}
+        else:
+            texto = obter_backend(self.backend).extrair_textos(self.pdf_path, range(1))[0]
+            self.dados_manifesto = self._extrair_cabecalho(texto + "\n")
+        
+        blocos = _dividir_paginas(total_paginas, self.processos)
+        with ProcessPoolExecutor(max_workers=self.processos) as executor:
+            resultados = executor.map(
+                _extrair_bloco_paginas,
+                repeat(str(self.pdf_path)), blocos, repeat(self.motor),
+                repeat(self.backend), repeat(self.dados_manifesto), repeat(templates)
+            )
+            self.volumes = [volume for bloco in resultados for volume in bloco]
+        
+        return self.dados_manifesto, self.volumes
+    
+    @staticmethod
+    def _agrupar_linhas(palavras: List[Dict], tolerancia: float = 3.0) -> List[List[Dict]]:
+        """Agrupa as palavras em linhas pela coordenada vertical (top)"""
+        linhas = []
+        linha_atual = []
+        topo_atual = None
+        
+        for palavra in sorted(palavras, key=lambda p: (round(p['top']), p['x0'])):
+            if topo_atual is None or abs(palavra['top'] - topo_atual) <= tolerancia:
+                linha_atual.append(palavra)
+                if topo_atual is None:
+                    topo_atual = palavra['top']
+            else:
+                linhas.append(sorted(linha_atual, key=lambda p: p['x0']))
+                linha_atual = [palavra]
+                topo_atual = palavra['top']
+        
+        if linha_atual:
+            linhas.append(sorted(linha_atual, key=lambda p: p['x0']))
+        
+        return linhas
+    
+    @staticmethod
+    def _aprender_template(linhas_volume: List[List[Dict]]) -> Optional[TemplateColunas]:
+        """
+        Aprende os limites das colunas a partir das linhas de volume de uma página.
+        A primeira linha completa serve de referência; o início da coluna de
+        destinatário é confirmado pelo x0 comum a todas as linhas, para que
+        destinatários com espaço ("PAMA LS") não deformem o template.
+        Retorna None se nenhuma linha tiver todas as colunas identificáveis.
+        """
+        extensoes = None
+        
+        for palavras in linhas_volume:
+            textos = [p['text'] for p in palavras]
+            
+            j = next((i for i, t in enumerate(textos) if re.match(r'\d{12}/\d{4}', t)), None)
+            if j is None or j < 2:
+                continue
             
-            # Extrair dados do cabeçalho
-            self.dados_manifesto = self._extrair_cabecalho(texto_completo)
+            fim_volume = j + 1 if j + 1 < len(textos) and textos[j + 1].startswith('-') else j
+            
+            decimais = [i for i in range(fim_volume + 1, len(textos))
+                        if re.match(r'^\d+[,\.]\d+$', textos[i])]
+            prioridades = [i for i, t in enumerate(textos) if re.match(r'^\d{2}$', t)]
+            if len(decimais) < 2 or not prioridades:
+                continue
             
-            # Extrair volumes (destinatário PAMALS e variações)
-            self.volumes = self._extrair_volumes(texto_completo)
+            idx_peso, idx_cubagem = decimais[0], decimais[1]
+            idx_prioridade = prioridades[-1]
+            idx_exp, idx_rec = idx_prioridade - 2, idx_prioridade - 1
+            if (idx_exp <= idx_cubagem + 1 or not textos[idx_exp].isdigit()
+                    or not textos[idx_rec].isdigit()):
+                continue
+            
+            faixas = {
+                'remetente': (0, j - 2),
+                'destinatario': (j - 1, j - 1),
+                'numero_volume': (j, fim_volume),
+                'peso_total': (idx_peso, idx_peso),
+                'cubagem': (idx_cubagem, idx_cubagem),
+                'tipo_material': (idx_cubagem + 1, idx_exp - 1),
+                'quantidade_expedida': (idx_exp, idx_exp),
+                'quantidade_recebida': (idx_rec, idx_rec),
+                'prioridade': (idx_prioridade, idx_prioridade),
+            }
+            extensoes = {
+                nome: (palavras[ini]['x0'], palavras[fim]['x1'])
+                for nome, (ini, fim) in faixas.items()
+            }
+            break
         
-        return self.dados_manifesto, self.volumes
+        if extensoes is None:
+            return None
+        
+        # Início do destinatário: maior x0 (antes do volume) presente em todas as linhas
+        x_volume = extensoes['numero_volume'][0]
+        comuns = None
+        for palavras in linhas_volume:
+            inicios = {round(p['x0']) for p in palavras if p['x0'] < x_volume - TemplateColunas.TOLERANCIA}
+            comuns = inicios if comuns is None else comuns & inicios
+        
+        x_remetente = round(extensoes['remetente'][0])
+        candidatos = sorted(x for x in (comuns or ()) if x > x_remetente)
+        if candidatos:
+            x_destinatario = candidatos[-1]
+            extensoes['destinatario'] = (x_destinatario, extensoes['destinatario'][1])
+            extensoes['remetente'] = (extensoes['remetente'][0], x_destinatario - 1)
+        
+        return TemplateColunas(extensoes)
+    
+    def _extrair_volumes_coordenadas(self, linhas: List[List[Dict]], chave_layout: Tuple[str, int]) -> List[Dict]:
+        """Extrai os volumes de uma página mapeando palavras para colunas"""
+        volumes = []
+        template = _templates_colunas.get(chave_layout)
+        
+        linhas_volume = []
+        for palavras in linhas:
+            linha = " ".join(p['text'] for p in palavras)
+            
+            if any(palavra in linha.upper() for palavra in PALAVRAS_IGNORADAS):
+                continue
+            if re.search(r'\d{12}/\d{4}', linha):
+                linhas_volume.append(palavras)
+        
+        for palavras in linhas_volume:
+            colunas = template.mapear_linha(palavras) if template else None
+            
+            # Layout novo ou diferente do aprendido: aprende a partir desta página
+            if not colunas or not re.match(r'\d{12}/\d{4}', ''.join(colunas['numero_volume'])):
+                novo_template = self._aprender_template(linhas_volume)
+                if novo_template is None:
+                    break
+                template = novo_template
+                _templates_colunas[chave_layout] = template
+                colunas = template.mapear_linha(palavras)
+                if not re.match(r'\d{12}/\d{4}', ''.join(colunas['numero_volume'])):
+                    continue
+            
+            quantidade_exp = 1
+            qtd = ''.join(colunas['quantidade_expedida'])
+            if qtd.isdigit() and int(qtd) > 0:
+                quantidade_exp = int(qtd)
+            
+            peso = self._converter_decimal(colunas['peso_total'][0]) if colunas['peso_total'] else None
+            cubagem = self._converter_decimal(colunas['cubagem'][0]) if colunas['cubagem'] else None
+            
+            remetente_bruto = ' '.join(colunas['remetente'])
+            volume = self._montar_volume(
+                remetente=self._padronizar_remetente(remetente_bruto) if remetente_bruto else None,
+                destinatario=self._padronizar_destinatario(' '.join(colunas['destinatario'])),
+                numero_volume=''.join(colunas['numero_volume']),
+                quantidade_exp=quantidade_exp,
+                peso=peso,
+                cubagem=cubagem,
+                prioridade=''.join(colunas['prioridade']) or None,
+                tipo_material=self._classificar_tipo_material(' '.join(colunas['tipo_material']))
+            )
+            if volume:
+                volumes.append(volume)
+        
+        return volumes
+    
+    # ==================== MOTOR POR TEXTO ====================
     
     def _extrair_cabecalho(self, texto: str) -> Dict:
         """Extrai informações do cabeçalho do manifesto"""
@@ -106,84 +632,37 @@ class ManifestoExtractor:
         
         return dados
     
+    @property
+    def motor_normalizacao(self):
+        """Motor de normalização compilado (carregado uma vez por extração)"""
+        if self._motor_normalizacao is None:
+            self._motor_normalizacao = obter_motor()
+        return self._motor_normalizacao
+    
+    @property
+    def site(self) -> Optional[str]:
+        """Site cujos destinos aceitos se aplicam: o terminal de destino do manifesto"""
+        return self.dados_manifesto.get('terminal_destino') if self.dados_manifesto else None
+    
     def _padronizar_remetente(self, remetente: str) -> str:
         """
         Padroniza o nome do remetente, priorizando palavras-chave específicas
+        (regras da tabela regras_remetente)
         """
-        rem = remetente.upper().strip()
-        
-        # Regras de padronização
-        regras = [
-            ('CABW', 'CABW'),
-            ('CABE', 'CABE'),
-            ('BACO', 'BACO'),  # Captura BACO/ESUP, SUP BACO, BACOESUP, etc
-            ('BACG', 'BACG'),
-            ('GAC-PAC', 'GAC-PAC'),
-            ('GACPAC', 'GAC-PAC'),
-            ('BAGL', 'BAGL'),
-            ('CTLA', 'CTLA'),
-            ('CLTA', 'CTLA'),  # Correção comum
-            ('BAAN', 'BAAN'),
-            ('BASP', 'BASP'),
-            ('BANT', 'BANT'),
-        ]
-        
-        for palavra_chave, padrao in regras:
-            if palavra_chave in rem:
-                return padrao
-        
-        # Se não encontrou nenhuma regra, retorna o primeiro termo válido
-        partes = rem.split()
-        if partes:
-            return partes[0]
-        
-        return rem
+        return self.motor_normalizacao.remetente(remetente)
     
     def _padronizar_destinatario(self, destinatario: str) -> str:
         """
         Padroniza o destinatário
         """
-        dest = destinatario.upper().strip()
-        
-        # Se contém PAMALS ou PAMA, padronizar
-        if 'PAMALS' in dest or ('PAMA' in dest and 'LS' in dest):
-            return 'PAMALS'
-        
-        return dest
+        return self.motor_normalizacao.destinatario(destinatario, self.site)
     
     def _e_destinatario_pamals(self, destinatario: str) -> bool:
         """
-        Verifica se o destinatário é PAMALS ou suas variações
-        Aceita: PAMALS, PAMA-LS, LS PAMA-LS, etc
+        Verifica se o destinatário é um destino aceito no site (por padrão PAMALS
+        e suas variações: PAMALS, PAMA-LS, LS PAMA-LS, etc)
         """
-        if not destinatario:
-            return False
-        
-        dest = destinatario.upper().strip()
-        
-        # Remover espaços extras
-        dest = re.sub(r'\s+', ' ', dest)
-        
-        # Variações aceitas
-        variacoes = [
-            'PAMALS',
-            'PAMA-LS',
-            'PAMA LS',
-            'LS PAMA-LS',
-            'LS PAMA LS',
-            'PAMA - LS',
-            'LS PAMA - LS'
-        ]
-        
-        # Verificar correspondência exata
-        if dest in variacoes:
-            return True
-        
-        # Verificar se contém PAMA e LS (mais flexível)
-        if 'PAMA' in dest and 'LS' in dest:
-            return True
-        
-        return False
+        return self.motor_normalizacao.destino_canonico(destinatario, self.site) is not None
     
     def _extrair_volumes(self, texto: str) -> List[Dict]:
         """
@@ -203,7 +682,7 @@ class ManifestoExtractor:
         
         for i, linha in enumerate(linhas):
             # Ignorar linhas de cabeçalho e rodapé
-            if any(palavra in linha.upper() for palavra in ['MANIFESTO', 'PÁGINA', 'TOTAIS', 'ENTREGUE', 'RECEBIDO']):
+            if any(palavra in linha.upper() for palavra in PALAVRAS_IGNORADAS):
                 continue
             
             # Buscar linha que contenha número de volume (padrão: XXX.../XXXX)
@@ -303,14 +782,7 @@ class ManifestoExtractor:
                                         break
                         
                         # Tipo de material
-                        if 'Aeronáutico' in linha or 'Aeronautico' in linha:
-                            tipo_material = 'Aeronáutico'
-                        elif 'Sem Restrições' in linha or 'Sem Restricoes' in linha or 'Sem Reestições' in linha:
-                            tipo_material = 'Sem Restrições'
-                        elif 'Gás Comprimido' in linha or 'Gas Comprimido' in linha:
-                            tipo_material = 'Gás Comprimido'
-                        else:
-                            tipo_material = 'Geral'
+                        tipo_material = self._classificar_tipo_material(linha)
                         
                         # Prioridade já foi encontrada acima
                         if idx_prioridade is not None:
@@ -318,34 +790,11 @@ class ManifestoExtractor:
                         
                         break
                 
-                # Verificar se encontrou dados essenciais
-                if not numero_volume or not destinatario:
-                    continue
-                
-                # Se não encontrou remetente, usar "DESCONHECIDO"
-                if not remetente or remetente.strip() == '':
-                    remetente = "DESCONHECIDO"
-                
-                # FILTRO: Verificar se destinatário é PAMALS (ou variações)
-                if not self._e_destinatario_pamals(destinatario):
-                    print(f"❌ IGNORADO - Dest: '{destinatario}' não é PAMALS")
-                    continue
-                
-                print(f"✅ EXTRAÍDO - Rem: '{remetente}' | Dest: '{destinatario}' | Vol: {numero_volume} | Qtd: {quantidade_exp}")
-                
-                volume = {
-                    'remetente': remetente.strip(),
-                    'destinatario': destinatario.strip(),
-                    'numero_volume': numero_volume,
-                    'quantidade_expedida': quantidade_exp,
-                    'quantidade_recebida': 0,
-                    'peso_total': peso,
-                    'cubagem': cubagem,
-                    'prioridade': prioridade,
-                    'tipo_material': tipo_material,
-                    'embalagem': 'CAIXA'
-                }
-                volumes.append(volume)
+                volume = self._montar_volume(remetente, destinatario, numero_volume,
+                                             quantidade_exp, peso, cubagem,
+                                             prioridade, tipo_material)
+                if volume:
+                    volumes.append(volume)
         
         print(f"\n{'='*80}")
         print(f"EXTRAÇÃO CONCLUÍDA: {len(volumes)} volumes (números de volume)")
@@ -355,6 +804,53 @@ class ManifestoExtractor:
         
         return volumes
     
+    def _montar_volume(self, remetente: Optional[str], destinatario: Optional[str],
+                       numero_volume: Optional[str], quantidade_exp: int,
+                       peso: Optional[float], cubagem: Optional[float],
+                       prioridade: Optional[str], tipo_material: str) -> Optional[Dict]:
+        """
+        Monta o registro do volume comum aos dois motores.
+        Retorna None se faltar dado essencial ou se o destinatário não for PAMALS.
+        """
+        # Verificar se encontrou dados essenciais
+        if not numero_volume or not destinatario:
+            return None
+        
+        # Se não encontrou remetente, usar "DESCONHECIDO"
+        if not remetente or remetente.strip() == '':
+            remetente = "DESCONHECIDO"
+        
+        # FILTRO: Verificar se destinatário é PAMALS (ou variações)
+        if not self._e_destinatario_pamals(destinatario):
+            print(f"❌ IGNORADO - Dest: '{destinatario}' não é PAMALS")
+            return None
+        
+        print(f"✅ EXTRAÍDO - Rem: '{remetente}' | Dest: '{destinatario}' | Vol: {numero_volume} | Qtd: {quantidade_exp}")
+        
+        return {
+            'remetente': remetente.strip(),
+            'destinatario': destinatario.strip(),
+            'numero_volume': numero_volume,
+            'quantidade_expedida': quantidade_exp,
+            'quantidade_recebida': 0,
+            'peso_total': peso,
+            'cubagem': cubagem,
+            'prioridade': prioridade,
+            'tipo_material': tipo_material,
+            'embalagem': 'CAIXA'
+        }
+    
+    @staticmethod
+    def _classificar_tipo_material(texto: str) -> str:
+        """Identifica o tipo de material pelo texto da linha/coluna"""
+        if 'Aeronáutico' in texto or 'Aeronautico' in texto:
+            return 'Aeronáutico'
+        elif 'Sem Restrições' in texto or 'Sem Restricoes' in texto or 'Sem Reestições' in texto:
+            return 'Sem Restrições'
+        elif 'Gás Comprimido' in texto or 'Gas Comprimido' in texto:
+            return 'Gás Comprimido'
+        return 'Geral'
+    
     def _converter_decimal(self, valor: str) -> float:
         """Converte string com vírgula/ponto para float"""
         try:
@@ -433,13 +929,15 @@ class ManifestoExtractor:
 
 # ==================== FUNÇÕES AUXILIARES ====================
 
-def extrair_manifesto_pdf(pdf_path: str) -> Tuple[Dict, List[Dict], List[str]]:
+def extrair_manifesto_pdf(pdf_path: str, motor: str = MOTOR_PADRAO,
+                          backend: str = BACKEND_PADRAO,
+                          processos: Optional[int] = None) -> Tuple[Dict, List[Dict], List[str]]:
     """
     Função helper para extrair dados de um PDF de manifesto
     Retorna: (dados_cabecalho, volumes, erros)
     """
     try:
-        extractor = ManifestoExtractor(pdf_path)
+        extractor = ManifestoExtractor(pdf_path, motor=motor, backend=backend, processos=processos)
         dados_manifesto, volumes = extractor.extrair()
         erros = extractor.validar_dados()
         
@@ -0,0 +1,196 @@
+"""
+Sistema de Conferência de Manifestos - Registros do Banco de Dados
+Arquivo: src/registros.py
+
+Classes leves (com __slots__) para as linhas de manifestos, volumes, caixas e
+logs, no lugar de dict(sqlite3.Row). Cada registro ocupa uma fração da
+memória de um dict e é montado direto da tupla do cursor, sem o sqlite3.Row
+intermediário, por um construtor gerado uma vez para cada conjunto de colunas
+da consulta.
+
+O acesso continua também por chave, como um dict (registro['status'],
+registro.get('peso_total'), 'id' in registro, dict(registro)), então o código
+que já lia dicionários não muda. Colunas que a classe não declara (uma
+coluna nova da migração, um alias em outra consulta) ficam em um dict à
+parte e são lidas do mesmo jeito.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+_construtores: Dict[Tuple[type, Tuple[str, ...]], object] = {}
+
+
+class CampoAusente(KeyError, AttributeError):
+    """Coluna que o registro não tem (KeyError para quem lê como dict)"""
+
+
+class Registro:
+    """Base dos registros: atributos em __slots__, acesso por atributo ou por chave"""
+
+    __slots__ = ('_extras',)
+    CAMPOS: Tuple[str, ...] = ()
+    _declarados = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._declarados = frozenset(cls.CAMPOS)
+
+    def __getitem__(self, chave):
+        # A própria busca do atributo, sem conferir antes se é uma coluna (é o
+        # caminho mais usado); nenhuma coluna tem nome de método (get, keys...)
+        try:
+            return getattr(self, chave)
+        except AttributeError:
+            raise KeyError(chave) from None
+
+    def __getattr__(self, nome):
+        # Só chamado quando o atributo não existe: coluna extra ou ausente
+        try:
+            return object.__getattribute__(self, '_extras')[nome]
+        except (AttributeError, KeyError):
+            raise CampoAusente(nome) from None
+
+    def __setitem__(self, chave, valor):
+        if chave in self._declarados:
+            setattr(self, chave, valor)
+        else:
+            try:
+                self._extras[chave] = valor
+            except AttributeError:
+                self._extras = {chave: valor}
+
+    def get(self, chave, padrao=None):
+        return getattr(self, chave, padrao)
+
+    def __contains__(self, chave) -> bool:
+        return hasattr(self, chave)
+
+    def keys(self) -> List[str]:
+        """Colunas presentes (as declaradas que a consulta trouxe e as extras)"""
+        chaves = [campo for campo in self.CAMPOS if hasattr(self, campo)]
+        chaves.extend(getattr(self, '_extras', ()))
+        return chaves
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def values(self) -> list:
+        return [self[chave] for chave in self.keys()]
+
+    def items(self) -> list:
+        return [(chave, self[chave]) for chave in self.keys()]
+
+    def para_dict(self) -> Dict:
+        return {chave: self[chave] for chave in self.keys()}
+
+    def __eq__(self, outro):
+        if isinstance(outro, (Registro, dict)):
+            return self.para_dict() == dict(outro)
+        return NotImplemented
+
+    __hash__ = None  # Mutável, como o dict
+
+    def __repr__(self) -> str:
+        campos = ", ".join(f"{chave}={valor!r}" for chave, valor in self.items())
+        return f"{type(self).__name__}({campos})"
+
+
+class Manifesto(Registro):
+    # Colunas da tabela e os totais de listar_manifestos
+    __slots__ = CAMPOS = (
+        'id', 'numero_manifesto', 'data_manifesto', 'terminal_origem', 'terminal_destino',
+        'missao', 'aeronave', 'pdf_path', 'status', 'data_registro',
+        'data_conferencia_inicio', 'data_conferencia_fim', 'usuario_responsavel',
+        'arquivado', 'total_volumes', 'total_caixas_expedidas', 'total_caixas_recebidas',
+    )
+
+
+class Volume(Registro):
+    # Colunas da tabela, as caixas de listar_volumes_com_caixas e o manifesto da busca
+    __slots__ = CAMPOS = (
+        'id', 'manifesto_id', 'remetente', 'destinatario', 'numero_volume',
+        'quantidade_expedida', 'quantidade_recebida', 'peso_total', 'cubagem',
+        'prioridade', 'tipo_material', 'embalagem', 'status',
+        'data_hora_primeira_recepcao', 'data_hora_ultima_recepcao', 'usuario_recepcao',
+        'caixas_recebidas', 'caixas_faltantes', 'numero_manifesto', 'data_manifesto', 'arquivado',
+    )
+
+
+class Caixa(Registro):
+    __slots__ = CAMPOS = (
+        'id', 'volume_id', 'numero_caixa', 'status', 'data_hora_recepcao', 'usuario_conferente',
+    )
+
+
+class Log(Registro):
+    __slots__ = CAMPOS = ('id', 'manifesto_id', 'acao', 'detalhes', 'usuario', 'timestamp')
+
+
+def construtor(classe: type, colunas: Tuple[str, ...]):
+    """
+    Função que monta um registro da classe a partir de uma tupla com estas
+    colunas. Gerada (e guardada) uma vez por classe e conjunto de colunas,
+    com uma atribuição direta por coluna, como fazem namedtuple e dataclass.
+    """
+    chave = (classe, colunas)
+    criar = _construtores.get(chave)
+    if criar is not None:
+        return criar
+
+    declarados = classe._declarados
+    corpo = ["    r = novo(classe)"]
+    extras = []
+    for indice, coluna in enumerate(colunas):
+        if coluna in declarados:
+            corpo.append(f"    r.{coluna} = linha[{indice}]")
+        else:
+            extras.append(f"{coluna!r}: linha[{indice}]")
+    if extras:
+        corpo.append(f"    r._extras = {{{', '.join(extras)}}}")
+    corpo.append("    return r")
+
+    codigo = "def criar(linha):\n" + "\n".join(corpo)
+    namespace = {'novo': object.__new__, 'classe': classe}
+    exec(codigo, namespace)
+    criar = _construtores[chave] = namespace['criar']
+    return criar
+
+
+def _colunas(cursor) -> Tuple[str, ...]:
+    return tuple(coluna[0] for coluna in cursor.description)
+
+
+def todos(cursor, classe: type) -> list:
+    """As linhas restantes da consulta executada no cursor, como registros"""
+    criar = construtor(classe, _colunas(cursor))
+    cursor.row_factory = None  # Tuplas simples: o registro é montado direto delas
+    return [criar(linha) for linha in cursor.fetchall()]
+
+
+def um(cursor, classe: type) -> Optional[Registro]:
+    """A próxima linha da consulta como registro (None se não houver)"""
+    criar = construtor(classe, _colunas(cursor))
+    cursor.row_factory = None
+    linha = cursor.fetchone()
+    return criar(linha) if linha is not None else None
+
+
+def fabrica(classe: type):
+    """
+    row_factory para um cursor (conn.row_factory não, pois as consultas
+    variam): cursor.row_factory = fabrica(Volume). Uma por cursor, já que
+    guarda o construtor da última consulta.
+    """
+    ultima = [None, None]
+
+    def criar(cursor, linha):
+        descricao = cursor.description
+        if descricao is not ultima[0]:
+            ultima[0] = descricao
+            ultima[1] = construtor(classe, _colunas(cursor))
+        return ultima[1](linha)
+
+    return criar
@@ -4,9 +4,11 @@ Arquivo: src/sheets_sync.py
 """
 
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import requests
 from pathlib import Path
-import queue
+from collections import OrderedDict, deque
+import json
+import os
 import threading
 import time
 import random
@@ -30,36 +32,309 @@ COLOR_HEADER_BG = {'red': 0.12, 'green': 0.3, 'blue': 0.47} # Azul Petróleo
 COLOR_HEADER_FG = {'red': 1.0, 'green': 1.0, 'blue': 1.0}   # Branco
 COLOR_BORDER = {'red': 0.0, 'green': 0.0, 'blue': 0.0}      # Preto
 
+# Flush por manifesto: as linhas pendentes são enviadas juntas quando a mais
+# antiga espera JANELA_FLUSH segundos ou quando acumulam LIMITE_FLUSH linhas
+JANELA_FLUSH = 5.0
+LIMITE_FLUSH = 50
+PRIMEIRA_LINHA_VOLUMES = 4   # Linhas 1-3: título, status geral e cabeçalho da tabela
+
+# Aba oculta já formatada, duplicada para cada manifesto novo
+TITULO_MODELO = "_MODELO"
+LINHAS_MODELO = 50
+LARGURAS_COLUNAS = [130, 230, 200, 110, 70, 120, 130]  # A-G, em pixels
+
+# Cores por status, aplicadas por formatação condicional na aba
+CORES_STATUS_VOLUME = {
+    'COMPLETO': {'red': 0.85, 'green': 0.95, 'blue': 0.85},
+    'TOTALMENTE RECEBIDO': {'red': 0.85, 'green': 0.95, 'blue': 0.85},
+    'PARCIAL': {'red': 1.0, 'green': 0.98, 'blue': 0.85},
+    'VOLUME EXTRA': {'red': 0.9, 'green': 0.85, 'blue': 1.0},
+    'NÃO RECEBIDO': {'red': 1.0, 'green': 0.95, 'blue': 0.95},
+}
+CORES_STATUS_MANIFESTO = {  # status: (fundo, texto)
+    'TOTALMENTE RECEBIDO': ({'red': 0.3, 'green': 0.7, 'blue': 0.3}, {'red': 1.0, 'green': 1.0, 'blue': 1.0}),
+    'PARCIALMENTE RECEBIDO': ({'red': 1.0, 'green': 0.8, 'blue': 0.0}, {'red': 0.0, 'green': 0.0, 'blue': 0.0}),
+    'NÃO RECEBIDO': ({'red': 0.9, 'green': 0.9, 'blue': 0.9}, {'red': 0.0, 'green': 0.0, 'blue': 0.0}),
+}
+
+# Cotas da API do Sheets (requisições por minuto, por usuário)
+LEITURAS_POR_MINUTO = 60
+ESCRITAS_POR_MINUTO = 60
+NUM_WORKERS = 3              # Manifestos diferentes sincronizam em paralelo
+
+# Outbox (tabela sync_outbox): lido em lotes; eventos que falham são reenviados
+# na próxima varredura completa, até MAX_TENTATIVAS_OUTBOX (depois vão para FALHA)
+TAMANHO_LOTE_OUTBOX = 500
+MAX_TENTATIVAS_OUTBOX = 5
+INTERVALO_OUTBOX = 30.0
+
+# Reconciliação: a cada INTERVALO_RECONCILIACAO, os manifestos com eventos
+# enviados no período têm a aba inteira conferida com o banco (snapshot)
+INTERVALO_RECONCILIACAO = 30 * 60.0
+
+# Métricas exportadas a cada INTERVALO_METRICAS para um JSON ao lado do banco
+ARQUIVO_METRICAS = "sync_metricas.json"
+INTERVALO_METRICAS = 15.0
+
+# Ajuste adaptativo (AIMD): um 429 reduz a vazão pela metade (no máximo uma
+# redução a cada INTERVALO_MIN_REDUCAO da janela da cota); sem 429 a vazão
+# volta a subir linearmente, AUMENTO_POR_JANELA a cada janela da cota
+FATOR_MINIMO = 0.1
+REDUCAO_POR_429 = 0.5
+AUMENTO_POR_JANELA = 0.5
+INTERVALO_MIN_REDUCAO = 1 / 30
+
 # ================= VARIÁVEIS GLOBAIS =================
 _client_instance = None
-_task_queue = queue.Queue()
+_cliente_fixo = None       # Cliente injetado (ex.: simulador); dispensa credentials.json
 _worker_running = False
+_lock_cliente = threading.Lock()
+
+_planilha = None           # Handle da planilha (open_by_key só na primeira vez)
+_planilha_cliente = None   # Cliente que abriu o handle; se o cliente mudar, reabre
 
 def _get_client():
     global _client_instance
-    if _client_instance is None:
-        if not CREDENTIALS_FILE.exists():
-            raise FileNotFoundError(f"Arquivo {CREDENTIALS_FILE} não encontrado!")
-        
-        creds = ServiceAccountCredentials.from_json_keyfile_name(str(CREDENTIALS_FILE), SCOPE)
-        _client_instance = gspread.authorize(creds)
-    return _client_instance
+    with _lock_cliente:
+        if _client_instance is None and _cliente_fixo is not None:
+            _client_instance = _cliente_fixo
+        if _client_instance is None:
+            if not CREDENTIALS_FILE.exists():
+                raise FileNotFoundError(f"Arquivo {CREDENTIALS_FILE} não encontrado!")
+            
+            # Só é necessário com credenciais reais; importado aqui por ser pesado
+            from oauth2client.service_account import ServiceAccountCredentials
+            creds = ServiceAccountCredentials.from_json_keyfile_name(str(CREDENTIALS_FILE), SCOPE)
+            _client_instance = _limitar_cliente(gspread.authorize(creds))
+        return _client_instance
+
+def usar_cliente(client):
+    """
+    Usa um cliente com a interface do gspread no lugar do autorizado por
+    credentials.json (ex.: benchmarks/sheets_fake.py). None volta ao normal.
+    """
+    global _client_instance, _cliente_fixo, _planilha
+    with _lock_cliente:
+        _cliente_fixo = _limitar_cliente(client) if client is not None else None
+        _client_instance = _cliente_fixo
+        _planilha = None
+    with _lock_espelhos:
+        _espelhos.clear()
+
+# --- LIMITE DE TAXA ---
+class _TokenBucket:
+    """Balde de fichas: capacidade para rajadas curtas, reposição contínua por segundo"""
+
+    def __init__(self, capacidade: float, taxa: float):
+        self.capacidade = capacidade
+        self.taxa = taxa
+        self.fichas = capacidade
+        self._ultimo = time.monotonic()
+
+    def _repor(self):
+        agora = time.monotonic()
+        self.fichas = min(self.capacidade, self.fichas + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def tentar_consumir(self) -> float:
+        """Consome uma ficha e retorna 0, ou retorna quantos segundos faltam para haver uma"""
+        self._repor()
+        if self.fichas >= 1:
+            self.fichas -= 1
+            return 0.0
+        return (1 - self.fichas) / self.taxa
+
+    def esvaziar(self):
+        self._repor()
+        self.fichas = min(self.fichas, 0)
+
+
+class _LimitadorSheets:
+    """
+    Um balde para leituras e outro para escritas, dimensionados para nunca
+    passar da cota por minuto (rajada + reposição <= cota). A taxa efetiva é
+    multiplicada por um fator ajustado por AIMD conforme as respostas 429.
+    """
+
+    def __init__(self, leituras_por_minuto: int, escritas_por_minuto: int, janela: float = 60.0):
+        self._lock = threading.Lock()
+        self.configurar(leituras_por_minuto, escritas_por_minuto, janela)
+
+    def configurar(self, leituras_por_minuto: int, escritas_por_minuto: int, janela: float = 60.0):
+        with self._lock:
+            self.fator = 1.0
+            self._ultimo_ajuste = time.monotonic()
+            self._ultima_reducao = 0.0
+            self._cotas = {'leitura': leituras_por_minuto, 'escrita': escritas_por_minuto}
+            self._janela = janela
+            self._baldes = {}
+            for tipo, cota in self._cotas.items():
+                rajada = max(1, cota // 10)
+                self._baldes[tipo] = _TokenBucket(rajada, (cota - rajada) / janela)
+
+    def _ajustar_taxas(self):
+        for tipo, balde in self._baldes.items():
+            balde._repor()
+            balde.taxa = (self._cotas[tipo] - balde.capacidade) / self._janela * self.fator
+
+    def _recuperar(self):
+        """Aumento aditivo proporcional ao tempo desde o último ajuste"""
+        agora = time.monotonic()
+        if self.fator < 1.0:
+            aumento = (agora - self._ultimo_ajuste) / self._janela * AUMENTO_POR_JANELA
+            self.fator = min(1.0, self.fator + aumento)
+            self._ajustar_taxas()
+        self._ultimo_ajuste = agora
+
+    def adquirir(self, tipo: str):
+        """Bloqueia até a requisição caber na cota"""
+        while True:
+            with self._lock:
+                self._recuperar()
+                espera = self._baldes[tipo].tentar_consumir()
+            if espera <= 0:
+                return
+            # Acorda periodicamente para aproveitar a recuperação da taxa
+            time.sleep(min(espera, self._janela * INTERVALO_MIN_REDUCAO))
+
+    def registrar_429(self):
+        with self._lock:
+            self._recuperar()
+            agora = time.monotonic()
+            # Vários 429 da mesma rajada contam como um só congestionamento
+            if agora - self._ultima_reducao < self._janela * INTERVALO_MIN_REDUCAO:
+                return
+            self._ultima_reducao = agora
+            self.fator = max(FATOR_MINIMO, self.fator * REDUCAO_POR_429)
+            self._ajustar_taxas()
+            for balde in self._baldes.values():
+                balde.esvaziar()
+
+
+_limitador = _LimitadorSheets(LEITURAS_POR_MINUTO, ESCRITAS_POR_MINUTO)
+
+
+class _MetricasSync:
+    """Contadores da sincronização desde a abertura do programa"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chamadas_recentes = deque()   # instantes das chamadas do último minuto
+        self.chamadas = 0
+        self.retentativas = 0
+        self.respostas_429 = 0
+        self.eventos_enviados = 0
+        self.eventos_com_erro = 0
+        self.ultimo_sucesso = None
+        self.ultimo_erro = None
+
+    def _descartar_antigas(self, agora):
+        while self._chamadas_recentes and agora - self._chamadas_recentes[0] > 60.0:
+            self._chamadas_recentes.popleft()
+
+    def registrar_chamada(self, resposta_429=False):
+        agora = time.monotonic()
+        with self._lock:
+            self.chamadas += 1
+            self._chamadas_recentes.append(agora)
+            self._descartar_antigas(agora)
+            if resposta_429:
+                self.respostas_429 += 1
+
+    def registrar_retentativa(self, erro):
+        with self._lock:
+            self.retentativas += 1
+            self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+    def registrar_conclusao(self, quantidade, erro=None):
+        with self._lock:
+            if erro is None:
+                self.eventos_enviados += quantidade
+                self.ultimo_sucesso = datetime.now().isoformat(timespec='seconds')
+            else:
+                self.eventos_com_erro += quantidade
+                self.ultimo_erro = f"{type(erro).__name__}: {erro}"
+
+    def instantaneo(self):
+        with self._lock:
+            self._descartar_antigas(time.monotonic())
+            return {
+                'chamadas': self.chamadas,
+                'chamadas_por_minuto': len(self._chamadas_recentes),
+                'retentativas': self.retentativas,
+                'respostas_429': self.respostas_429,
+                'eventos_enviados': self.eventos_enviados,
+                'eventos_com_erro': self.eventos_com_erro,
+                'ultimo_sucesso': self.ultimo_sucesso,
+                'ultimo_erro': self.ultimo_erro,
+            }
+
+
+_metricas = _MetricasSync()
+
+def _limitar_cliente(client):
+    """
+    Faz toda requisição do cliente passar pelo limitador. O ponto único do
+    gspread é client.http_client.request (GET = leitura, demais = escrita).
+    """
+    http = getattr(client, 'http_client', client)
+    if getattr(http, '_limitado', False):
+        return client
+    
+    request_original = http.request
+    
+    def request(method, endpoint, *args, **kwargs):
+        _limitador.adquirir('leitura' if method.upper() == 'GET' else 'escrita')
+        try:
+            resposta = request_original(method, endpoint, *args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            _metricas.registrar_chamada(resposta_429=e.response.status_code == 429)
+            if e.response.status_code == 429:
+                _limitador.registrar_429()
+            raise
+        _metricas.registrar_chamada()
+        return resposta
+    
+    http.request = request
+    http._limitado = True
+    return client
 
 # --- SISTEMA ANTI-CRASH (RETRY) ---
+def _erro_de_transporte(erro: Exception) -> bool:
+    """Falha de rede ou tempo esgotado, que pode passar sozinha"""
+    if isinstance(erro, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    # Os demais erros do requests também são OSError, mas não se resolvem repetindo
+    # (URL inválida, resposta malformada...), assim como um arquivo ausente
+    return isinstance(erro, OSError) and not isinstance(
+        erro, (requests.exceptions.RequestException, FileNotFoundError))
+
 def api_retry(func):
-    """Decorator para retry com backoff exponencial."""
+    """
+    Decorator para retry com backoff exponencial. Só repete os erros que
+    podem passar sozinhos (429/5xx da API, rede, tempo esgotado); os demais
+    (aba inexistente, dados inválidos...) sobem na hora para o outbox.
+    """
     def wrapper(*args, **kwargs):
         max_retries = 8
         base_delay = 2.0
+        max_delay = 30.0
         
+        ultimo_erro = None
         for i in range(max_retries):
             try:
                 return func(*args, **kwargs)
             except gspread.exceptions.APIError as e:
+                ultimo_erro = e
                 status = e.response.status_code
                 if status in [429, 500, 502, 503]:
-                    sleep_time = (base_delay * (2 ** i)) + (random.randint(0, 1000) / 1000)
+                    # Em 429 o limitador já reduziu a taxa; basta uma pausa curta
+                    if status == 429:
+                        sleep_time = random.randint(0, 1000) / 1000
+                    else:
+                        sleep_time = min(base_delay * (2 ** i), max_delay) + (random.randint(0, 1000) / 1000)
                     print(f"[Sheets] Erro API {status}. Aguardando {sleep_time:.2f}s...")
+                    _metricas.registrar_retentativa(e)
                     time.sleep(sleep_time)
                     if i > 3: 
                         global _client_instance
@@ -67,38 +342,323 @@ def api_retry(func):
                 else:
                     raise e
             except Exception as e:
-                print(f"[Sheets] Erro de execução: {e}. Retentando...")
+                if not _erro_de_transporte(e):
+                    raise
+                ultimo_erro = e
+                print(f"[Sheets] Erro de conexão: {e}. Retentando...")
+                _metricas.registrar_retentativa(e)
                 time.sleep(2)
         
         print(f"[Sheets] CRÍTICO: Falha definitiva em {func.__name__}.")
+        # Propaga para que o outbox registre a falha (o evento não se perde)
+        raise ultimo_erro
     return wrapper
 
-# --- WORKER ---
+# --- FILA COALESCENTE ---
+_TIPOS_LINHA = ('volume', 'cabecalho')
+
+
+class _FilaCoalescente:
+    """
+    Fila de tarefas indexada pela linha da planilha que a tarefa escreve.
+    Uma atualização pendente mais nova substitui a anterior (mantendo a posição
+    na fila), então o tamanho da fila é limitado pelas linhas distintas, não
+    pelo número de eventos.
+
+    Vários workers consomem a fila, mas um manifesto só é entregue a um worker
+    por vez, preservando a ordem das tarefas de cada manifesto.
+    """
+
+    def __init__(self):
+        self._tarefas = OrderedDict()  # chave -> (func, args, instante da 1ª pendência, ids do outbox)
+        self._cond = threading.Condition()
+        self._sequencia = 0
+        self._ocupados = set()         # Manifestos em processamento
+
+    def colocar(self, chave, func, args, ids=()):
+        """ids: eventos do outbox atendidos pela tarefa (confirmados juntos no fim)"""
+        with self._cond:
+            if chave is None:
+                # Tarefa sem chave nunca é substituída nem ordenada com as demais
+                self._sequencia += 1
+                chave = (None, 'avulsa', self._sequencia)
+            ids = set(ids)
+            anterior = self._tarefas.get(chave)
+            if anterior is None:
+                self._tarefas[chave] = (func, args, time.monotonic(), ids)
+            elif ids and anterior[3] and max(ids) < max(anterior[3]):
+                # Evento mais antigo que o pendente: só acompanha a confirmação
+                anterior[3].update(ids)
+            else:
+                self._tarefas[chave] = (func, args, anterior[2], anterior[3] | ids)
+            self._cond.notify()
+
+    def _proximo_lote(self, janela: float, limite: int):
+        """Primeiro trabalho pronto na ordem da fila, ou (None, segundos até o próximo ficar pronto)"""
+        agora = time.monotonic()
+        espera = None
+        bloqueados = set(self._ocupados)
+        for chave, (func, args, criada_em, ids) in self._tarefas.items():
+            manifesto = chave[0]
+            if manifesto is not None and manifesto in bloqueados:
+                continue
+
+            if chave[1] not in _TIPOS_LINHA:
+                del self._tarefas[chave]
+                return ('tarefa', manifesto, ids, (func, args)), None
+
+            linhas = [c for c in self._tarefas if c[0] == manifesto and c[1] in _TIPOS_LINHA]
+            restante = janela - (agora - criada_em)
+            if restante <= 0 or len(linhas) >= limite:
+                retiradas = [(c, self._tarefas.pop(c)) for c in linhas]
+                ids_lote = set().union(*(tarefa[3] for _, tarefa in retiradas))
+                return ('linhas', manifesto, ids_lote, [(c, tarefa[1]) for c, tarefa in retiradas]), None
+
+            # Linhas ainda na janela: tarefas posteriores do manifesto esperam por elas
+            bloqueados.add(manifesto)
+            espera = restante if espera is None else min(espera, restante)
+        return None, espera
+
+    def retirar_lote(self, janela: float, limite: int):
+        """
+        Bloqueia até haver trabalho pronto. Retorna ('tarefa', manifesto, ids, (func, args))
+        ou ('linhas', manifesto, ids, [(chave, args), ...]) com todas as linhas pendentes
+        do manifesto, quando a mais antiga já esperou a janela ou o manifesto
+        atingiu o limite de linhas. O manifesto fica reservado até concluir().
+        """
+        with self._cond:
+            while True:
+                lote, espera = self._proximo_lote(janela, limite)
+                if lote is not None:
+                    if lote[1] is not None:
+                        self._ocupados.add(lote[1])
+                    return lote
+                self._cond.wait(timeout=espera)
+
+    def concluir(self, manifesto):
+        with self._cond:
+            self._ocupados.discard(manifesto)
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._tarefas)
+
+
+_fila_tarefas = _FilaCoalescente()
+
+
+def _chave_tarefa(func, args):
+    """
+    (manifesto, volume) para linhas de volume, (manifesto, cabeçalho) para o status
+    geral, (manifesto, criação) para a criação da aba e (manifesto, snapshot) para
+    a conferência da aba inteira. None = não coalescer.
+    """
+    try:
+        if func is sincronizar_volume:
+            return (args[0], 'volume', args[1].get('numero_volume'))
+        if func is atualizar_status_cabecalho and isinstance(args[0], str):
+            return (args[0], 'cabecalho')
+        if func is sincronizar_manifesto:
+            return (args[0]['numero_manifesto'], 'manifesto')
+        if func is sincronizar_snapshot:
+            return (args[0], 'snapshot')
+    except (IndexError, KeyError, AttributeError):
+        pass
+    return None
+
+
+# --- WORKERS ---
 def _worker():
-    print("[Sheets] Worker iniciado.")
+    print(f"[Sheets] Worker iniciado ({threading.current_thread().name}).")
     while True:
         try:
-            task_func, args = _task_queue.get()
+            tipo_lote, numero_manifesto, ids, conteudo = _fila_tarefas.retirar_lote(JANELA_FLUSH, LIMITE_FLUSH)
             try:
-                task_func(*args)
-                time.sleep(1.5) # Pausa para respeitar limite da API
+                if tipo_lote == 'linhas':
+                    volumes = [args[1] for chave, args in conteudo if chave[1] == 'volume']
+                    status = [args[1] for chave, args in conteudo if chave[1] == 'cabecalho']
+                    sincronizar_linhas(numero_manifesto, volumes, status[-1] if status else None)
+                else:
+                    task_func, args = conteudo
+                    task_func(*args)
+                _concluir_eventos(ids)
             except Exception as e:
                 print(f"[Sheets Erro na Tarefa] {e}")
+                _concluir_eventos(ids, e)
             finally:
-                _task_queue.task_done()
+                _fila_tarefas.concluir(numero_manifesto)
         except Exception as e:
             time.sleep(1)
 
 def iniciar_worker():
     global _worker_running
     if not _worker_running:
-        t = threading.Thread(target=_worker, daemon=True)
-        t.start()
         _worker_running = True
+        for i in range(NUM_WORKERS):
+            t = threading.Thread(target=_worker, name=f"SheetsWorker-{i + 1}", daemon=True)
+            t.start()
+        threading.Thread(target=_leitor_outbox, name="SheetsOutbox", daemon=True).start()
+
+# --- OUTBOX ---
+_sinal_outbox = threading.Event()
+_em_andamento = set()   # ids do outbox na fila ou em envio
+_lock_outbox = threading.Lock()
+
+def processar_outbox():
+    """Chamado após gravar eventos no outbox: acorda o leitor (não-bloqueante)"""
+    iniciar_worker()
+    _sinal_outbox.set()
+
+def _tarefa_do_evento(evento):
+    numero_manifesto, payload = evento['numero_manifesto'], evento['payload']
+    if evento['tipo'] == 'manifesto':
+        return sincronizar_manifesto, (payload,)
+    if evento['tipo'] == 'volume':
+        return sincronizar_volume, (numero_manifesto, payload)
+    if evento['tipo'] == 'snapshot':
+        return sincronizar_snapshot, (numero_manifesto,)
+    return atualizar_status_cabecalho, (numero_manifesto, payload['status'])
+
+_aviso_cliente = False
+
+def _cliente_disponivel():
+    """
+    Verifica as credenciais e autoriza o cliente (na thread do leitor, nunca na
+    da interface). Sem cliente, os eventos esperam no outbox sem gastar tentativas.
+    """
+    global _aviso_cliente
+    try:
+        _get_client()
+    except Exception as e:
+        if not _aviso_cliente:
+            print(f"[Sheets] Sincronização em espera: {e}")
+            _aviso_cliente = True
+        return False
+    _aviso_cliente = False
+    return True
+
+def _leitor_outbox():
+    """
+    Drena a tabela sync_outbox para a fila em lotes. Na partida (e a cada
+    INTERVALO_OUTBOX) relê desde o início, retomando o que ficou pendente com o
+    programa fechado e os eventos cuja tentativa anterior falhou. Também agenda
+    a reconciliação periódica das abas.
+    """
+    from src import database
+    
+    ultimo_id = 0
+    proxima_varredura = 0.0
+    proxima_exportacao = 0.0
+    proxima_reconciliacao = time.monotonic() + INTERVALO_RECONCILIACAO
+    ultima_reconciliacao = datetime.now()
+    while True:
+        if time.monotonic() >= proxima_exportacao:
+            exportar_metricas()
+            proxima_exportacao = time.monotonic() + INTERVALO_METRICAS
+        
+        if time.monotonic() >= proxima_reconciliacao:
+            agora = datetime.now()
+            try:
+                agendados = database.registrar_reconciliacao(ultima_reconciliacao.isoformat())
+                if agendados:
+                    print(f"[Sheets] Reconciliação agendada para {agendados} manifesto(s).")
+                ultima_reconciliacao = agora
+            except Exception as e:
+                print(f"[Sheets] Erro ao agendar a reconciliação: {e}")
+            proxima_reconciliacao = time.monotonic() + INTERVALO_RECONCILIACAO
+        
+        try:
+            if not _cliente_disponivel():
+                # Tenta de novo no próximo aviso ou após INTERVALO_OUTBOX
+                proxima_varredura = 0.0
+            else:
+                if time.monotonic() >= proxima_varredura:
+                    ultimo_id = 0
+                    proxima_varredura = time.monotonic() + INTERVALO_OUTBOX
+                
+                while True:
+                    eventos = database.listar_outbox_pendente(ultimo_id, TAMANHO_LOTE_OUTBOX)
+                    for evento in eventos:
+                        ultimo_id = evento['id']
+                        with _lock_outbox:
+                            if evento['id'] in _em_andamento:
+                                continue
+                            _em_andamento.add(evento['id'])
+                        func, args = _tarefa_do_evento(evento)
+                        _fila_tarefas.colocar(_chave_tarefa(func, args), func, args, {evento['id']})
+                    if len(eventos) < TAMANHO_LOTE_OUTBOX:
+                        break
+        except Exception as e:
+            print(f"[Sheets] Erro ao ler o outbox: {e}")
+        
+        _sinal_outbox.wait(timeout=min(INTERVALO_OUTBOX, INTERVALO_METRICAS))
+        _sinal_outbox.clear()
+
+def _concluir_eventos(ids, erro=None):
+    """Confirma (ou registra a falha de) os eventos do outbox atendidos por uma tarefa"""
+    if not ids:
+        return
+    _metricas.registrar_conclusao(len(ids), erro)
+    try:
+        from src import database
+        if erro is None:
+            database.confirmar_outbox(sorted(ids))
+        else:
+            falhas = database.registrar_falha_outbox(sorted(ids), f"{type(erro).__name__}: {erro}",
+                                                    MAX_TENTATIVAS_OUTBOX)
+            if falhas:
+                print(f"[Sheets] CRÍTICO: {falhas} evento(s) movido(s) para FALHA após "
+                      f"{MAX_TENTATIVAS_OUTBOX} tentativas.")
+    except Exception as e:
+        print(f"[Sheets] Erro ao atualizar o outbox: {e}")
+    finally:
+        with _lock_outbox:
+            _em_andamento.difference_update(ids)
+
+def configurar_cotas(leituras_por_minuto: int, escritas_por_minuto: int, janela: float = 60.0):
+    """Redefine as cotas do limitador (ex.: projeto com cota maior que a padrão)"""
+    _limitador.configurar(leituras_por_minuto, escritas_por_minuto, janela)
 
 def agendar_tarefa(func, *args):
     iniciar_worker()
-    _task_queue.put((func, args))
+    _fila_tarefas.colocar(_chave_tarefa(func, args), func, args)
+
+def tamanho_fila() -> int:
+    """Linhas distintas aguardando sincronização"""
+    return len(_fila_tarefas)
+
+def metricas_sync() -> dict:
+    """
+    Situação da sincronização: outbox (pendentes, falhas, idade do pendente
+    mais antigo), fila em memória, chamadas à API e último sucesso/erro.
+    """
+    from src import database
+    metricas = database.resumo_outbox()
+    metricas.update(_metricas.instantaneo())
+    with _lock_outbox:
+        em_envio = len(_em_andamento)
+    metricas.update({
+        'estado': 'aguardando credenciais' if _aviso_cliente else 'ativa',
+        'fila': len(_fila_tarefas),
+        'em_envio': em_envio,
+        'fator_vazao': round(_limitador.fator, 2),
+    })
+    return metricas
+
+def exportar_metricas(caminho=None):
+    """Grava as métricas em JSON (por padrão ao lado do banco), substituindo o arquivo de uma vez"""
+    try:
+        from src import database
+        caminho = Path(caminho) if caminho else database.DB_PATH.parent / ARQUIVO_METRICAS
+        metricas = metricas_sync()
+        metricas['gerado_em'] = datetime.now().isoformat(timespec='seconds')
+        
+        temporario = caminho.with_suffix('.tmp')
+        temporario.write_text(json.dumps(metricas, ensure_ascii=False, indent=2), encoding='utf-8')
+        os.replace(temporario, caminho)
+    except Exception as e:
+        print(f"[Sheets] Erro ao exportar métricas: {e}")
 
 # ================= UTILITÁRIOS DE LAYOUT =================
 
@@ -110,201 +670,524 @@ def _formatar_data(data_iso):
     except ValueError:
         return data_iso
 
-@api_retry
-def _get_or_create_worksheet(client, title):
-    sh = client.open_by_key(SPREADSHEET_ID)
-    try:
-        return sh.worksheet(title)
-    except gspread.WorksheetNotFound:
-        return sh.add_worksheet(title=title, rows=50, cols=8)
+def _get_planilha():
+    global _planilha, _planilha_cliente
+    client = _get_client()
+    if _planilha is None or _planilha_cliente is not client:
+        _planilha = client.open_by_key(SPREADSHEET_ID)
+        _planilha_cliente = client
+    return _planilha
 
-@api_retry
-def _definir_layout_colunas(ws):
+def _requisicao_formato(sheet_id, linha_inicio, linha_fim, col_inicio, col_fim, formato):
     """
-    Define as larguras das colunas.
-    1. Auto-resize em tudo (para A, D, E, F, G ficarem corretas).
-    2. Fixa B e C nos tamanhos solicitados.
+    Equivalente a ws.format() como requisição de batch_update.
+    Linhas e colunas começam em 1 e são inclusivas (como na notação A1).
     """
-    requests = []
-
-    # 1. Auto-resize para todas as colunas (0 a 7)
-    requests.append({
-        "autoResizeDimensions": {
-            "dimensions": {
-                "sheetId": ws.id,
-                "dimension": "COLUMNS",
-                "startIndex": 0,
-                "endIndex": 7
-            }
-        }
-    })
-
-    # 2. Fixar Coluna B (Index 1) - Remetente ~230px (2.3x padrão)
-    requests.append({
-        "updateDimensionProperties": {
+    return {
+        "repeatCell": {
             "range": {
-                "sheetId": ws.id,
-                "dimension": "COLUMNS",
-                "startIndex": 1,
-                "endIndex": 2
+                "sheetId": sheet_id,
+                "startRowIndex": linha_inicio - 1,
+                "endRowIndex": linha_fim,
+                "startColumnIndex": col_inicio - 1,
+                "endColumnIndex": col_fim
             },
-            "properties": {"pixelSize": 230}, # <--- TAMANHO FIXO B
-            "fields": "pixelSize"
+            "cell": {"userEnteredFormat": formato},
+            "fields": "userEnteredFormat(%s)" % ",".join(formato.keys())
         }
-    })
+    }
 
-    # 3. Fixar Coluna C (Index 2) - Destinatário ~200px (2.0x padrão)
-    requests.append({
-        "updateDimensionProperties": {
-            "range": {
-                "sheetId": ws.id,
-                "dimension": "COLUMNS",
-                "startIndex": 2,
-                "endIndex": 3
-            },
-            "properties": {"pixelSize": 200}, # <--- TAMANHO FIXO C
-            "fields": "pixelSize"
-        }
-    })
+def _requisicoes_estilo_linhas(sheet_id, linha_inicio, linha_fim):
+    """Estilo base das linhas de volume, igual para qualquer status (a cor vem das regras condicionais)"""
+    borda = {'style': 'SOLID'}
+    return [
+        _requisicao_formato(sheet_id, linha_inicio, linha_fim, 1, 7, {
+            'backgroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0},
+            'textFormat': {'bold': False, 'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}},
+            'horizontalAlignment': 'CENTER',
+            'verticalAlignment': 'MIDDLE',
+            'borders': {'top': borda, 'bottom': borda, 'left': borda, 'right': borda}
+        }),
+        _requisicao_formato(sheet_id, linha_inicio, linha_fim, 1, 1, {'textFormat': {'bold': True}}),
+        _requisicao_formato(sheet_id, linha_inicio, linha_fim, 4, 4, {'textFormat': {'bold': True}}),
+    ]
+
+def _requisicoes_aumentar_grade(sheet_id, linhas_grade, ultima_linha):
+    """
+    Linhas acrescentadas (com folga de LIMITE_FLUSH) para a grade comportar
+    ultima_linha, já com o estilo base. Retorna (requisições, novo total de linhas).
+    """
+    if ultima_linha <= linhas_grade:
+        return [], linhas_grade
+    acrescimo = ultima_linha - linhas_grade + LIMITE_FLUSH
+    requests = [{"appendDimension": {"sheetId": sheet_id, "dimension": "ROWS", "length": acrescimo}}]
+    requests.extend(_requisicoes_estilo_linhas(sheet_id, linhas_grade + 1, linhas_grade + acrescimo))
+    return requests, linhas_grade + acrescimo
 
-    # Envia tudo em um único comando batch para ser rápido
-    ws.spreadsheet.batch_update({'requests': requests})
+def _requisicoes_formatacao_condicional(sheet_id):
+    """
+    Cor da linha pelo valor da coluna STATUS e cor do status geral (B2).
+    As faixas das linhas não têm fim, então valem também para linhas acrescentadas.
+    """
+    requests = []
+    for status, cor in CORES_STATUS_VOLUME.items():
+        requests.append({"addConditionalFormatRule": {"index": len(requests), "rule": {
+            "ranges": [{"sheetId": sheet_id, "startRowIndex": PRIMEIRA_LINHA_VOLUMES - 1,
+                        "startColumnIndex": 0, "endColumnIndex": 7}],
+            "booleanRule": {
+                "condition": {"type": "CUSTOM_FORMULA",
+                              "values": [{"userEnteredValue": f'=$A{PRIMEIRA_LINHA_VOLUMES}="{status}"'}]},
+                "format": {"backgroundColor": cor}
+            }
+        }}})
+    for status, (fundo, texto) in CORES_STATUS_MANIFESTO.items():
+        requests.append({"addConditionalFormatRule": {"index": len(requests), "rule": {
+            "ranges": [{"sheetId": sheet_id, "startRowIndex": 1, "endRowIndex": 2,
+                        "startColumnIndex": 1, "endColumnIndex": 2}],
+            "booleanRule": {
+                "condition": {"type": "TEXT_EQ", "values": [{"userEnteredValue": status}]},
+                "format": {"backgroundColor": fundo, "textFormat": {"foregroundColor": texto}}
+            }
+        }}})
+    return requests
+
+def _requisicoes_formatacao_aba(sheet_id, linhas_grade):
+    """Formatação feita uma única vez por aba: estilo base + regras condicionais"""
+    borda = {'style': 'SOLID'}
+    requests = [
+        # Status geral (a cor vem das regras condicionais)
+        _requisicao_formato(sheet_id, 2, 2, 2, 2, {
+            'backgroundColor': {'red': 1.0, 'green': 1.0, 'blue': 1.0},
+            'textFormat': {'bold': True, 'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}},
+            'horizontalAlignment': 'CENTER',
+            'verticalAlignment': 'MIDDLE',
+            'borders': {'top': borda, 'bottom': borda, 'left': borda, 'right': borda}
+        }),
+    ]
+    if linhas_grade >= PRIMEIRA_LINHA_VOLUMES:
+        requests.extend(_requisicoes_estilo_linhas(sheet_id, PRIMEIRA_LINHA_VOLUMES, linhas_grade))
+    requests.extend(_requisicoes_formatacao_condicional(sheet_id))
+    return requests
+
+def _linha_volume(volume_dados: dict) -> list:
+    qtd_str = f"{volume_dados.get('quantidade_recebida', 0)} / {volume_dados.get('quantidade_expedida', 1)}"
+    status = volume_dados.get('status', 'NÃO RECEBIDO')
+    data_rec = _formatar_data(volume_dados.get('data_hora_ultima_recepcao'))
+    user_rec = volume_dados.get('usuario_recepcao', '') or "-"
+    
+    return [
+        status,
+        volume_dados.get('remetente', ''),
+        volume_dados.get('destinatario', ''),
+        volume_dados.get('numero_volume', ''),
+        qtd_str,
+        data_rec,
+        user_rec
+    ]
+
+# ================= ESPELHO LOCAL DAS ABAS =================
+
+class _EspelhoAba:
+    """
+    O que se sabe de uma aba de manifesto sem consultá-la: id, tamanho da grade,
+    próxima linha livre, a linha de cada volume e se a formatação condicional
+    já foi aplicada. Persistido no SQLite e só recarregado da planilha quando
+    uma escrita indica conflito.
+    """
+
+    def __init__(self, titulo, sheet_id, linhas_grade, proxima_linha, linhas=None, formatado=False):
+        self.titulo = titulo
+        self.sheet_id = sheet_id
+        self.linhas_grade = linhas_grade
+        self.proxima_linha = proxima_linha
+        self.linhas = dict(linhas or {})
+        self.formatado = formatado
+
+
+_espelhos = {}
+_lock_espelhos = threading.Lock()
+
+
+def _persistir_espelho(espelho, novas_linhas=None, substituir=False):
+    try:
+        from src import database
+        database.salvar_espelho_planilha(espelho.titulo, espelho.sheet_id, espelho.linhas_grade,
+                                         espelho.proxima_linha, novas_linhas, substituir,
+                                         formatado=espelho.formatado)
+    except Exception as e:
+        print(f"[Sheets] Espelho de {espelho.titulo} não persistido: {e}")
+
+def _registrar_espelho(titulo, sheet_id, linhas_grade, proxima_linha, linhas=None, formatado=False):
+    """Substitui o espelho da aba (memória e banco)"""
+    espelho = _EspelhoAba(titulo, sheet_id, linhas_grade, proxima_linha, linhas, formatado)
+    with _lock_espelhos:
+        _espelhos[titulo] = espelho
+    _persistir_espelho(espelho, espelho.linhas, substituir=True)
+    return espelho
+
+def _recarregar_espelho(sh, titulo):
+    """Lê a aba (metadados + coluna D) e reconstrói o índice numero_volume -> linha"""
+    metadados = sh.fetch_sheet_metadata(
+        params={'fields': 'sheets(properties(sheetId,title,gridProperties),conditionalFormats)'})
+    aba = next((a for a in metadados['sheets'] if a['properties']['title'] == titulo), None)
+    if aba is None:
+        raise gspread.WorksheetNotFound(titulo)
+    
+    intervalo = f"'{titulo.replace(chr(39), chr(39) * 2)}'!D:D"
+    colunas = sh.values_get(intervalo, params={'majorDimension': 'COLUMNS'}).get('values') or [[]]
+    col_volumes = colunas[0]
+    
+    linhas = {}
+    for indice, num_vol in enumerate(col_volumes):
+        linha = indice + 1
+        if linha >= PRIMEIRA_LINHA_VOLUMES and num_vol and num_vol not in linhas:
+            linhas[num_vol] = linha
+    
+    proxima = max(len(col_volumes) + 1, PRIMEIRA_LINHA_VOLUMES)
+    propriedades = aba['properties']
+    return _registrar_espelho(titulo, propriedades['sheetId'], propriedades['gridProperties']['rowCount'],
+                              proxima, linhas, formatado=bool(aba.get('conditionalFormats')))
+
+def _espelho_conhecido(titulo):
+    """Espelho em memória ou no banco, sem consultar a planilha (None se não houver)"""
+    with _lock_espelhos:
+        espelho = _espelhos.get(titulo)
+    if espelho is not None:
+        return espelho
+    
+    try:
+        from src import database
+        dados = database.carregar_espelho_planilha(titulo)
+    except Exception:
+        dados = None
+    if dados is None:
+        return None
+    
+    espelho = _EspelhoAba(titulo, dados['sheet_id'], dados['linhas_grade'],
+                          dados['proxima_linha'], dados['linhas'], bool(dados['formatado']))
+    with _lock_espelhos:
+        _espelhos[titulo] = espelho
+    return espelho
+
+def _obter_espelho(sh, titulo):
+    return _espelho_conhecido(titulo) or _recarregar_espelho(sh, titulo)
+
+def descartar_espelho(titulo):
+    """Esquece o espelho da aba; a próxima escrita relê a planilha"""
+    with _lock_espelhos:
+        _espelhos.pop(titulo, None)
+    try:
+        from src import database
+        database.remover_espelho_planilha(titulo)
+    except Exception:
+        pass
 
 # ================= FUNÇÕES DE SINCRONIZAÇÃO =================
 
+def _requisicoes_modelo(sheet_id):
+    """Toda a formatação fixa de uma aba de manifesto, em um único batch_update"""
+    borda = {'style': 'SOLID'}
+    requests = [
+        {"mergeCells": {
+            "range": {"sheetId": sheet_id, "startRowIndex": 0, "endRowIndex": 1,
+                      "startColumnIndex": 0, "endColumnIndex": 7},
+            "mergeType": "MERGE_ALL"
+        }},
+        # Título
+        _requisicao_formato(sheet_id, 1, 1, 1, 7, {
+            'textFormat': {'bold': True, 'fontSize': 14, 'foregroundColor': COLOR_HEADER_FG},
+            'backgroundColor': COLOR_HEADER_BG,
+            'horizontalAlignment': 'CENTER',
+            'verticalAlignment': 'MIDDLE'
+        }),
+        # Status
+        _requisicao_formato(sheet_id, 2, 2, 1, 1, {'textFormat': {'bold': True}, 'horizontalAlignment': 'RIGHT'}),
+        # Cabeçalho da tabela
+        _requisicao_formato(sheet_id, 3, 3, 1, 7, {
+            'textFormat': {'bold': True, 'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}},
+            'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9},
+            'horizontalAlignment': 'CENTER',
+            'verticalAlignment': 'MIDDLE',
+            'borders': {'top': borda, 'bottom': borda, 'left': borda, 'right': borda}
+        }),
+        {"updateSheetProperties": {
+            "properties": {"sheetId": sheet_id, "gridProperties": {"frozenRowCount": 3}, "hidden": True},
+            "fields": "gridProperties.frozenRowCount,hidden"
+        }},
+    ]
+    # Aba vazia: larguras fixas no lugar do auto-resize
+    for coluna, largura in enumerate(LARGURAS_COLUNAS):
+        requests.append({"updateDimensionProperties": {
+            "range": {"sheetId": sheet_id, "dimension": "COLUMNS",
+                      "startIndex": coluna, "endIndex": coluna + 1},
+            "properties": {"pixelSize": largura},
+            "fields": "pixelSize"
+        }})
+    requests.extend(_requisicoes_formatacao_aba(sheet_id, LINHAS_MODELO))
+    return requests
+
+def _garantir_modelo(sh):
+    """sheet_id da aba modelo; cria e formata a aba na primeira vez (3 chamadas, uma única vez)"""
+    espelho = _espelho_conhecido(TITULO_MODELO)
+    if espelho is not None:
+        if not espelho.formatado:
+            # Modelo anterior à formatação condicional: atualiza uma vez
+            sh.batch_update({'requests': _requisicoes_formatacao_aba(espelho.sheet_id, espelho.linhas_grade)})
+            espelho.formatado = True
+            _persistir_espelho(espelho)
+        return espelho.sheet_id
+    
+    try:
+        ws = sh.worksheet(TITULO_MODELO)
+        sh.batch_update({'requests': _requisicoes_formatacao_aba(ws.id, ws.row_count)})
+    except gspread.WorksheetNotFound:
+        print("[Sheets] Criando aba modelo...")
+        ws = sh.add_worksheet(title=TITULO_MODELO, rows=LINHAS_MODELO, cols=8)
+        sh.batch_update({'requests': _requisicoes_modelo(ws.id)})
+        sh.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': [
+            {'range': f"'{TITULO_MODELO}'!A2:A3", 'values': [["STATUS GERAL:"], ["STATUS"]]},
+            {'range': f"'{TITULO_MODELO}'!B3:G3",
+             'values': [["REMETENTE", "DESTINATÁRIO", "VOLUME", "QTD", "RECEBIDO EM", "RECEBIDO POR"]]},
+        ]})
+    
+    _registrar_espelho(TITULO_MODELO, ws.id, ws.row_count, PRIMEIRA_LINHA_VOLUMES, formatado=True)
+    return ws.id
+
+def _volumes_do_banco(numero_manifesto):
+    try:
+        from src import database
+        return database.listar_volumes_por_numero(numero_manifesto)
+    except Exception as e:
+        print(f"[Sheets] Volumes de {numero_manifesto} indisponíveis no banco: {e}")
+        return []
+
+def _criar_aba_manifesto(sh, id_modelo, num_manifesto, status_inicial, volumes):
+    """Uma duplicação do modelo + um values update com título, status e todas as linhas"""
+    titulo = num_manifesto.replace("'", "''")
+    novo_id = random.randint(1, 2**31 - 1)
+    ultima_linha = PRIMEIRA_LINHA_VOLUMES + len(volumes) - 1
+    
+    requests = [
+        {"duplicateSheet": {"sourceSheetId": id_modelo, "newSheetId": novo_id,
+                            "newSheetName": num_manifesto, "insertSheetIndex": 0}},
+        {"updateSheetProperties": {"properties": {"sheetId": novo_id, "hidden": False},
+                                   "fields": "hidden"}},
+    ]
+    requests_grade, linhas_grade = _requisicoes_aumentar_grade(novo_id, LINHAS_MODELO, ultima_linha)
+    requests.extend(requests_grade)
+    sh.batch_update({'requests': requests})
+    
+    valores = [
+        {'range': f"'{titulo}'!A1", 'values': [[f"CONFERÊNCIA DE MANIFESTO: {num_manifesto}"]]},
+        {'range': f"'{titulo}'!B2", 'values': [[status_inicial]]},
+    ]
+    if volumes:
+        valores.append({'range': f"'{titulo}'!A{PRIMEIRA_LINHA_VOLUMES}:G{ultima_linha}",
+                        'values': [_linha_volume(v) for v in volumes]})
+    sh.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': valores})
+    
+    linhas = {v.get('numero_volume', ''): PRIMEIRA_LINHA_VOLUMES + i for i, v in enumerate(volumes)}
+    _registrar_espelho(num_manifesto, novo_id, linhas_grade, ultima_linha + 1, linhas, formatado=True)
+
 @api_retry
 def sincronizar_manifesto(manifesto_dados: dict):
-    client = _get_client()
+    """
+    Cria a aba do manifesto duplicando a aba modelo, já com os volumes que
+    estiverem no banco. Se a aba já existe (reentrega do evento), é mantida.
+    """
+    _criar_aba_do_banco(manifesto_dados)
+
+def _criar_aba_do_banco(manifesto_dados: dict):
+    """sincronizar_manifesto sem o retry, para quem já está dentro de um (snapshot)"""
+    sh = _get_planilha()
     num_manifesto = manifesto_dados['numero_manifesto']
-    ws = _get_or_create_worksheet(client, num_manifesto)
     
-    ws.clear()
+    if _espelho_conhecido(num_manifesto) is not None:
+        print(f"[Sheets] Aba {num_manifesto} já existe; mantida.")
+        return
     
     status_inicial = manifesto_dados.get('status', 'NÃO RECEBIDO')
+    volumes = _volumes_do_banco(num_manifesto)
+    
+    id_modelo = _garantir_modelo(sh)
+    try:
+        _criar_aba_manifesto(sh, id_modelo, num_manifesto, status_inicial, volumes)
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code != 400:
+            raise
+        if 'already exists' in str(e):
+            # Aba criada antes (ex.: outra instalação ou evento reentregue): mantém as linhas
+            print(f"[Sheets] Aba {num_manifesto} já existe; mantida.")
+            _recarregar_espelho(sh, num_manifesto)
+            return
+        # Modelo apagado na planilha: recria e tenta de novo
+        descartar_espelho(TITULO_MODELO)
+        id_modelo = _garantir_modelo(sh)
+        _criar_aba_manifesto(sh, id_modelo, num_manifesto, status_inicial, volumes)
 
-    headers = [
-        [f"CONFERÊNCIA DE MANIFESTO: {num_manifesto}", "", "", "", "", "", ""],
-        ["STATUS GERAL:", status_inicial, "", "", "", "", ""],
-        ["STATUS", "REMETENTE", "DESTINATÁRIO", "VOLUME", "QTD", "RECEBIDO EM", "RECEBIDO POR"]
-    ]
+def sincronizar_volume(numero_manifesto: str, volume_dados: dict):
+    sincronizar_linhas(numero_manifesto, [volume_dados])
+
+def _enviar_linhas(sh, espelho, volumes, novo_status):
+    """Escreve as linhas usando só o espelho (nenhuma leitura). Atualiza o espelho se der certo."""
+    titulo = espelho.titulo.replace("'", "''")
+    proxima_linha = espelho.proxima_linha
+    novas = {}
     
-    # Sintaxe moderna (já que você atualizou o gspread)
-    ws.update(range_name='A1:G3', values=headers)
+    valores = []
+    for volume_dados in volumes:
+        num_vol = volume_dados.get('numero_volume', '')
+        row = espelho.linhas.get(num_vol) or novas.get(num_vol)
+        if row is None:
+            row = proxima_linha
+            proxima_linha += 1
+            novas[num_vol] = row
+        
+        valores.append({'range': f"'{titulo}'!A{row}:G{row}", 'values': [_linha_volume(volume_dados)]})
     
-    ws.merge_cells('A1:G1')
+    if novo_status:
+        valores.append({'range': f"'{titulo}'!B2", 'values': [[novo_status]]})
     
-    # Formatação do Título
-    ws.format('A1:G1', {
-        'textFormat': {'bold': True, 'fontSize': 14, 'foregroundColor': COLOR_HEADER_FG},
-        'backgroundColor': COLOR_HEADER_BG,
-        'horizontalAlignment': 'CENTER',
-        'verticalAlignment': 'MIDDLE'
-    })
-
-    # Formatação do Status
-    ws.format('A2', {'textFormat': {'bold': True}, 'horizontalAlignment': 'RIGHT'})
-    ws.format('B2', {'textFormat': {'bold': True}, 'horizontalAlignment': 'CENTER'})
-    
-    # Formatação do Cabeçalho da Tabela
-    ws.format('A3:G3', {
-        'textFormat': {'bold': True, 'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}},
-        'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9},
-        'horizontalAlignment': 'CENTER',
-        'verticalAlignment': 'MIDDLE',
-        'borders': {'top': {'style': 'SOLID'}, 'bottom': {'style': 'SOLID'}, 'left': {'style': 'SOLID'}, 'right': {'style': 'SOLID'}}
-    })
+    # Cores e estilo vêm da formatação da aba; só há batch_update quando a grade
+    # cresce ou quando a aba ainda não recebeu a formatação condicional
+    requests, linhas_grade = _requisicoes_aumentar_grade(espelho.sheet_id, espelho.linhas_grade,
+                                                         proxima_linha - 1)
+    if not espelho.formatado:
+        requests.extend(_requisicoes_formatacao_aba(espelho.sheet_id, linhas_grade))
     
-    ws.freeze(rows=3)
+    if requests:
+        sh.batch_update({'requests': requests})
+    sh.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': valores})
     
-    atualizar_status_cabecalho(num_manifesto, status_inicial)
-    _definir_layout_colunas(ws)
+    if novas or linhas_grade != espelho.linhas_grade or not espelho.formatado:
+        with _lock_espelhos:
+            espelho.linhas.update(novas)
+            espelho.proxima_linha = proxima_linha
+            espelho.linhas_grade = linhas_grade
+            espelho.formatado = True
+        _persistir_espelho(espelho, novas)
 
 @api_retry
-def sincronizar_volume(numero_manifesto: str, volume_dados: dict):
-    client = _get_client()
-    sh = client.open_by_key(SPREADSHEET_ID)
-    ws = sh.worksheet(numero_manifesto)
+def sincronizar_linhas(numero_manifesto: str, volumes: list, novo_status: str = None):
+    """
+    Flush de um manifesto: todas as linhas de volume pendentes (e o status geral,
+    se houver) vão em um único values batchUpdate. As cores seguem o status pela
+    formatação condicional da aba. As linhas vêm do espelho local, sem leituras.
+    """
+    sh = _get_planilha()
+    espelho = _obter_espelho(sh, numero_manifesto)
+    try:
+        _enviar_linhas(sh, espelho, volumes, novo_status)
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code != 400:
+            raise
+        # Aba apagada, renomeada ou encolhida fora do sistema: relê e tenta de novo
+        print(f"[Sheets] Espelho de {numero_manifesto} desatualizado ({e}). Recarregando...")
+        descartar_espelho(numero_manifesto)
+        espelho = _obter_espelho(sh, numero_manifesto)
+        _enviar_linhas(sh, espelho, volumes, novo_status)
+
+def _celulas(linha, largura=7):
+    """Valores da linha como texto, com a largura fixa (a API omite vazios à direita)"""
+    valores = ['' if v is None else str(v).strip() for v in linha[:largura]]
+    return valores + [''] * (largura - len(valores))
+
+def _faixas_alteradas(atual, desejado, primeira_linha):
+    """
+    Compara linhas (listas de valores) e agrupa as diferentes em faixas
+    contíguas: [(linha inicial, [valores...]), ...]. Linhas que sobram em
+    'atual' viram linhas vazias (limpeza).
+    """
+    faixas = []
+    for i in range(max(len(atual), len(desejado))):
+        novo = _celulas(desejado[i]) if i < len(desejado) else [''] * 7
+        velho = _celulas(atual[i]) if i < len(atual) else [''] * 7
+        if novo == velho:
+            continue
+        linha = primeira_linha + i
+        if faixas and faixas[-1][0] + len(faixas[-1][1]) == linha:
+            faixas[-1][1].append(novo)
+        else:
+            faixas.append((linha, [novo]))
+    return faixas
+
+def _enviar_snapshot(sh, espelho, status, volumes):
+    """Lê o corpo da aba (uma leitura) e reescreve só o que difere do banco"""
+    titulo = espelho.titulo.replace("'", "''")
+    resposta = sh.values_get(f"'{titulo}'!A1:G{espelho.linhas_grade}")
+    atual = resposta.get('values', [])
     
-    qtd_str = f"{volume_dados.get('quantidade_recebida', 0)} / {volume_dados.get('quantidade_expedida', 1)}"
-    status = volume_dados.get('status', 'NÃO RECEBIDO')
-    data_rec = _formatar_data(volume_dados.get('data_hora_ultima_recepcao'))
-    user_rec = volume_dados.get('usuario_recepcao', '') or "-"
+    valores = []
+    status_atual = _celulas(atual[1])[1] if len(atual) > 1 else ''
+    if status and status != status_atual:
+        valores.append({'range': f"'{titulo}'!B2", 'values': [[status]]})
     
-    row_data = [
-        status,
-        volume_dados.get('remetente', ''),
-        volume_dados.get('destinatario', ''),
-        volume_dados.get('numero_volume', ''),
-        qtd_str,
-        data_rec,
-        user_rec
-    ]
+    desejado = [_linha_volume(v) for v in volumes]
+    faixas = _faixas_alteradas(atual[PRIMEIRA_LINHA_VOLUMES - 1:], desejado, PRIMEIRA_LINHA_VOLUMES)
+    for inicio, linhas in faixas:
+        valores.append({'range': f"'{titulo}'!A{inicio}:G{inicio + len(linhas) - 1}", 'values': linhas})
     
-    col_volumes = ws.col_values(4)
-    target_row = None
-    num_vol_busca = volume_dados.get('numero_volume', '')
+    ultima_linha = PRIMEIRA_LINHA_VOLUMES + len(volumes) - 1
+    requests, linhas_grade = _requisicoes_aumentar_grade(espelho.sheet_id, espelho.linhas_grade, ultima_linha)
+    if not espelho.formatado:
+        requests.extend(_requisicoes_formatacao_aba(espelho.sheet_id, linhas_grade))
     
-    if num_vol_busca in col_volumes:
-        target_row = col_volumes.index(num_vol_busca) + 1
-        ws.update(range_name=f'A{target_row}:G{target_row}', values=[row_data])
-    else:
-        ws.append_row(row_data)
-        target_row = len(col_volumes) + 1 if col_volumes else 1
-        if target_row <= 3: target_row = len(ws.col_values(1)) 
-
-    atualizar_status_visual(ws, target_row, status)
-    _definir_layout_colunas(ws)
+    if requests:
+        sh.batch_update({'requests': requests})
+    if valores:
+        sh.values_batch_update({'valueInputOption': 'USER_ENTERED', 'data': valores})
+    
+    # O índice de linhas passa a ser exatamente o do banco
+    linhas = {v.get('numero_volume', ''): PRIMEIRA_LINHA_VOLUMES + i for i, v in enumerate(volumes)}
+    _registrar_espelho(espelho.titulo, espelho.sheet_id, linhas_grade, ultima_linha + 1, linhas, formatado=True)
+    
+    corrigidas = sum(len(l) for _, l in faixas)
+    if corrigidas:
+        print(f"[Sheets] Aba {espelho.titulo} conferida: {corrigidas} linha(s) reescrita(s) "
+              f"em {len(faixas)} faixa(s).")
 
 @api_retry
+def sincronizar_snapshot(numero_manifesto: str):
+    """
+    Conferência da aba inteira com o banco (fim da conferência e reconciliação
+    periódica): o corpo é relido e só as faixas de linhas que diferem são
+    reescritas, em um único values batchUpdate, na ordem de listar_volumes.
+    Cobre linhas perdidas, duplicadas ou fora do lugar.
+    """
+    from src import database
+    dados = database.obter_snapshot_manifesto(numero_manifesto)
+    if dados is None:
+        print(f"[Sheets] Manifesto {numero_manifesto} não está mais no banco; snapshot ignorado.")
+        return
+    
+    sh = _get_planilha()
+    
+    def conferir():
+        try:
+            espelho = _obter_espelho(sh, numero_manifesto)
+        except gspread.WorksheetNotFound:
+            # Aba nunca criada (ou apagada): a criação já escreve tudo a partir do banco.
+            # Sem o retry de sincronizar_manifesto: o do snapshot já cobre a chamada
+            _criar_aba_do_banco({'numero_manifesto': numero_manifesto, 'status': dados['status']})
+            return
+        _enviar_snapshot(sh, espelho, dados['status'], dados['volumes'])
+    
+    try:
+        conferir()
+    except gspread.exceptions.APIError as e:
+        if e.response.status_code != 400:
+            raise
+        print(f"[Sheets] Espelho de {numero_manifesto} desatualizado ({e}). Recarregando...")
+        descartar_espelho(numero_manifesto)
+        conferir()
+
 def atualizar_status_cabecalho(numero_manifesto: str, novo_status: str):
     if hasattr(numero_manifesto, 'update'):
-        ws = numero_manifesto
+        _atualizar_cabecalho_aba(numero_manifesto, novo_status)
     else:
-        client = _get_client()
-        sh = client.open_by_key(SPREADSHEET_ID)
-        ws = sh.worksheet(numero_manifesto)
-    
-    ws.update(range_name='B2', values=[[novo_status]])
-    
-    bg_color = {'red': 1.0, 'green': 1.0, 'blue': 1.0}
-    fg_color = {'red': 0.0, 'green': 0.0, 'blue': 0.0}
-    
-    if novo_status == 'TOTALMENTE RECEBIDO':
-        bg_color = {'red': 0.3, 'green': 0.7, 'blue': 0.3}
-        fg_color = {'red': 1.0, 'green': 1.0, 'blue': 1.0}
-    elif novo_status == 'PARCIALMENTE RECEBIDO':
-        bg_color = {'red': 1.0, 'green': 0.8, 'blue': 0.0}
-    elif novo_status == 'NÃO RECEBIDO':
-        bg_color = {'red': 0.9, 'green': 0.9, 'blue': 0.9}
-    
-    ws.format('B2', {
-        'textFormat': {'bold': True, 'foregroundColor': fg_color},
-        'backgroundColor': bg_color,
-        'horizontalAlignment': 'CENTER',
-        'verticalAlignment': 'MIDDLE',
-        'borders': {'top': {'style': 'SOLID'}, 'bottom': {'style': 'SOLID'}, 'left': {'style': 'SOLID'}, 'right': {'style': 'SOLID'}}
-    })
+        sincronizar_linhas(numero_manifesto, [], novo_status)
 
 @api_retry
-def atualizar_status_visual(worksheet, row_num, status):
-    bg_color = {'red': 1.0, 'green': 1.0, 'blue': 1.0}
-    
-    if status in ['COMPLETO', 'TOTALMENTE RECEBIDO']:
-        bg_color = {'red': 0.85, 'green': 0.95, 'blue': 0.85}
-    elif status == 'PARCIAL':
-        bg_color = {'red': 1.0, 'green': 0.98, 'blue': 0.85}
-    elif status == 'VOLUME EXTRA':
-        bg_color = {'red': 0.9, 'green': 0.85, 'blue': 1.0}
-    elif status == 'NÃO RECEBIDO':
-        bg_color = {'red': 1.0, 'green': 0.95, 'blue': 0.95}
-    
-    worksheet.format(f'A{row_num}:G{row_num}', {
-        'backgroundColor': bg_color,
-        'textFormat': {'bold': False, 'foregroundColor': {'red': 0.0, 'green': 0.0, 'blue': 0.0}},
-        'horizontalAlignment': 'CENTER',
-        'verticalAlignment': 'MIDDLE',
-        'borders': {'top': {'style': 'SOLID'}, 'bottom': {'style': 'SOLID'}, 'left': {'style': 'SOLID'}, 'right': {'style': 'SOLID'}}
-    })
-    
-    worksheet.format(f'A{row_num}', {'textFormat': {'bold': True}})
-    worksheet.format(f'D{row_num}', {'textFormat': {'bold': True}})
+def _atualizar_cabecalho_aba(ws, novo_status):
+    # A cor do status vem da formatação condicional de B2
+    ws.update(range_name='B2', values=[[novo_status]])
@@ -10,15 +10,10 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QGroupBox, QCheckBox, QDialog, QDialogButtonBox, QSpinBox, QApplication)
 from PyQt5.QtCore import QDate, Qt, pyqtSignal  # ADICIONADO: pyqtSignal
 from PyQt5.QtGui import QFont, QColor
-import sys
-import os
 
-# Adiciona o diretório pai ao path para importações
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
-from database import (listar_manifestos, listar_volumes, obter_manifesto, 
-                       marcar_volume_recebido, obter_caixas, marcar_caixa_recebida,
-                       iniciar_conferencia, finalizar_conferencia, obter_volume)
+from src.database import (listar_manifestos, buscar_volumes_por_numero, obter_manifesto, 
+                          marcar_volume_recebido, obter_caixas, marcar_caixa_recebida,
+                          iniciar_conferencia, finalizar_conferencia, obter_volume)
 
 
 class BuscaWindow(QMainWindow):
@@ -111,6 +106,10 @@ class BuscaWindow(QMainWindow):
         self.txt_destino.setPlaceholderText("Ex: PCAN-LS")
         form_layout.addRow("Destino:", self.txt_destino)
         
+        # Manifestos antigos movidos para o arquivo histórico
+        self.chk_arquivados = QCheckBox("Incluir manifestos arquivados")
+        form_layout.addRow("", self.chk_arquivados)
+        
         group_filtros.setLayout(form_layout)
         layout.addWidget(group_filtros)
         
@@ -223,6 +222,9 @@ class BuscaWindow(QMainWindow):
         self.chk_tempo_real.setChecked(True)
         form_layout.addRow("", self.chk_tempo_real)
         
+        self.chk_volumes_arquivados = QCheckBox("Incluir manifestos arquivados")
+        form_layout.addRow("", self.chk_volumes_arquivados)
+        
         group_busca.setLayout(form_layout)
         layout.addWidget(group_busca)
         
@@ -293,8 +295,8 @@ class BuscaWindow(QMainWindow):
         self.lbl_stats_volumes.setStyleSheet("color: #666; font-style: italic;")
         layout.addWidget(self.lbl_stats_volumes)
         
-    def criar_acoes_manifesto(self, manifesto_id):
-        """Cria os botões de ação para um manifesto"""
+    def criar_acoes_manifesto(self, manifesto_id, arquivado=False):
+        """Cria os botões de ação para um manifesto (arquivado: só consulta)"""
         widget = QWidget()
         layout = QHBoxLayout(widget)
         layout.setContentsMargins(5, 2, 5, 2)
@@ -315,7 +317,14 @@ class BuscaWindow(QMainWindow):
                 background-color: #0b7dda;
             }
         """)
-        btn_detalhes.clicked.connect(lambda: self.ver_detalhes_manifesto(manifesto_id))
+        btn_detalhes.clicked.connect(lambda: self.ver_detalhes_manifesto(manifesto_id, arquivado))
+        layout.addWidget(btn_detalhes)
+        
+        if arquivado:
+            lbl_arquivado = QLabel("📦 Arquivado")
+            lbl_arquivado.setToolTip("Manifesto no arquivo histórico (somente consulta)")
+            layout.addWidget(lbl_arquivado)
+            return widget
         
         btn_conferir = QPushButton("Conferir\nManifesto")
         btn_conferir.setToolTip("Iniciar conferência")
@@ -334,14 +343,17 @@ class BuscaWindow(QMainWindow):
         """)
         btn_conferir.clicked.connect(lambda: self.iniciar_conferencia_manifesto(manifesto_id))
         
-        layout.addWidget(btn_detalhes)
         layout.addWidget(btn_conferir)
         
         widget.setLayout(layout)
         return widget
         
-    def criar_acoes_volume(self, volume_id, quantidade_expedida, quantidade_recebida, manifesto_id):
-        """Cria os botões de ação para um volume"""
+    def criar_acoes_volume(self, volume_id, quantidade_expedida, quantidade_recebida, manifesto_id,
+                           arquivado=False):
+        """Cria os botões de ação para um volume (arquivado: só os detalhes do manifesto)"""
+        if arquivado:
+            return self.criar_acoes_manifesto(manifesto_id, arquivado=True)
+        
         widget = QWidget()
         layout = QHBoxLayout(widget)
         layout.setContentsMargins(5, 2, 5, 2)
@@ -417,7 +429,7 @@ class BuscaWindow(QMainWindow):
         """Busca manifestos com os filtros aplicados - VERSÃO SIMPLIFICADA E FUNCIONAL"""
         try:
             # Obter TODOS os manifestos primeiro
-            todos_manifestos = listar_manifestos()
+            todos_manifestos = listar_manifestos(incluir_arquivados=self.chk_arquivados.isChecked())
             
             if not todos_manifestos:
                 self.tabela_manifestos.setRowCount(0)
@@ -551,7 +563,7 @@ class BuscaWindow(QMainWindow):
             self.tabela_manifestos.setItem(i, 5, item_caixas)
             
             # Ações
-            acoes = self.criar_acoes_manifesto(manifesto['id'])
+            acoes = self.criar_acoes_manifesto(manifesto['id'], manifesto.get('arquivado'))
             self.tabela_manifestos.setCellWidget(i, 6, acoes)
     
     def buscar_volumes_em_tempo_real(self):
@@ -571,23 +583,12 @@ class BuscaWindow(QMainWindow):
             
             print(f"DEBUG - Buscando volumes com: '{numero_busca}'")
             
-            # Buscar em todos os manifestos
-            todos_manifestos = listar_manifestos()
-            volumes_encontrados = []
-            
-            for manifesto in todos_manifestos:
-                try:
-                    volumes = listar_volumes(manifesto['id'])
-                    for volume in volumes:
-                        # Buscar por correspondência parcial no número do volume
-                        if numero_busca.upper() in volume['numero_volume'].upper():
-                            volumes_encontrados.append({
-                                'volume': volume,
-                                'manifesto': manifesto
-                            })
-                except Exception as e:
-                    print(f"Erro ao buscar volumes do manifesto {manifesto['id']}: {e}")
-                    continue
+            # Uma consulta para todos os manifestos (LIKE ignora maiúsculas/minúsculas)
+            volumes_encontrados = [
+                {'volume': volume, 'manifesto': volume}
+                for volume in buscar_volumes_por_numero(
+                    numero_busca, incluir_arquivados=self.chk_volumes_arquivados.isChecked())
+            ]
             
             print(f"DEBUG - Volumes encontrados: {len(volumes_encontrados)}")
             
@@ -654,7 +655,8 @@ class BuscaWindow(QMainWindow):
                     volume['id'], 
                     volume['quantidade_expedida'], 
                     volume['quantidade_recebida'],
-                    volume['manifesto_id']
+                    volume['manifesto_id'],
+                    volume['arquivado']
                 )
                 self.tabela_volumes.setCellWidget(i, 7, acoes)
             
@@ -683,7 +685,7 @@ class BuscaWindow(QMainWindow):
     def iniciar_conferencia_manifesto(self, manifesto_id):
         """Inicia a conferência de um manifesto diretamente da busca"""
         try:
-            from ui.conferencia_window import ConferenciaWindow
+            from src.ui.conferencia_window import ConferenciaWindow
             
             # Verificar se já existe uma janela de conferência aberta para este manifesto
             if manifesto_id in self.conferencia_windows:
@@ -822,11 +824,11 @@ class BuscaWindow(QMainWindow):
             )
             
             
-    def ver_detalhes_manifesto(self, manifesto_id: int):
+    def ver_detalhes_manifesto(self, manifesto_id: int, arquivado: bool = False):
         """Abre os detalhes do manifesto"""
         try:
             from .detalhes_manifesto_dialog import DetalhesManifestoDialog
-            dialog = DetalhesManifestoDialog(manifesto_id, self)
+            dialog = DetalhesManifestoDialog(manifesto_id, self, arquivado=arquivado)
             dialog.exec_()
         except Exception as e:
             QMessageBox.critical(
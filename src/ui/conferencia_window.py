@@ -19,6 +19,7 @@ from src.database import (obter_manifesto, buscar_volume, obter_caixas,
                           obter_estatisticas_manifesto, listar_volumes,
                           registrar_log)
 from src.pdf_extractor import ManifestoExtractor
+from src import manutencao
 
 
 class ConferenciaWindow(QMainWindow):
@@ -33,6 +34,7 @@ class ConferenciaWindow(QMainWindow):
         self.conferencia_ativa = False
         self.volume_encontrado = None
         self.usuario_conferente = ""
+        manutencao.conferencia_aberta(manifesto_id)  # Manutenção do banco espera a janela fechar
         self.init_ui()
         self.carregar_manifesto()
         self.showMaximized()  # Abre em tela cheia
@@ -851,6 +853,11 @@ Status dos volumes:
         
         self.lbl_detalhes_stats.setText(detalhes)
         
+    def closeEvent(self, event):
+        """Libera a manutenção do banco ao fechar a janela"""
+        manutencao.conferencia_fechada(self.manifesto_id)
+        super().closeEvent(event)
+        
     def iniciar_conferencia_handler(self):
         """Inicia a conferência"""
         # Solicitar nome do conferente
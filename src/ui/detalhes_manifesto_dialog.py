@@ -5,31 +5,34 @@ Arquivo: src/ui/detalhes_manifesto_dialog.py
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QTableWidget, QTableWidgetItem,
-                             QGroupBox, QHeaderView, QTextEdit, QTabWidget,
-                             QWidget, QMessageBox, QFileDialog, QToolTip)
-from PyQt5.QtCore import Qt
+                             QGroupBox, QHeaderView, QTabWidget,
+                             QWidget, QMessageBox, QToolTip)
+from PyQt5.QtCore import Qt, QEvent
 from PyQt5.QtGui import QFont, QColor
 from datetime import datetime
-import csv
 
-from src.database import (obter_manifesto, listar_volumes, obter_caixas,
-                          obter_estatisticas_manifesto, obter_logs)
+from src.database import (obter_manifesto, listar_volumes_com_caixas,
+                          obter_estatisticas_manifesto)
+from src.ui.exportacao_dialog import ExportacaoDialog
+from src.ui.historico_widget import HistoricoWidget
 
 
 class DetalhesManifestoDialog(QDialog):
     """Diálogo para exibir detalhes completos de um manifesto"""
     
-    def __init__(self, manifesto_id: int, parent=None):
+    def __init__(self, manifesto_id: int, parent=None, arquivado: bool = False):
         super().__init__(parent)
         self.manifesto_id = manifesto_id
-        self.manifesto = obter_manifesto(manifesto_id)
-        self.volume_ids = []  # Para armazenar os IDs dos volumes na ordem da tabela
+        self.arquivado = arquivado  # Manifesto do arquivo histórico (somente consulta)
+        self.manifesto = obter_manifesto(manifesto_id, arquivado)
+        self.volumes = []  # Volumes na ordem da tabela (com o estado das caixas)
+        self.abas_carregadas = set()
         self.init_ui()
         self.carregar_dados()
         
     def init_ui(self):
         """Inicializa a interface"""
-        self.setWindowTitle("Detalhes do Manifesto")
+        self.setWindowTitle("Detalhes do Manifesto" + (" (arquivado)" if self.arquivado else ""))
         self.setModal(True)
         self.setMinimumSize(1000, 600)  # Aumentado para acomodar nova coluna
         
@@ -39,8 +42,8 @@ class DetalhesManifestoDialog(QDialog):
         # Cabeçalho
         self.criar_cabecalho(layout)
         
-        # Tabs
-        tabs = QTabWidget()
+        # Tabs (estatísticas e histórico só são lidos quando a aba é aberta)
+        self.tabs = tabs = QTabWidget()
         
         # Tab 1: Volumes
         tab_volumes = QWidget()
@@ -57,6 +60,7 @@ class DetalhesManifestoDialog(QDialog):
         self.criar_tab_logs(tab_logs)
         tabs.addTab(tab_logs, "📝 Histórico")
         
+        tabs.currentChanged.connect(self.carregar_aba)
         layout.addWidget(tabs)
         
         # Botões
@@ -215,6 +219,9 @@ class DetalhesManifestoDialog(QDialog):
         # Conectar o clique na tabela
         self.tabela_volumes.cellClicked.connect(self.on_volume_clicked)
         
+        # Tooltip das caixas montado só quando o mouse para sobre a célula
+        self.tabela_volumes.viewport().installEventFilter(self)
+        
         layout.addWidget(self.tabela_volumes)
         
     def criar_tab_estatisticas(self, tab):
@@ -237,34 +244,30 @@ class DetalhesManifestoDialog(QDialog):
         """Cria a tab de logs"""
         layout = QVBoxLayout(tab)
         
-        self.txt_logs = QTextEdit()
-        self.txt_logs.setReadOnly(True)
-        self.txt_logs.setStyleSheet("""
-            font-family: 'Courier New', monospace;
-            font-size: 11px;
-        """)
-        # Permitir seleção e cópia
-        self.txt_logs.setTextInteractionFlags(Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard)
-        
-        layout.addWidget(self.txt_logs)
+        self.historico = HistoricoWidget(self.manifesto_id, arquivado=self.arquivado)
+        layout.addWidget(self.historico)
         
     def carregar_dados(self):
-        """Carrega todos os dados do manifesto"""
-        self.carregar_volumes()
-        self.carregar_estatisticas()
-        self.carregar_logs()
+        """Carrega a aba visível; as demais são carregadas quando abertas"""
+        self.abas_carregadas.clear()
+        self.carregar_aba(self.tabs.currentIndex())
+        
+    def carregar_aba(self, indice: int):
+        """Carrega a aba na primeira vez em que é exibida"""
+        if indice in self.abas_carregadas:
+            return
+        self.abas_carregadas.add(indice)
+        carregar = [self.carregar_volumes, self.carregar_estatisticas, self.carregar_logs][indice]
+        carregar()
         
     def carregar_volumes(self):
-        """Carrega a lista de volumes"""
-        volumes = listar_volumes(self.manifesto_id)
-        self.volume_ids = []  # Resetar a lista de IDs
+        """Carrega a lista de volumes (uma consulta, já com as caixas)"""
+        self.volumes = volumes = listar_volumes_com_caixas(self.manifesto_id, self.arquivado)
         
+        self.tabela_volumes.setUpdatesEnabled(False)
         self.tabela_volumes.setRowCount(len(volumes))
         
         for i, volume in enumerate(volumes):
-            # Armazenar o ID do volume para referência
-            self.volume_ids.append(volume['id'])
-            
             # Status
             status = volume['status']
             emoji = {
@@ -315,17 +318,6 @@ class DetalhesManifestoDialog(QDialog):
             item_caixas = QTableWidgetItem(caixas_texto)
             item_caixas.setTextAlignment(Qt.AlignCenter)
             item_caixas.setBackground(cor)
-            
-            # Adicionar tooltip para mostrar números das caixas quando houver mais de uma
-            if volume['quantidade_expedida'] > 1:
-                caixas = obter_caixas(volume['id'])
-                if caixas:
-                    # CORREÇÃO: Converter números para string antes do join
-                    caixas_recebidas = [str(c['numero_caixa']) for c in caixas if c.get('status') == 'RECEBIDA']
-                    if caixas_recebidas:
-                        tooltip_text = f"Caixas recebidas: {', '.join(caixas_recebidas)}"
-                        item_caixas.setToolTip(tooltip_text)
-            
             self.tabela_volumes.setItem(i, 4, item_caixas)
             
             # Peso
@@ -368,22 +360,45 @@ class DetalhesManifestoDialog(QDialog):
             item_recebido_por.setBackground(cor)
             self.tabela_volumes.setItem(i, 8, item_recebido_por)
         
+        self.tabela_volumes.setUpdatesEnabled(True)
+        
+    @staticmethod
+    def _numeros_caixas(texto) -> list:
+        """'3,1,2' (GROUP_CONCAT) -> ['1', '2', '3']"""
+        if not texto:
+            return []
+        return [str(n) for n in sorted(int(n) for n in texto.split(','))]
+        
+    def eventFilter(self, obj, event):
+        """Mostra as caixas recebidas ao parar o mouse na coluna Caixas"""
+        if event.type() == QEvent.ToolTip and obj is self.tabela_volumes.viewport():
+            indice = self.tabela_volumes.indexAt(event.pos())
+            texto = ""
+            if indice.isValid() and indice.column() == 4:
+                volume = self.volumes[indice.row()]
+                if volume['quantidade_expedida'] > 1:
+                    caixas_recebidas = self._numeros_caixas(volume['caixas_recebidas'])
+                    if caixas_recebidas:
+                        texto = f"Caixas recebidas: {', '.join(caixas_recebidas)}"
+            if texto:
+                QToolTip.showText(event.globalPos(), texto, obj)
+            else:
+                QToolTip.hideText()
+            return True
+        return super().eventFilter(obj, event)
+        
     def on_volume_clicked(self, row, column):
         """Trata o clique em uma linha da tabela de volumes"""
-        if row < 0 or row >= len(self.volume_ids):
+        if row < 0 or row >= len(self.volumes):
             return
             
-        volume_id = self.volume_ids[row]
-        volume = listar_volumes(self.manifesto_id)[row]
+        volume = self.volumes[row]
         
         # Verificar se o volume tem mais de uma caixa
         if volume['quantidade_expedida'] > 1:
-            caixas = obter_caixas(volume_id)
-            if caixas:
-                # CORREÇÃO: Converter números para string antes do join
-                caixas_recebidas = [str(c['numero_caixa']) for c in caixas if c.get('status') == 'RECEBIDA']
-                caixas_faltantes = [str(c['numero_caixa']) for c in caixas if c.get('status') != 'RECEBIDA']
-                
+            caixas_recebidas = self._numeros_caixas(volume['caixas_recebidas'])
+            caixas_faltantes = self._numeros_caixas(volume['caixas_faltantes'])
+            if caixas_recebidas or caixas_faltantes:
                 mensagem = f"Volume: {volume['numero_volume']}\n\n"
                 
                 if caixas_recebidas:
@@ -400,7 +415,7 @@ class DetalhesManifestoDialog(QDialog):
         
     def carregar_estatisticas(self):
         """Carrega as estatísticas do manifesto"""
-        stats = obter_estatisticas_manifesto(self.manifesto_id)
+        stats = obter_estatisticas_manifesto(self.manifesto_id, self.arquivado)
         
         total_vol = stats['total_volumes'] or 0
         exp = stats['total_caixas_expedidas'] or 0
@@ -447,92 +462,13 @@ class DetalhesManifestoDialog(QDialog):
         self.lbl_estatisticas.setText(texto)
         
     def carregar_logs(self):
-        """Carrega o histórico de logs"""
-        logs = obter_logs(self.manifesto_id)
-        
-        if not logs:
-            self.txt_logs.setText("Nenhum log registrado.")
-            return
-        
-        texto = "=" * 80 + "\n"
-        texto += "HISTÓRICO DE AÇÕES DO MANIFESTO\n"
-        texto += "=" * 80 + "\n\n"
-        
-        for log in logs:
-            timestamp = log['timestamp'][:19]
-            acao = log['acao']
-            usuario = log['usuario'] or 'Sistema'
-            detalhes = log['detalhes'] or ''
-            
-            texto += f"[{timestamp}] {usuario}\n"
-            texto += f"  AÇÃO: {acao}\n"
-            if detalhes:
-                texto += f"  DETALHES: {detalhes}\n"
-            texto += "\n" + "-" * 80 + "\n\n"
-        
-        self.txt_logs.setText(texto)
+        """Carrega o histórico de logs (paginado, conforme a tabela rola)"""
+        self.historico.carregar()
         
     def exportar_excel(self):
-        """Exporta os dados para CSV (Excel)"""
-        arquivo, _ = QFileDialog.getSaveFileName(
-            self,
-            "Salvar Relatório",
-            f"manifesto_{self.manifesto['numero_manifesto']}.csv",
-            "CSV Files (*.csv)"
-        )
-        
-        if not arquivo:
-            return
-        
-        try:
-            volumes = listar_volumes(self.manifesto_id)
-            
-            with open(arquivo, 'w', newline='', encoding='utf-8-sig') as f:
-                writer = csv.writer(f, delimiter=';')
-                
-                # Cabeçalho do manifesto
-                writer.writerow(['MANIFESTO', self.manifesto['numero_manifesto']])
-                writer.writerow(['Data', self.manifesto['data_manifesto']])
-                writer.writerow(['Origem', self.manifesto['terminal_origem']])
-                writer.writerow(['Destino', self.manifesto['terminal_destino']])
-                writer.writerow(['Status', self.manifesto['status']])
-                writer.writerow([])
-                
-                # Cabeçalho dos volumes
-                writer.writerow([
-                    'Status', 'Remetente', 'Destinatário', 'N° Volume',
-                    'Qtd Expedida', 'Qtd Recebida', 'Peso (kg)', 'Cubagem (m³)',
-                    'Prioridade', 'Data Recebimento', 'Recebido por'  # Adicionado Recebido por
-                ])
-                
-                # Dados dos volumes
-                for volume in volumes:
-                    writer.writerow([
-                        volume['status'],
-                        volume['remetente'],
-                        volume['destinatario'],
-                        volume['numero_volume'],
-                        volume['quantidade_expedida'],
-                        volume['quantidade_recebida'],
-                        volume['peso_total'] or '',
-                        volume['cubagem'] or '',
-                        volume['prioridade'] or '',
-                        volume['data_hora_primeira_recepcao'] or '',
-                        volume.get('usuario_recepcao', '')  # Adicionado Recebido por
-                    ])
-            
-            QMessageBox.information(
-                self,
-                "Sucesso",
-                f"Relatório exportado com sucesso!\n{arquivo}"
-            )
-            
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Erro",
-                f"Erro ao exportar relatório:\n{str(e)}"
-            )
+        """Exporta os volumes do manifesto (CSV ou XLSX) em segundo plano"""
+        dialog = ExportacaoDialog(self, manifesto=self.manifesto)
+        dialog.exec_()
     
     def _formatar_status(self, status: str) -> str:
         """Formata o status para exibição"""
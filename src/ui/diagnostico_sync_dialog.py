@@ -0,0 +1,191 @@
+"""
+Sistema de Conferência de Manifestos - Diagnóstico da Sincronização
+Arquivo: src/ui/diagnostico_sync_dialog.py
+"""
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QGroupBox, QFormLayout, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QMessageBox)
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QFont
+
+from src import feed
+from src.database import obter_metricas_sync, listar_falhas_outbox, reenviar_falhas_outbox
+
+# Atraso a partir do qual a planilha é considerada atrasada (segundos)
+ATRASO_ALERTA = 300
+
+
+def formatar_duracao(segundos) -> str:
+    """45 s, 3 min, 2 h 05 min"""
+    if segundos is None:
+        return "-"
+    segundos = int(segundos)
+    if segundos < 60:
+        return f"{segundos} s"
+    if segundos < 3600:
+        return f"{segundos // 60} min"
+    return f"{segundos // 3600} h {segundos % 3600 // 60:02d} min"
+
+
+def resumo_sync(metricas: dict) -> str:
+    """Texto curto para a barra de status da janela principal"""
+    estado = metricas.get('estado')
+    if estado == 'desativada':
+        return "☁️ Planilha: desativada"
+
+    pendentes = metricas['PENDENTE']
+    if estado == 'aguardando credenciais':
+        texto = f"☁️ Planilha: sem credenciais ({pendentes} pendente(s))"
+    elif pendentes == 0 and not metricas.get('fila'):
+        texto = "☁️ Planilha: em dia"
+    else:
+        atraso = metricas.get('idade_pendente')
+        icone = "⏳" if atraso is not None and atraso >= ATRASO_ALERTA else "☁️"
+        texto = f"{icone} Planilha: {pendentes} pendente(s), atraso {formatar_duracao(atraso)}"
+
+    if metricas['FALHA']:
+        texto += f" | ⚠️ {metricas['FALHA']} falha(s)"
+    return texto
+
+
+class DiagnosticoSyncDialog(QDialog):
+    """Métricas da sincronização com o Google Sheets, atualizadas a cada 2 segundos"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.init_ui()
+        self.atualizar()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.atualizar)
+        self.timer.start(2000)
+
+    def init_ui(self):
+        """Inicializa a interface"""
+        self.setWindowTitle("Diagnóstico da Sincronização")
+        self.setMinimumWidth(650)
+
+        layout = QVBoxLayout(self)
+
+        titulo = QLabel("☁️ Sincronização com o Google Sheets")
+        font = QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        titulo.setFont(font)
+        layout.addWidget(titulo)
+
+        # Situação atual
+        group_fila = QGroupBox("Fila")
+        form_fila = QFormLayout()
+        self.lbl_estado = QLabel()
+        self.lbl_pendentes = QLabel()
+        self.lbl_idade = QLabel()
+        self.lbl_fila = QLabel()
+        self.lbl_falhas = QLabel()
+        form_fila.addRow("Estado:", self.lbl_estado)
+        form_fila.addRow("Eventos pendentes:", self.lbl_pendentes)
+        form_fila.addRow("Pendente mais antigo:", self.lbl_idade)
+        form_fila.addRow("Linhas na fila / em envio:", self.lbl_fila)
+        form_fila.addRow("Eventos em falha:", self.lbl_falhas)
+        group_fila.setLayout(form_fila)
+        layout.addWidget(group_fila)
+
+        # Desde a abertura do programa
+        group_api = QGroupBox("API (desde a abertura do programa)")
+        form_api = QFormLayout()
+        self.lbl_chamadas = QLabel()
+        self.lbl_retentativas = QLabel()
+        self.lbl_enviados = QLabel()
+        self.lbl_sucesso = QLabel()
+        self.lbl_erro = QLabel()
+        self.lbl_erro.setWordWrap(True)
+        form_api.addRow("Chamadas (último minuto / total):", self.lbl_chamadas)
+        form_api.addRow("Retentativas / respostas 429:", self.lbl_retentativas)
+        form_api.addRow("Eventos enviados / com erro:", self.lbl_enviados)
+        form_api.addRow("Último envio com sucesso:", self.lbl_sucesso)
+        form_api.addRow("Último erro:", self.lbl_erro)
+        group_api.setLayout(form_api)
+        layout.addWidget(group_api)
+
+        # Eventos que esgotaram as tentativas
+        group_falhas = QGroupBox("Eventos em falha")
+        falhas_layout = QVBoxLayout()
+        self.tabela_falhas = QTableWidget()
+        self.tabela_falhas.setColumnCount(4)
+        self.tabela_falhas.setHorizontalHeaderLabels(["Manifesto", "Tipo", "Tentativas", "Erro"])
+        self.tabela_falhas.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.tabela_falhas.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabela_falhas.verticalHeader().setVisible(False)
+        falhas_layout.addWidget(self.tabela_falhas)
+        group_falhas.setLayout(falhas_layout)
+        layout.addWidget(group_falhas)
+
+        # Demais destinos do feed de alterações
+        group_sinks = QGroupBox("Outros destinos (feed de alterações)")
+        sinks_layout = QVBoxLayout()
+        self.tabela_sinks = QTableWidget()
+        self.tabela_sinks.setColumnCount(5)
+        self.tabela_sinks.setHorizontalHeaderLabels(["Nome", "Tipo", "Atraso (eventos)",
+                                                     "Última entrega", "Erro"])
+        self.tabela_sinks.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        self.tabela_sinks.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabela_sinks.verticalHeader().setVisible(False)
+        sinks_layout.addWidget(self.tabela_sinks)
+        group_sinks.setLayout(sinks_layout)
+        layout.addWidget(group_sinks)
+
+        # Botões
+        btn_layout = QHBoxLayout()
+        self.btn_reenviar = QPushButton("🔁 Reenviar falhas")
+        self.btn_reenviar.clicked.connect(self.reenviar_falhas)
+        btn_layout.addWidget(self.btn_reenviar)
+        btn_layout.addStretch()
+
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.accept)
+        btn_layout.addWidget(btn_fechar)
+        layout.addLayout(btn_layout)
+
+    def atualizar(self):
+        """Relê as métricas e os eventos em falha"""
+        try:
+            metricas = obter_metricas_sync()
+            falhas = listar_falhas_outbox(50) if metricas['FALHA'] else []
+        except Exception as e:
+            self.lbl_estado.setText(f"Erro ao ler métricas: {e}")
+            return
+
+        self.lbl_estado.setText(metricas.get('estado', '-'))
+        self.lbl_pendentes.setText(str(metricas['PENDENTE']))
+        self.lbl_idade.setText(formatar_duracao(metricas.get('idade_pendente')))
+        self.lbl_fila.setText(f"{metricas.get('fila', 0)} / {metricas.get('em_envio', 0)}")
+        self.lbl_falhas.setText(str(metricas['FALHA']))
+        self.lbl_chamadas.setText(f"{metricas.get('chamadas_por_minuto', 0)} / {metricas.get('chamadas', 0)}")
+        self.lbl_retentativas.setText(f"{metricas.get('retentativas', 0)} / {metricas.get('respostas_429', 0)}")
+        self.lbl_enviados.setText(f"{metricas.get('eventos_enviados', 0)} / {metricas.get('eventos_com_erro', 0)}")
+        self.lbl_sucesso.setText(metricas.get('ultimo_sucesso') or "-")
+        self.lbl_erro.setText(metricas.get('ultimo_erro') or "-")
+
+        self.tabela_falhas.setRowCount(len(falhas))
+        for row, falha in enumerate(falhas):
+            self.tabela_falhas.setItem(row, 0, QTableWidgetItem(falha['numero_manifesto']))
+            self.tabela_falhas.setItem(row, 1, QTableWidgetItem(falha['tipo']))
+            self.tabela_falhas.setItem(row, 2, QTableWidgetItem(str(falha['tentativas'])))
+            self.tabela_falhas.setItem(row, 3, QTableWidgetItem(falha['ultimo_erro'] or ""))
+        self.btn_reenviar.setEnabled(bool(falhas))
+
+        sinks = feed.status_sinks()
+        self.tabela_sinks.setRowCount(len(sinks))
+        for row, sink in enumerate(sinks):
+            self.tabela_sinks.setItem(row, 0, QTableWidgetItem(sink['nome']))
+            self.tabela_sinks.setItem(row, 1, QTableWidgetItem(sink['tipo']))
+            self.tabela_sinks.setItem(row, 2, QTableWidgetItem(str(sink.get('atraso_eventos', '-'))))
+            self.tabela_sinks.setItem(row, 3, QTableWidgetItem(sink['ultima_entrega'] or "-"))
+            self.tabela_sinks.setItem(row, 4, QTableWidgetItem(sink['ultimo_erro'] or ""))
+
+    def reenviar_falhas(self):
+        """Devolve os eventos em falha para a fila"""
+        reenviados = reenviar_falhas_outbox()
+        QMessageBox.information(self, "Reenvio", f"{reenviados} evento(s) devolvido(s) para a fila.")
+        self.atualizar()
@@ -0,0 +1,201 @@
+"""
+Sistema de Conferência de Manifestos - Diálogo de Exportação
+Arquivo: src/ui/exportacao_dialog.py
+"""
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QGroupBox, QFormLayout, QComboBox,
+                             QLineEdit, QDateEdit, QCheckBox, QProgressBar,
+                             QMessageBox, QFileDialog)
+from PyQt5.QtCore import QDate, QTimer
+from PyQt5.QtGui import QFont
+
+from src.exportacao import (Exportacao, FORMATOS, XLSX_DISPONIVEL, CONCLUIDA,
+                            CANCELADA, formato_do_arquivo)
+
+STATUS_MANIFESTO = ['NÃO RECEBIDO', 'PARCIALMENTE RECEBIDO', 'TOTALMENTE RECEBIDO']
+STATUS_VOLUME = ['COMPLETO', 'PARCIAL', 'NÃO RECEBIDO', 'VOLUME EXTRA']
+
+
+class ExportacaoDialog(QDialog):
+    """
+    Exporta volumes para CSV/XLSX em segundo plano, com progresso e cancelamento.
+    Com um manifesto, exporta só ele; sem, por período e filtros.
+    """
+
+    def __init__(self, parent=None, manifesto: dict = None):
+        super().__init__(parent)
+        self.manifesto = manifesto
+        self.exportacao = None
+        self.init_ui()
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.atualizar_progresso)
+
+    def init_ui(self):
+        """Inicializa a interface"""
+        self.setWindowTitle("Exportar Relatório")
+        self.setMinimumWidth(480)
+
+        layout = QVBoxLayout(self)
+
+        titulo = QLabel("📄 Exportar Relatório de Volumes")
+        font = QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        titulo.setFont(font)
+        layout.addWidget(titulo)
+
+        # O que exportar
+        group_filtro = QGroupBox("Volumes")
+        form = QFormLayout()
+        if self.manifesto:
+            form.addRow("Manifesto:", QLabel(self.manifesto['numero_manifesto']))
+        else:
+            periodo_layout = QHBoxLayout()
+            self.chk_periodo = QCheckBox("De")
+            self.chk_periodo.setChecked(True)
+            hoje = QDate.currentDate()
+            self.date_inicio = QDateEdit(QDate(hoje.year(), hoje.month(), 1))
+            self.date_inicio.setCalendarPopup(True)
+            self.date_fim = QDateEdit(hoje)
+            self.date_fim.setCalendarPopup(True)
+            self.chk_periodo.toggled.connect(self.date_inicio.setEnabled)
+            self.chk_periodo.toggled.connect(self.date_fim.setEnabled)
+            periodo_layout.addWidget(self.chk_periodo)
+            periodo_layout.addWidget(self.date_inicio)
+            periodo_layout.addWidget(QLabel("até"))
+            periodo_layout.addWidget(self.date_fim)
+            form.addRow("Período:", periodo_layout)
+
+            self.combo_status = QComboBox()
+            self.combo_status.addItems(["Todos"] + STATUS_MANIFESTO)
+            form.addRow("Status do manifesto:", self.combo_status)
+
+        self.combo_status_volume = QComboBox()
+        self.combo_status_volume.addItems(["Todos"] + STATUS_VOLUME)
+        form.addRow("Status do volume:", self.combo_status_volume)
+
+        self.txt_remetente = QLineEdit()
+        self.txt_remetente.setPlaceholderText("Trecho do nome (opcional)")
+        form.addRow("Remetente:", self.txt_remetente)
+
+        self.combo_formato = QComboBox()
+        self.combo_formato.addItem(FORMATOS['csv'], 'csv')
+        if XLSX_DISPONIVEL:
+            self.combo_formato.addItem(FORMATOS['xlsx'], 'xlsx')
+        form.addRow("Formato:", self.combo_formato)
+
+        group_filtro.setLayout(form)
+        layout.addWidget(group_filtro)
+
+        # Progresso
+        self.barra = QProgressBar()
+        self.barra.setValue(0)
+        layout.addWidget(self.barra)
+        self.lbl_progresso = QLabel("")
+        layout.addWidget(self.lbl_progresso)
+
+        # Botões
+        btn_layout = QHBoxLayout()
+        self.btn_exportar = QPushButton("📄 Exportar")
+        self.btn_exportar.clicked.connect(self.exportar)
+        btn_layout.addWidget(self.btn_exportar)
+
+        self.btn_cancelar = QPushButton("Cancelar exportação")
+        self.btn_cancelar.setEnabled(False)
+        self.btn_cancelar.clicked.connect(self.cancelar)
+        btn_layout.addWidget(self.btn_cancelar)
+        btn_layout.addStretch()
+
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.reject)
+        btn_layout.addWidget(btn_fechar)
+        layout.addLayout(btn_layout)
+
+    def filtros(self) -> dict:
+        """Filtros escolhidos, no formato de Exportacao"""
+        filtros = {}
+        if self.manifesto:
+            filtros['manifesto_id'] = self.manifesto['id']
+        else:
+            if self.chk_periodo.isChecked():
+                filtros['data_inicio'] = self.date_inicio.date().toString("yyyy-MM-dd")
+                filtros['data_fim'] = self.date_fim.date().toString("yyyy-MM-dd")
+            if self.combo_status.currentIndex() > 0:
+                filtros['status'] = self.combo_status.currentText()
+        if self.combo_status_volume.currentIndex() > 0:
+            filtros['status_volume'] = self.combo_status_volume.currentText()
+        if self.txt_remetente.text().strip():
+            filtros['remetente'] = self.txt_remetente.text().strip()
+        return filtros
+
+    def _nome_sugerido(self, formato: str) -> str:
+        if self.manifesto:
+            return f"manifesto_{self.manifesto['numero_manifesto']}.{formato}"
+        return f"volumes_{QDate.currentDate().toString('yyyy-MM-dd')}.{formato}"
+
+    def exportar(self):
+        """Pede o arquivo e inicia a exportação em segundo plano"""
+        formato = self.combo_formato.currentData()
+        arquivo, _ = QFileDialog.getSaveFileName(
+            self,
+            "Salvar Relatório",
+            self._nome_sugerido(formato),
+            FORMATOS[formato]
+        )
+        if not arquivo:
+            return
+        if formato_do_arquivo(arquivo) != formato:
+            arquivo += f".{formato}"
+
+        try:
+            self.exportacao = Exportacao(arquivo, formato, **self.filtros())
+            self.exportacao.iniciar()
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao exportar relatório:\n{str(e)}")
+            return
+
+        self.btn_exportar.setEnabled(False)
+        self.btn_cancelar.setEnabled(True)
+        self.barra.setValue(0)
+        self.lbl_progresso.setText("Contando volumes...")
+        self.timer.start(200)
+
+    def atualizar_progresso(self):
+        """Acompanha a exportação em andamento"""
+        exportacao = self.exportacao
+        self.barra.setValue(exportacao.percentual)
+        if exportacao.total is not None:
+            self.lbl_progresso.setText(f"{exportacao.exportadas} de {exportacao.total} volume(s)")
+        if exportacao.em_andamento:
+            return
+
+        self.timer.stop()
+        self.btn_exportar.setEnabled(True)
+        self.btn_cancelar.setEnabled(False)
+        if exportacao.estado == CONCLUIDA:
+            self.lbl_progresso.setText(f"{exportacao.exportadas} volume(s) exportado(s)")
+            QMessageBox.information(
+                self,
+                "Sucesso",
+                f"Relatório exportado com sucesso!\n{exportacao.caminho}"
+            )
+        elif exportacao.estado == CANCELADA:
+            self.lbl_progresso.setText("Exportação cancelada")
+        else:
+            self.lbl_progresso.setText("Erro na exportação")
+            QMessageBox.critical(self, "Erro", f"Erro ao exportar relatório:\n{exportacao.erro}")
+
+    def cancelar(self):
+        if self.exportacao and self.exportacao.em_andamento:
+            self.exportacao.cancelar()
+            self.lbl_progresso.setText("Cancelando...")
+
+    def reject(self):
+        """Fechar a janela cancela uma exportação em andamento"""
+        if self.exportacao and self.exportacao.em_andamento:
+            self.exportacao.cancelar()
+            self.exportacao.aguardar(5)
+        self.timer.stop()
+        super().reject()
@@ -0,0 +1,169 @@
+"""
+Sistema de Conferência de Manifestos - Histórico (logs) do Manifesto
+Arquivo: src/ui/historico_widget.py
+"""
+
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+                             QComboBox, QLineEdit, QTableView, QHeaderView)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+
+from src.database import obter_logs, obter_filtros_logs
+
+TAMANHO_PAGINA = 200
+COLUNAS = ["Data/Hora", "Usuário", "Ação", "Detalhes"]
+
+
+class ModeloLogs(QAbstractTableModel):
+    """
+    Logs de um manifesto, buscados do banco em páginas conforme a tabela rola
+    (canFetchMore/fetchMore). Só as páginas já vistas ficam em memória.
+    """
+
+    def __init__(self, manifesto_id: int, parent=None, arquivado: bool = False):
+        super().__init__(parent)
+        self.manifesto_id = manifesto_id
+        self.arquivado = arquivado
+        self.filtros = {}
+        self.logs = []
+        self.fim = True
+
+    def recarregar(self, **filtros):
+        """Volta para a primeira página com os filtros dados (acao, usuario, busca)"""
+        self.beginResetModel()
+        self.filtros = filtros
+        self.logs = []
+        self.fim = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.logs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUNAS)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.fim
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.fim:
+            return
+        antes_de = (self.logs[-1]['timestamp'], self.logs[-1]['id']) if self.logs else None
+        pagina = obter_logs(self.manifesto_id, limite=TAMANHO_PAGINA, antes_de=antes_de,
+                            arquivado=self.arquivado, **self.filtros)
+        self.fim = len(pagina) < TAMANHO_PAGINA
+        if pagina:
+            self.beginInsertRows(QModelIndex(), len(self.logs), len(self.logs) + len(pagina) - 1)
+            self.logs.extend(pagina)
+            self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        log = self.logs[index.row()]
+        coluna = index.column()
+        if role == Qt.DisplayRole:
+            if coluna == 0:
+                return (log['timestamp'] or '')[:19]
+            if coluna == 1:
+                return log['usuario'] or 'Sistema'
+            if coluna == 2:
+                return log['acao']
+            return (log['detalhes'] or '').replace('\n', ' ')
+        if role == Qt.ToolTipRole and coluna == 3 and log['detalhes']:
+            return log['detalhes']
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUNAS[section]
+        return None
+
+
+class HistoricoWidget(QWidget):
+    """Tabela do histórico com filtro por ação/usuário e busca por texto"""
+
+    def __init__(self, manifesto_id: int, parent=None, arquivado: bool = False):
+        super().__init__(parent)
+        self.manifesto_id = manifesto_id
+        self.arquivado = arquivado
+        self.modelo = ModeloLogs(manifesto_id, self, arquivado)
+        self.init_ui()
+
+        # Espera o usuário parar de digitar antes de consultar
+        self.timer_busca = QTimer(self)
+        self.timer_busca.setSingleShot(True)
+        self.timer_busca.setInterval(300)
+        self.timer_busca.timeout.connect(self.aplicar_filtros)
+
+    def init_ui(self):
+        """Inicializa a interface"""
+        layout = QVBoxLayout(self)
+
+        filtros_layout = QHBoxLayout()
+        filtros_layout.addWidget(QLabel("Ação:"))
+        self.combo_acao = QComboBox()
+        self.combo_acao.currentIndexChanged.connect(self.aplicar_filtros)
+        filtros_layout.addWidget(self.combo_acao)
+
+        filtros_layout.addWidget(QLabel("Usuário:"))
+        self.combo_usuario = QComboBox()
+        self.combo_usuario.currentIndexChanged.connect(self.aplicar_filtros)
+        filtros_layout.addWidget(self.combo_usuario)
+
+        self.txt_busca = QLineEdit()
+        self.txt_busca.setPlaceholderText("🔍 Buscar no histórico...")
+        self.txt_busca.textChanged.connect(lambda: self.timer_busca.start())
+        filtros_layout.addWidget(self.txt_busca, 1)
+        layout.addLayout(filtros_layout)
+
+        self.tabela = QTableView()
+        self.tabela.setModel(self.modelo)
+        self.tabela.setAlternatingRowColors(True)
+        self.tabela.setSelectionBehavior(QTableView.SelectRows)
+        self.tabela.setWordWrap(False)
+        self.tabela.verticalHeader().setVisible(False)
+        # Altura fixa das linhas: a tabela não precisa medir o conteúdo de cada uma
+        self.tabela.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        header = self.tabela.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.Interactive)
+        header.setSectionResizeMode(3, QHeaderView.Stretch)
+        self.tabela.setColumnWidth(0, 140)
+        self.tabela.setColumnWidth(1, 120)
+        self.tabela.setColumnWidth(2, 200)
+        layout.addWidget(self.tabela)
+
+        self.lbl_total = QLabel()
+        layout.addWidget(self.lbl_total)
+        self.modelo.rowsInserted.connect(self._atualizar_total)
+        self.modelo.modelReset.connect(self._atualizar_total)
+
+    def carregar(self):
+        """Preenche os filtros e a primeira página"""
+        filtros = obter_filtros_logs(self.manifesto_id, self.arquivado)
+        for combo, itens in ((self.combo_acao, filtros['acoes']), (self.combo_usuario, filtros['usuarios'])):
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem("Todos")
+            combo.addItems(itens)
+            combo.blockSignals(False)
+        self.aplicar_filtros()
+
+    def aplicar_filtros(self):
+        filtros = {}
+        if self.combo_acao.currentIndex() > 0:
+            filtros['acao'] = self.combo_acao.currentText()
+        if self.combo_usuario.currentIndex() > 0:
+            filtros['usuario'] = self.combo_usuario.currentText()
+        if self.txt_busca.text().strip():
+            filtros['busca'] = self.txt_busca.text().strip()
+        self.modelo.recarregar(**filtros)
+
+    def _atualizar_total(self, *args):
+        quantidade = self.modelo.rowCount()
+        if quantidade == 0:
+            self.lbl_total.setText("Nenhum log registrado.")
+        elif self.modelo.fim:
+            self.lbl_total.setText(f"{quantidade} registro(s)")
+        else:
+            self.lbl_total.setText(f"{quantidade} registro(s) carregados - role para ver mais")
@@ -8,23 +8,27 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QHeaderView, QMessageBox, QFileDialog, QStatusBar,
                              QAction, QToolBar, QDialog, QInputDialog, QLineEdit,
                              QSpinBox, QFormLayout)
-from PyQt5.QtCore import Qt, QSize
+from PyQt5.QtCore import Qt, QSize, QTimer
 from PyQt5.QtGui import QIcon, QColor, QFont
 from datetime import datetime
 import time
-import sys
-import os
+import threading
 
-# Adiciona o diretório src ao path para importações
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-
-from database import (listar_manifestos, obter_estatisticas_manifesto,
-                      obter_manifesto, adicionar_volume, marcar_volume_recebido,
-                      listar_volumes)
-from pdf_extractor import extrair_manifesto_pdf, criar_manifesto_exemplo
-from ui.novo_manifesto_dialog import NovoManifestoDialog
-from ui.conferencia_window import ConferenciaWindow
-from ui.detalhes_manifesto_dialog import DetalhesManifestoDialog
+from src.database import (listar_manifestos, obter_estatisticas_manifesto,
+                          obter_manifesto, adicionar_volume, marcar_volume_recebido,
+                          listar_volumes, obter_metricas_sync, arquivar_manifestos,
+                          DIAS_ARQUIVAMENTO, ARQUIVO_HISTORICO, estado_armazenamento,
+                          listar_manutencoes, apagar_manifestos)
+from src.pdf_extractor import extrair_manifesto_pdf, criar_manifesto_exemplo
+from src import backup, feed, manutencao
+from src.ingestao import (ServicoIngestao, AGUARDANDO, PROCESSANDO, IMPORTADO,
+                          DUPLICADO, ERRO)
+from src.ui.novo_manifesto_dialog import NovoManifestoDialog
+from src.ui.conferencia_window import ConferenciaWindow
+from src.ui.detalhes_manifesto_dialog import DetalhesManifestoDialog
+from src.ui.exportacao_dialog import ExportacaoDialog
+from src.ui.purga_dialog import PurgaDialog
+from src.ui.diagnostico_sync_dialog import DiagnosticoSyncDialog, resumo_sync, formatar_duracao
 
 # Senha para apagar manifestos
 SENHA_EXCLUSAO = "pitaco"
@@ -35,8 +39,14 @@ class MainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
+        # Impede a restauração de backup enquanto a janela estiver aberta
+        self.trava_uso = backup.travar_uso()
         self.init_ui()
         self.atualizar_tabela()
+        self.iniciar_ingestao()
+        self.iniciar_feed()
+        self.iniciar_status_sync()
+        self.iniciar_manutencao()
         
     def init_ui(self):
         """Inicializa a interface do usuário"""
@@ -187,6 +197,14 @@ class MainWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Sistema pronto")
         
+        # Indicador permanente da fila de importação automática
+        self.lbl_ingestao = QLabel()
+        self.status_bar.addPermanentWidget(self.lbl_ingestao)
+        
+        # Indicador permanente da sincronização com a planilha
+        self.lbl_sync = QLabel()
+        self.status_bar.addPermanentWidget(self.lbl_sync)
+        
     def criar_menu(self):
         """Cria o menu da aplicação"""
         menubar = self.menuBar()
@@ -204,6 +222,23 @@ class MainWindow(QMainWindow):
         acao_busca.setShortcut("Ctrl+F")
         acao_busca.triggered.connect(self.abrir_busca)
         menu_arquivo.addAction(acao_busca)
+
+        acao_exportar = QAction("&Exportar Relatório...", self)
+        acao_exportar.setShortcut("Ctrl+E")
+        acao_exportar.triggered.connect(self.abrir_exportacao)
+        menu_arquivo.addAction(acao_exportar)
+
+        acao_arquivar = QAction("Arquivar &Manifestos Antigos...", self)
+        acao_arquivar.triggered.connect(self.arquivar_manifestos_antigos)
+        menu_arquivo.addAction(acao_arquivar)
+
+        acao_purga = QAction("Apagar Manifestos em &Lote...", self)
+        acao_purga.triggered.connect(self.apagar_manifestos_em_lote)
+        menu_arquivo.addAction(acao_purga)
+
+        acao_backup = QAction("Fazer &Backup do Banco", self)
+        acao_backup.triggered.connect(self.fazer_backup)
+        menu_arquivo.addAction(acao_backup)
         
         menu_arquivo.addSeparator()
         
@@ -220,6 +255,14 @@ class MainWindow(QMainWindow):
         acao_atualizar.triggered.connect(self.atualizar_tabela)
         menu_view.addAction(acao_atualizar)
         
+        acao_diagnostico = QAction("&Diagnóstico da Planilha", self)
+        acao_diagnostico.triggered.connect(self.abrir_diagnostico_sync)
+        menu_view.addAction(acao_diagnostico)
+        
+        acao_manutencao = QAction("&Manutenção do Banco", self)
+        acao_manutencao.triggered.connect(self.mostrar_manutencao)
+        menu_view.addAction(acao_manutencao)
+        
         # Menu Ajuda
         menu_ajuda = menubar.addMenu("&Ajuda")
         
@@ -252,12 +295,84 @@ class MainWindow(QMainWindow):
         
     def abrir_busca(self):
         """Abre janela de busca avançada"""
-        from ui.busca_window import BuscaWindow
+        from src.ui.busca_window import BuscaWindow
         self.busca_window = BuscaWindow(self)
         # ADICIONADO: Conectar sinal para atualização automática
         self.busca_window.volume_recebido.connect(self.atualizar_tabela)
         self.busca_window.show()
         
+    def abrir_exportacao(self):
+        """Exporta volumes de um período ou filtro para CSV/XLSX"""
+        dialog = ExportacaoDialog(self)
+        dialog.exec_()
+        
+    def arquivar_manifestos_antigos(self):
+        """Move manifestos finalizados há mais de N dias para o arquivo histórico"""
+        dias, ok = QInputDialog.getInt(
+            self,
+            "Arquivar Manifestos",
+            "Arquivar manifestos totalmente recebidos e finalizados há mais de quantos dias?\n"
+            f"Eles saem da lista principal, mas continuam na Busca Avançada ({ARQUIVO_HISTORICO}).",
+            DIAS_ARQUIVAMENTO, 1, 3650
+        )
+        if not ok:
+            return
+        
+        try:
+            quantidade = arquivar_manifestos(dias)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao arquivar manifestos:\n{str(e)}")
+            return
+        
+        self.atualizar_tabela()
+        QMessageBox.information(self, "Arquivo", f"{quantidade} manifesto(s) arquivado(s).")
+        
+    def apagar_manifestos_em_lote(self):
+        """Apaga manifestos por período/status, com senha"""
+        senha, ok = QInputDialog.getText(
+            self,
+            "Apagar Manifestos em Lote",
+            "Digite a senha para apagar manifestos:",
+            QLineEdit.Password,
+            ""
+        )
+        if not ok:
+            return
+        if senha != SENHA_EXCLUSAO:
+            QMessageBox.critical(self, "Senha Incorreta", "Senha incorreta! Não é possível apagar manifestos.")
+            return
+        
+        dialog = PurgaDialog(self)
+        dialog.exec_()
+        if dialog.apagados:
+            self.atualizar_tabela()
+        
+    def fazer_backup(self):
+        """Backup online do banco em segundo plano (a conferência continua normalmente)"""
+        if getattr(self, 'backup', None) and self.backup.em_andamento:
+            self.statusBar().showMessage(f"💾 Backup em andamento: {self.backup.percentual}%", 3000)
+            return
+        self.backup = backup.Backup()
+        self.backup.iniciar()
+        self.timer_backup = QTimer(self)
+        self.timer_backup.timeout.connect(self.acompanhar_backup)
+        self.timer_backup.start(500)
+        
+    def acompanhar_backup(self):
+        """Mostra o progresso do backup na barra de status"""
+        if self.backup.em_andamento:
+            self.statusBar().showMessage(f"💾 Backup do banco: {self.backup.percentual}%")
+            return
+        
+        self.timer_backup.stop()
+        if self.backup.estado == backup.CONCLUIDO:
+            self.statusBar().showMessage(
+                f"💾 Backup concluído e verificado: {self.backup.caminho.name} "
+                f"({self.backup.tamanho // 1024} KB)", 10000)
+        else:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "Erro", f"Erro ao fazer o backup:\n{self.backup.erro}")
+        
     def on_linha_clicada(self, row, column):
         """Quando clicar na linha do manifesto, abre a lista de volumes"""
         if column == self.tabela.columnCount() - 1:
@@ -466,7 +581,7 @@ class MainWindow(QMainWindow):
     
     def criar_manifesto_exemplo(self):
         """Cria um manifesto de exemplo para demonstração"""
-        from database import criar_manifesto, adicionar_volume
+        from src.database import criar_manifesto, adicionar_volume
         import time
         
         reply = QMessageBox.question(
@@ -534,7 +649,7 @@ class MainWindow(QMainWindow):
     def abrir_conferencia(self, manifesto_id: int):
         """Abre janela de conferência com tratamento de erro"""
         try:
-            from ui.conferencia_window import ConferenciaWindow
+            from src.ui.conferencia_window import ConferenciaWindow
             self.conferencia_window = ConferenciaWindow(manifesto_id, self)
             if hasattr(self.conferencia_window, 'isVisible'):
                 self.conferencia_window.conferencia_finalizada.connect(self.atualizar_tabela)
@@ -611,7 +726,7 @@ class MainWindow(QMainWindow):
                 for volume in volumes:
                     marcar_volume_recebido(volume['id'], volume['quantidade_expedida'], nome.strip())
                 
-                from database import finalizar_conferencia, registrar_log
+                from src.database import finalizar_conferencia, registrar_log
                 
                 finalizar_conferencia(manifesto_id)
                 registrar_log(
@@ -669,20 +784,8 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             try:
-                from database import get_connection
-                
-                conn = get_connection()
-                try:
-                    cursor = conn.cursor()
-                    
-                    # Apagar em cascata
-                    cursor.execute("DELETE FROM logs WHERE manifesto_id = ?", (manifesto_id,))
-                    cursor.execute("DELETE FROM caixas_individuais WHERE volume_id IN (SELECT id FROM volumes WHERE manifesto_id = ?)", (manifesto_id,))
-                    cursor.execute("DELETE FROM volumes WHERE manifesto_id = ?", (manifesto_id,))
-                    cursor.execute("DELETE FROM manifestos WHERE id = ?", (manifesto_id,))
-                    
-                finally:
-                    conn.close()
+                # Volumes, caixas e logs saem junto (ON DELETE CASCADE)
+                apagar_manifestos([manifesto_id])
                 
                 self.atualizar_tabela()
                 
@@ -699,6 +802,144 @@ class MainWindow(QMainWindow):
                     f"Erro ao apagar manifesto:\n{str(e)}"
                 )
         
+    def iniciar_ingestao(self):
+        """Inicia a importação automática dos PDFs da pasta de entrada"""
+        self.ingestao = ServicoIngestao()
+        self.versao_ingestao = 0
+        try:
+            self.ingestao.iniciar()
+        except Exception as e:
+            self.lbl_ingestao.setText("📥 Importação automática indisponível")
+            print(f"[Ingestão] Não foi possível iniciar: {e}")
+            return
+        
+        self.timer_ingestao = QTimer(self)
+        self.timer_ingestao.timeout.connect(self.atualizar_status_ingestao)
+        self.timer_ingestao.start(2000)
+        self.atualizar_status_ingestao()
+        
+    def atualizar_status_ingestao(self):
+        """Mostra a situação da fila de importação na barra de status"""
+        status = self.ingestao.status_fila()
+        contagem = status['contagem']
+        
+        self.lbl_ingestao.setText(
+            f"📥 Entrada: {contagem[AGUARDANDO]} aguardando | "
+            f"{contagem[PROCESSANDO]} processando | "
+            f"{contagem[IMPORTADO]} importado(s) | "
+            f"{contagem[DUPLICADO] + contagem[ERRO]} com problema"
+        )
+        
+        linhas = [f"Pasta: {status['pasta']}"]
+        for item in status['itens'][:15]:
+            linha = f"{item.atualizado_em.strftime('%H:%M:%S')} {item.arquivo.name}: {item.estado}"
+            if item.mensagem:
+                linha += f" - {item.mensagem}"
+            linhas.append(linha)
+        self.lbl_ingestao.setToolTip("\n".join(linhas))
+        
+        # Novos manifestos importados: atualizar a tabela
+        if status['versao'] != self.versao_ingestao:
+            self.versao_ingestao = status['versao']
+            self.atualizar_tabela()
+        
+    def iniciar_feed(self):
+        """Inicia os destinos extras do feed de alterações (arquivos, réplica, webhook)"""
+        try:
+            iniciados = feed.iniciar_configurados()
+            if iniciados:
+                print(f"[Feed] {iniciados} sink(s) iniciado(s)")
+        except Exception as e:
+            print(f"[Feed] Não foi possível iniciar: {e}")
+        
+    def iniciar_status_sync(self):
+        """Atualiza periodicamente o indicador da sincronização com a planilha"""
+        self.timer_sync = QTimer(self)
+        self.timer_sync.timeout.connect(self.atualizar_status_sync)
+        self.timer_sync.start(5000)
+        self.atualizar_status_sync()
+        
+    def atualizar_status_sync(self):
+        """Mostra pendências, atraso e falhas da sincronização na barra de status"""
+        try:
+            metricas = obter_metricas_sync()
+        except Exception as e:
+            self.lbl_sync.setText("☁️ Planilha: sem informação")
+            self.lbl_sync.setToolTip(str(e))
+            return
+        
+        self.lbl_sync.setText(resumo_sync(metricas))
+        self.lbl_sync.setToolTip(
+            f"Estado: {metricas.get('estado', '-')}\n"
+            f"Pendentes: {metricas['PENDENTE']} (mais antigo: {formatar_duracao(metricas.get('idade_pendente'))})\n"
+            f"Falhas: {metricas['FALHA']}\n"
+            f"Chamadas no último minuto: {metricas.get('chamadas_por_minuto', 0)}\n"
+            f"Retentativas: {metricas.get('retentativas', 0)} | 429: {metricas.get('respostas_429', 0)}\n"
+            f"Último envio: {metricas.get('ultimo_sucesso') or '-'}\n"
+            "Detalhes em Visualizar > Diagnóstico da Planilha"
+        )
+        
+    def abrir_diagnostico_sync(self):
+        """Abre o diagnóstico da sincronização com a planilha"""
+        dialog = DiagnosticoSyncDialog(self)
+        dialog.exec_()
+        self.atualizar_status_sync()
+        
+    def iniciar_manutencao(self):
+        """Agenda a manutenção do banco (só roda ocioso e fora de conferências)"""
+        self.manutencao = manutencao.ServicoManutencao()
+        self.manutencao.iniciar()
+        
+    def mostrar_manutencao(self):
+        """Mostra as últimas execuções da manutenção e permite rodá-la agora"""
+        try:
+            estado = estado_armazenamento()
+            execucoes = listar_manutencoes(10)
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao ler a manutenção:\n{str(e)}")
+            return
+        
+        status = self.manutencao.status()
+        texto = (f"Banco: {estado['tamanho_banco'] / 1048576:.1f} MB | "
+                 f"WAL: {estado['tamanho_wal'] / 1048576:.1f} MB | "
+                 f"Espaço livre: {estado['espaco_livre'] / 1048576:.1f} MB\n")
+        if status['executando']:
+            texto += f"Executando agora: {status['executando']}\n"
+        elif status['adiada']:
+            texto += f"Adiada: {status['adiada']}\n"
+        texto += "\nÚltimas execuções:\n"
+        for execucao in execucoes:
+            texto += (f"{execucao['inicio'][:16].replace('T', ' ')}  {execucao['tarefa']}: {execucao['resultado']} "
+                      f"({execucao['duracao']:.1f} s, {execucao['bytes_recuperados'] // 1024} KB)\n")
+        if not execucoes:
+            texto += "Nenhuma ainda.\n"
+        texto += "\nExecutar todas as tarefas agora?"
+        
+        reply = QMessageBox.question(self, "Manutenção do Banco", texto, QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        if manutencao.conferencia_em_andamento():
+            QMessageBox.warning(self, "Manutenção do Banco",
+                                "Há uma conferência em andamento. Feche-a e tente de novo.")
+            return
+        threading.Thread(target=self.manutencao.executar_pendentes, kwargs={'forcar': True},
+                         daemon=True).start()
+        self.statusBar().showMessage("🧹 Manutenção do banco iniciada em segundo plano", 5000)
+        
+    def closeEvent(self, event):
+        """Encerra os serviços em segundo plano ao fechar"""
+        if getattr(self, 'ingestao', None):
+            self.ingestao.parar()
+        if getattr(self, 'manutencao', None):
+            self.manutencao.parar()
+        if getattr(self, 'backup', None) and self.backup.em_andamento:
+            self.backup.cancelar()
+            self.backup.aguardar(5)
+        feed.parar()
+        if getattr(self, 'trava_uso', None):
+            self.trava_uso.close()
+        super().closeEvent(event)
+        
     def ver_detalhes(self, manifesto_id: int):
         """Abre diálogo de detalhes do manifesto"""
         dialog = DetalhesManifestoDialog(manifesto_id, self)
@@ -5,14 +5,16 @@ Arquivo: src/ui/novo_manifesto_dialog.py
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                              QLineEdit, QPushButton, QFileDialog, QMessageBox,
-                             QGroupBox, QFormLayout, QTextEdit)
+                             QGroupBox, QFormLayout, QTextEdit, QComboBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 from pathlib import Path
 from datetime import datetime
+import os
 
 from src.database import criar_manifesto, adicionar_volume
-from src.pdf_extractor import extrair_manifesto_pdf
+from src.pdf_extractor import (extrair_manifesto_pdf, MOTOR_PADRAO,
+                               MOTOR_TEXTO, MOTOR_COORDENADAS)
 
 
 class NovoManifestoDialog(QDialog):
@@ -57,6 +59,17 @@ class NovoManifestoDialog(QDialog):
         
         group_pdf_layout.addLayout(pdf_layout)
         
+        # Motor de extração (texto corrido ou posição das palavras)
+        motor_layout = QHBoxLayout()
+        motor_layout.addWidget(QLabel("Motor de extração:"))
+        self.combo_motor = QComboBox()
+        self.combo_motor.addItem("Texto (padrão)", MOTOR_TEXTO)
+        self.combo_motor.addItem("Coordenadas das colunas", MOTOR_COORDENADAS)
+        self.combo_motor.setCurrentIndex(self.combo_motor.findData(MOTOR_PADRAO))
+        motor_layout.addWidget(self.combo_motor)
+        motor_layout.addStretch()
+        group_pdf_layout.addLayout(motor_layout)
+        
         btn_extrair = QPushButton("🔍 Extrair Dados do PDF")
         btn_extrair.setStyleSheet("""
             QPushButton {
@@ -180,7 +193,8 @@ class NovoManifestoDialog(QDialog):
             
             # Extrair dados
             self.dados_manifesto, self.volumes, erros = extrair_manifesto_pdf(
-                self.pdf_path
+                self.pdf_path, motor=self.combo_motor.currentData(),
+                processos=os.cpu_count()  # só divide manifestos grandes
             )
             
             # Debug: mostrar o que foi extraído
@@ -0,0 +1,139 @@
+"""
+Sistema de Conferência de Manifestos - Exclusão de Manifestos em Lote
+Arquivo: src/ui/purga_dialog.py
+"""
+
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QGroupBox, QFormLayout, QComboBox,
+                             QDateEdit, QCheckBox, QMessageBox)
+from PyQt5.QtCore import QDate
+from PyQt5.QtGui import QFont
+
+from src.database import purgar_manifestos
+
+STATUS_MANIFESTO = ['NÃO RECEBIDO', 'PARCIALMENTE RECEBIDO', 'TOTALMENTE RECEBIDO']
+
+
+def resumo_exclusao(resultado: dict) -> str:
+    return (f"{resultado['manifestos']} manifesto(s), {resultado['volumes']} volume(s), "
+            f"{resultado['caixas']} caixa(s), {resultado['logs']} log(s) e "
+            f"{resultado['eventos']} evento(s) de sincronização")
+
+
+class PurgaDialog(QDialog):
+    """
+    Apaga de uma vez os manifestos de um período/status (com volumes, caixas,
+    logs e eventos de sincronização). Mostra antes quanto vai ser apagado.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.apagados = 0
+        self.init_ui()
+
+    def init_ui(self):
+        """Inicializa a interface"""
+        self.setWindowTitle("Apagar Manifestos em Lote")
+        self.setMinimumWidth(460)
+
+        layout = QVBoxLayout(self)
+
+        titulo = QLabel("🗑️ Apagar Manifestos em Lote")
+        font = QFont()
+        font.setPointSize(12)
+        font.setBold(True)
+        titulo.setFont(font)
+        layout.addWidget(titulo)
+
+        group_filtro = QGroupBox("Manifestos")
+        form = QFormLayout()
+        periodo_layout = QHBoxLayout()
+        hoje = QDate.currentDate()
+        self.date_inicio = QDateEdit(hoje.addYears(-1))
+        self.date_inicio.setCalendarPopup(True)
+        self.date_fim = QDateEdit(hoje.addMonths(-3))
+        self.date_fim.setCalendarPopup(True)
+        periodo_layout.addWidget(self.date_inicio)
+        periodo_layout.addWidget(QLabel("até"))
+        periodo_layout.addWidget(self.date_fim)
+        form.addRow("Data do manifesto:", periodo_layout)
+
+        self.combo_status = QComboBox()
+        self.combo_status.addItems(["Todos"] + STATUS_MANIFESTO)
+        form.addRow("Status:", self.combo_status)
+
+        self.chk_finalizados = QCheckBox("Somente conferências finalizadas")
+        self.chk_finalizados.setChecked(True)
+        form.addRow("", self.chk_finalizados)
+        group_filtro.setLayout(form)
+        layout.addWidget(group_filtro)
+
+        self.lbl_resultado = QLabel("")
+        self.lbl_resultado.setWordWrap(True)
+        layout.addWidget(self.lbl_resultado)
+
+        # Qualquer mudança nos critérios exige contar de novo antes de apagar
+        for sinal in (self.date_inicio.dateChanged, self.date_fim.dateChanged,
+                      self.combo_status.currentIndexChanged, self.chk_finalizados.toggled):
+            sinal.connect(self.criterios_alterados)
+
+        btn_layout = QHBoxLayout()
+        btn_contar = QPushButton("🔍 Contar")
+        btn_contar.clicked.connect(self.contar)
+        btn_layout.addWidget(btn_contar)
+
+        self.btn_apagar = QPushButton("🗑️ Apagar")
+        self.btn_apagar.setEnabled(False)
+        self.btn_apagar.clicked.connect(self.apagar)
+        btn_layout.addWidget(self.btn_apagar)
+        btn_layout.addStretch()
+
+        btn_fechar = QPushButton("Fechar")
+        btn_fechar.clicked.connect(self.accept)
+        btn_layout.addWidget(btn_fechar)
+        layout.addLayout(btn_layout)
+
+    def criterios(self) -> dict:
+        criterios = {
+            'data_inicio': self.date_inicio.date().toString("yyyy-MM-dd"),
+            'data_fim': self.date_fim.date().toString("yyyy-MM-dd"),
+            'somente_finalizados': self.chk_finalizados.isChecked(),
+        }
+        if self.combo_status.currentIndex() > 0:
+            criterios['status'] = self.combo_status.currentText()
+        return criterios
+
+    def criterios_alterados(self):
+        self.btn_apagar.setEnabled(False)
+        self.lbl_resultado.setText("")
+
+    def contar(self):
+        try:
+            resultado = purgar_manifestos(simular=True, **self.criterios())
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao contar manifestos:\n{str(e)}")
+            return
+        self.lbl_resultado.setText(f"Serão apagados: {resumo_exclusao(resultado)}.")
+        self.btn_apagar.setEnabled(resultado['manifestos'] > 0)
+
+    def apagar(self):
+        reply = QMessageBox.warning(
+            self,
+            "Confirmação",
+            f"{self.lbl_resultado.text()}\n\nEsta ação NÃO pode ser desfeita!",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        try:
+            resultado = purgar_manifestos(**self.criterios())
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao apagar manifestos:\n{str(e)}")
+            return
+
+        self.apagados += resultado['manifestos']
+        self.btn_apagar.setEnabled(False)
+        self.lbl_resultado.setText(
+            f"Apagados: {resumo_exclusao(resultado)} em {resultado['duracao']:.2f} s."
+        )